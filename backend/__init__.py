@@ -1 +1,8 @@
-from .app import create_app
+def __getattr__(name):
+    # Resolved on first use so `python -m backend.cli` and the crawlers don't
+    # pay for importing Flask and every blueprint.
+    if name == "create_app":
+        from .app import create_app
+
+        return create_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,31 @@
+from flask import Blueprint, current_app, jsonify, request
+
+from ..utils.data_manager import get_data_manager
+from ..utils.merged_versions import UnknownVersionError
+
+changes_api = Blueprint("changes_api", __name__)
+
+
+@changes_api.route("/changes", methods=["GET"])
+def get_changes():
+    since = request.args.get("since")
+    if not since:
+        return jsonify({"error": "since is required"}), 400
+
+    manager = get_data_manager(current_app.config["DATA_PATH"], current_app.config["DATA_BACKEND"])
+    try:
+        version, changes = manager.changes_since(since)
+    except UnknownVersionError:
+        # Pruned or never published: the client has to reload everything.
+        return (
+            jsonify(
+                {
+                    "error": "Unknown or pruned version, reload the full dataset",
+                    "since": since,
+                    "version": manager.active_version(),
+                }
+            ),
+            410,
+        )
+
+    return jsonify({"since": since, "version": version, "count": len(changes), "countries": changes})
@@ -1,18 +1,46 @@
 from flask import Blueprint, current_app, jsonify, request
 
-from ..utils.data_manager import DataManager
-from ..crawler.eia_oil import crawl_oil
-from ..crawler.worldbank_gdp import crawl_gdp
-from ..crawler.te_gold_reserves import crawl_gold_reserves
-from ..utils.data_merger import merge_all_data
+from ..utils.data_manager import get_data_manager
+from ..utils.derived_metrics import DERIVED_COLUMNS
+from ..utils.events import job_events
+from ..utils.flatten import VALUE_FIELDS
+from ..utils.refresh import get_refresh_coordinator
 
 country_api = Blueprint("country_api", __name__)
 
+MAX_QUERY_LIMIT = 500
+
+
+def _manager():
+    return get_data_manager(current_app.config["DATA_PATH"], current_app.config["DATA_BACKEND"])
+
+
+def _version():
+    # Optional pinned read; unknown ids raise UnknownVersionError (404).
+    return request.args.get("version") or None
+
+
+def _optional_number(name, cast=float):
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    return cast(value)
+
+
+def _limit(default):
+    """`limit` capped at MAX_QUERY_LIMIT, or None unless it is a positive integer."""
+    try:
+        limit = _optional_number("limit", int)
+    except ValueError:
+        return None
+    if limit is None:
+        return default
+    return min(limit, MAX_QUERY_LIMIT) if limit >= 1 else None
+
 
 @country_api.route("/country/<iso_code>", methods=["GET"])
 def get_country_data(iso_code):
-    manager = DataManager(current_app.config["DATA_PATH"])
-    country = manager.get_country(iso_code)
+    country = _manager().get_country(iso_code, version=_version())
     if not country:
         return jsonify({"error": "Country not found", "code": iso_code.upper()}), 404
 
@@ -21,44 +49,89 @@ def get_country_data(iso_code):
     return jsonify(response)
 
 
+@country_api.route("/query/countries", methods=["GET"])
+def query_countries():
+    metric = request.args.get("metric", "")
+    if metric not in VALUE_FIELDS:
+        return jsonify({"error": "Unknown metric", "metric": metric, "metrics": sorted(VALUE_FIELDS)}), 400
+    try:
+        min_value = _optional_number("min")
+        max_value = _optional_number("max")
+        year = _optional_number("year", int)
+    except ValueError:
+        return jsonify({"error": "min, max and year must be numbers"}), 400
+    limit = _limit(MAX_QUERY_LIMIT)
+    if limit is None:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+
+    results = _manager().query_countries(
+        metric, min_value, max_value, year, limit, version=_version()
+    )
+    return jsonify({"metric": metric, "count": len(results), "results": results})
+
+
+@country_api.route("/query/rank/<metric>", methods=["GET"])
+def rank_countries(metric):
+    if metric not in VALUE_FIELDS:
+        return jsonify({"error": "Unknown metric", "metric": metric, "metrics": sorted(VALUE_FIELDS)}), 400
+    limit = _limit(10)
+    if limit is None:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    descending = request.args.get("order", "desc").lower() != "asc"
+
+    results = _manager().rank(metric, limit, descending, version=_version())
+    return jsonify({"metric": metric, "order": "desc" if descending else "asc", "results": results})
+
+
+@country_api.route("/derived/<column>", methods=["GET"])
+def derived_column(column):
+    # Precomputed at merge time; this only orders the stored values.
+    if column not in DERIVED_COLUMNS:
+        return jsonify({"error": "Unknown column", "column": column, "columns": list(DERIVED_COLUMNS)}), 400
+    limit = _limit(10)
+    if limit is None:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    descending = request.args.get("order", "desc").lower() != "asc"
+
+    results = _manager().derived(column, limit, descending, version=_version())
+    return jsonify({"column": column, "order": "desc" if descending else "asc", "results": results})
+
+
+@country_api.route("/data/versions", methods=["GET"])
+def list_versions():
+    manager = _manager()
+    return jsonify({"active": manager.active_version(), "versions": manager.versions.versions()})
+
+
 @country_api.route("/data/refresh", methods=["POST"])
 def refresh_data():
     payload = request.get_json(silent=True) or {}
     scope = payload.get("scope", "all")
 
-    if scope == "gdp":
-        crawl_gdp()
-    elif scope == "oil":
-        crawl_oil()
-    elif scope == "agriculture":
-        # Lazy import to avoid importing pandas on app startup.
-        from ..crawler.fao_agriculture import crawl_agriculture
-
-        crawl_agriculture()
-    elif scope == "minerals":
-        # Lazy import to avoid importing pandas on app startup.
-        from ..crawler.usgs_minerals import crawl_minerals
-
-        crawl_minerals()
-    elif scope == "gold_reserves":
-        crawl_gold_reserves()
-    else:
-        from ..crawler.fao_agriculture import crawl_agriculture
-        from ..crawler.usgs_minerals import crawl_minerals
-
-        crawl_gdp()
-        crawl_oil()
-        crawl_agriculture()
-        crawl_minerals()
-        crawl_gold_reserves()
-
-    merged = merge_all_data()
-    metadata = merged.get("metadata", {})
+    # "profile": true (or {"cprofile": true, "collapsed": true}) returns
+    # per-stage timings; profile files are written under data/profiles.
+    profile = payload.get("profile") or None
+    if isinstance(profile, dict):
+        profile = {key: bool(profile.get(key)) for key in ("cprofile", "collapsed")}
+
+    # Concurrent refreshes share one run; recently crawled sources are skipped.
+    with job_events("refresh", scope=scope):
+        result = get_refresh_coordinator().run(
+            scope, force=bool(payload.get("force")), profile=profile
+        )
+    manager = _manager()
+    metadata = manager.get_metadata()
     return jsonify(
         {
-            "status": "ok",
+            "status": "partial" if result["partial"] else "ok",
             "scope": scope,
-            "generated_at": metadata.get("generated_at"),
-            "last_crawl": metadata.get("last_crawl"),
+            "generated_at": result["generated_at"] or metadata.get("generated_at"),
+            "last_crawl": result["last_crawl"] or metadata.get("last_crawl"),
+            "version": manager.active_version(),
+            "crawled": result["crawled"],
+            "skipped": result["skipped"],
+            "coalesced": result["coalesced"],
+            "sources": result["sources"],
+            "profile": result.get("profile"),
         }
     )
@@ -0,0 +1,67 @@
+import hmac
+import os
+import threading
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from ..utils.profiling import StackSampler
+
+debug_api = Blueprint("debug_api", __name__)
+
+MAX_PROFILE_SECONDS = 60
+PROFILE_FORMATS = ("collapsed", "pstats")
+
+# One sampling run per process at a time; each adds load of its own.
+_profile_lock = threading.Lock()
+
+
+def _authorized():
+    token = current_app.config.get("ADMIN_TOKEN")
+    supplied = request.headers.get("X-Admin-Token", "")
+    auth = request.headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        supplied = auth[len("Bearer "):]
+    return hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8"))
+
+
+@debug_api.route("/debug/profile", methods=["GET"])
+def profile_process():
+    """Sample every thread of this worker for `seconds` and return the stacks.
+
+    Disabled (404) unless WORLD_GAME_ADMIN_TOKEN is set; callers send it as
+    a Bearer token or X-Admin-Token. Only the worker that takes the request
+    is sampled; X-Profile-Pid says which one.
+    """
+    if not current_app.config.get("ADMIN_TOKEN"):
+        return jsonify({"error": "Not found"}), 404
+    if not _authorized():
+        return jsonify({"error": "Admin token required"}), 401
+
+    try:
+        seconds = float(request.args.get("seconds", 10))
+        interval = float(request.args.get("interval", 0.01))
+    except ValueError:
+        return jsonify({"error": "seconds and interval must be numbers"}), 400
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        return jsonify({"error": f"seconds must be in (0, {MAX_PROFILE_SECONDS}]"}), 400
+    interval = min(max(interval, 0.001), 1.0)
+    output = request.args.get("format", "collapsed")
+    if output not in PROFILE_FORMATS:
+        return jsonify({"error": "Unknown format", "formats": list(PROFILE_FORMATS)}), 400
+
+    if not _profile_lock.acquire(blocking=False):
+        return jsonify({"error": "A profile is already running in this worker"}), 409
+    try:
+        # This request's own thread only sleeps; leave it out.
+        sampler = StackSampler(interval=interval, exclude=[threading.get_ident()])
+        sampler.run_for(seconds)
+    finally:
+        _profile_lock.release()
+
+    headers = {"X-Profile-Pid": str(os.getpid()), "X-Profile-Samples": str(sampler.samples)}
+    if output == "pstats":
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        headers["Content-Disposition"] = f'attachment; filename="profile-{os.getpid()}-{stamp}.prof"'
+        return Response(sampler.pstats_data(), mimetype="application/octet-stream", headers=headers)
+    return Response(sampler.collapsed(), mimetype="text/plain", headers=headers)
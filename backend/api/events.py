@@ -0,0 +1,29 @@
+from urllib.parse import urlsplit
+
+from flask import Blueprint, current_app, jsonify, redirect, request
+
+events_api = Blueprint("events_api", __name__)
+
+
+def events_url():
+    """Where the asyncio fan-out serves SSE, or None when none is running."""
+    url = current_app.config.get("EVENTS_URL")
+    port = current_app.config.get("EVENTS_PORT")
+    if not url and port:
+        # urlsplit strips the port and the brackets of an IPv6 literal.
+        host = urlsplit(f"//{request.host}").hostname
+        if ":" in host:
+            host = f"[{host}]"
+        url = f"{request.scheme}://{host}:{port}/api/events"
+    return url
+
+
+@events_api.route("/events", methods=["GET"])
+def event_stream():
+    # SSE is only served by the fan-out, which holds idle clients without a
+    # worker thread each; streaming here would pin a worker per open tab.
+    url = events_url()
+    if not url:
+        return jsonify({"error": "Live events are not enabled on this server"}), 503
+    query = request.query_string.decode("latin-1")
+    return redirect(url + (f"?{query}" if query else ""), code=307)
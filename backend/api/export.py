@@ -0,0 +1,31 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from ..utils.data_manager import get_data_manager
+from ..utils.export import EXPORT_FORMATS, EXPORT_METRICS, export_stream, parquet_available, parse_metrics
+
+export_api = Blueprint("export_api", __name__)
+
+
+@export_api.route("/export", methods=["GET"])
+def export_data():
+    """Stream every country as flat rows: ?format=csv|ndjson|parquet&metrics=..."""
+    output = request.args.get("format", "csv")
+    if output not in EXPORT_FORMATS:
+        return jsonify({"error": "Unknown format", "formats": list(EXPORT_FORMATS)}), 400
+    try:
+        metrics = parse_metrics(request.args.get("metrics"))
+    except ValueError as exc:
+        return jsonify({"error": "Invalid metrics", "metrics": str(exc), "available": list(EXPORT_METRICS)}), 400
+    if output == "parquet" and not parquet_available():
+        return jsonify({"error": "Parquet export needs pyarrow installed"}), 501
+
+    manager = get_data_manager(current_app.config["DATA_PATH"], current_app.config["DATA_BACKEND"])
+    # Pin the reader now so a refresh mid-stream can't mix two versions.
+    version_id, reader = manager.reader(request.args.get("version"))
+    headers = {
+        "Content-Disposition": f'attachment; filename="countries.{output}"',
+        "X-Accel-Buffering": "no",
+    }
+    if version_id:
+        headers["X-Data-Version"] = version_id
+    return Response(export_stream(reader, output, metrics), mimetype=EXPORT_FORMATS[output], headers=headers)
@@ -0,0 +1,21 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from ..utils.geometry_index import get_geometry_index, parse_bbox, parse_zoom
+
+geometry_api = Blueprint("geometry_api", __name__)
+
+
+@geometry_api.route("/geometry", methods=["GET"])
+def get_geometry():
+    try:
+        bbox = parse_bbox(request.args.get("bbox"))
+        zoom = parse_zoom(request.args.get("zoom", 2))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    index = get_geometry_index(current_app.config["GEOJSON_PATH"])
+    try:
+        body = index.query(bbox, zoom)
+    except FileNotFoundError:
+        return jsonify({"error": "Country boundaries are not available"}), 503
+    return Response(body, mimetype="application/json")
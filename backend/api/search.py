@@ -0,0 +1,25 @@
+from flask import Blueprint, current_app, jsonify, request
+
+from ..utils.data_manager import get_data_manager
+from ..utils.search_index import get_search_index
+
+search_api = Blueprint("search_api", __name__)
+
+MAX_SEARCH_LIMIT = 50
+
+
+@search_api.route("/search", methods=["GET"])
+def search_countries():
+    """Type-ahead over names, Chinese names, capitals, ISO codes and aliases."""
+    query = request.args.get("q", "")
+    try:
+        limit = min(int(request.args.get("limit") or 10), MAX_SEARCH_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+
+    manager = get_data_manager(current_app.config["DATA_PATH"], current_app.config["DATA_BACKEND"])
+    version_id, reader = manager.reader(request.args.get("version"))
+    # Same keying as /api/simulate: unversioned data is keyed by its merge time.
+    key = (reader.data_path, version_id or reader.get_metadata().get("generated_at"))
+    index = get_search_index(key, lambda: dict(reader.iter_countries()))
+    return jsonify({"query": query, "results": index.search(query, max(limit, 1))})
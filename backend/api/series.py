@@ -0,0 +1,68 @@
+from flask import Blueprint, jsonify, request
+
+from ..utils.series_store import get_series_store
+
+series_api = Blueprint("series_api", __name__)
+
+
+def _read(codes):
+    metric = request.args.get("metric", "gdp")
+    try:
+        result = get_series_store().read(
+            metric,
+            codes=codes,
+            start=request.args.get("from"),
+            end=request.args.get("to"),
+        )
+    except KeyError:
+        return None, (jsonify({"error": "Invalid metric", "metric": metric}), 400)
+    except ValueError as exc:
+        return None, (jsonify({"error": str(exc)}), 400)
+    if result is None:
+        return None, (jsonify({"error": "Series not found", "metric": metric}), 404)
+    return result, None
+
+
+@series_api.route("/series", methods=["GET"])
+def get_series():
+    countries = request.args.get("countries")
+    codes = None
+    if countries:
+        codes = [code.strip().upper() for code in countries.split(",") if code.strip()]
+    result, error = _read(codes)
+    if error:
+        return error
+    return jsonify(result)
+
+
+@series_api.route("/series/metrics", methods=["GET"])
+def list_metrics():
+    store = get_series_store()
+    return jsonify({metric: store.meta(metric) for metric in store.metrics()})
+
+
+@series_api.route("/country/<iso_code>/series", methods=["GET"])
+def get_country_series(iso_code):
+    code = iso_code.upper()
+    result, error = _read([code])
+    if error:
+        return error
+    values = result["series"].get(code)
+    if values is None:
+        return jsonify({"error": "Country not found", "code": code, "metric": result["metric"]}), 404
+
+    points = [
+        {"period": period, "value": value}
+        for period, value in zip(result["periods"], values)
+        if value is not None
+    ]
+    return jsonify(
+        {
+            "code": code,
+            "metric": result["metric"],
+            "freq": result["freq"],
+            "unit": result["unit"],
+            "source": result["source"],
+            "points": points,
+        }
+    )
@@ -0,0 +1,34 @@
+from flask import Blueprint, current_app, jsonify, request
+
+from ..utils.data_manager import get_data_manager
+from ..utils.simulation import get_baseline, simulate
+
+simulate_api = Blueprint("simulate_api", __name__)
+
+
+@simulate_api.route("/simulate", methods=["POST"])
+def run_simulation():
+    """Project scenarios over the merged data.
+
+    Body: {"ticks": 20, "scenarios": [...], "countries": ["USA"], "version": id};
+    see simulation.Scenarios for the scenario fields.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+
+    version = payload.get("version")
+    if version is not None and not isinstance(version, str):
+        return jsonify({"error": "version must be a string"}), 400
+
+    manager = get_data_manager(current_app.config["DATA_PATH"], current_app.config["DATA_BACKEND"])
+    version_id, reader = manager.reader(version)
+    # Unversioned data is keyed by its merge time so a re-merge rebuilds it.
+    key = (reader.data_path, version_id or reader.get_metadata().get("generated_at"))
+    baseline = get_baseline(key, lambda: dict(reader.iter_countries()))
+    try:
+        result = simulate(baseline, payload.get("scenarios"), payload.get("ticks", 10), payload.get("countries"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    result["version"] = version_id
+    return jsonify(result)
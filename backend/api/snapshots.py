@@ -0,0 +1,70 @@
+from flask import Blueprint, jsonify, request
+
+from ..utils.data_merger import merge_all_data
+from ..utils.lru_cache import LRUCache
+from ..utils.snapshot_store import RAW_SOURCES, as_of_key, get_snapshot_store
+from ..utils.storage import file_stamp, get_data_dir
+
+snapshots_api = Blueprint("snapshots_api", __name__)
+
+# Historical merges by the snapshots they read and the merged file they
+# start from; a full merge takes around a second.
+_merged_as_of = LRUCache(8)
+
+
+@snapshots_api.route("/snapshots", methods=["GET"])
+def list_sources():
+    summary = {}
+    for source in RAW_SOURCES:
+        store = get_snapshot_store(source)
+        latest = store.latest_entry()
+        summary[source] = {
+            "count": len(store.entries()),
+            "latest": latest,
+        }
+    return jsonify(summary)
+
+
+@snapshots_api.route("/snapshots/merged", methods=["GET"])
+def merged_as_of():
+    as_of = request.args.get("as_of")
+    if not as_of:
+        return jsonify({"error": "as_of is required"}), 400
+    try:
+        key = (as_of_key(as_of), file_stamp(get_data_dir("merged", "countries_data.json")))
+        merged = _merged_as_of.get(key)
+        if merged is None:
+            merged = merge_all_data(as_of=as_of, write=False)
+            _merged_as_of.put(key, merged)
+    except (ValueError, OverflowError):
+        return jsonify({"error": "Invalid as_of", "as_of": as_of}), 400
+    return jsonify(merged)
+
+
+@snapshots_api.route("/snapshots/<source>", methods=["GET"])
+def list_snapshots(source):
+    if source not in RAW_SOURCES:
+        return jsonify({"error": "Unknown source", "source": source}), 404
+    return jsonify({"source": source, "entries": get_snapshot_store(source).entries()})
+
+
+@snapshots_api.route("/snapshots/<source>/<ref>", methods=["GET"])
+def get_snapshot(source, ref):
+    """`ref` is a snapshot id, `latest`, or a date/time for an as-of read."""
+    if source not in RAW_SOURCES:
+        return jsonify({"error": "Unknown source", "source": source}), 404
+
+    store = get_snapshot_store(source)
+    try:
+        if ref == "latest":
+            entry = store.latest_entry()
+        elif ref.isdigit():
+            entry = store.entry(ref)
+        else:
+            entry = store.entry_as_of(ref)
+    except (ValueError, OverflowError):
+        return jsonify({"error": "Invalid snapshot reference", "ref": ref}), 400
+
+    if not entry:
+        return jsonify({"error": "Snapshot not found", "source": source, "ref": ref}), 404
+    return jsonify({"source": source, "snapshot": entry, "data": store.get(entry["id"])})
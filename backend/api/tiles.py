@@ -0,0 +1,34 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from ..utils.data_manager import get_data_manager
+from ..utils.storage import file_stamp
+from ..utils.vector_tiles import get_tile_cache
+
+tiles_api = Blueprint("tiles_api", __name__)
+
+MVT_MIMETYPE = "application/vnd.mapbox-vector-tile"
+
+
+@tiles_api.route("/tiles/<int:z>/<int:x>/<int:y>.pbf", methods=["GET"])
+def get_tile(z, x, y):
+    cache = get_tile_cache(
+        current_app.config["TILE_CACHE_DIR"], current_app.config["GEOJSON_PATH"]
+    )
+
+    data_stamp = None
+    get_country = None
+    if request.args.get("metrics", "").lower() in {"1", "true", "yes"}:
+        data_path = current_app.config["DATA_PATH"]
+        manager = get_data_manager(data_path, current_app.config["DATA_BACKEND"])
+        version_id, reader = manager.reader(request.args.get("version"))
+        data_stamp = version_id or file_stamp(data_path)
+        get_country = reader.get_country
+
+    try:
+        tile = cache.get_tile(z, x, y, data_stamp=data_stamp, get_country=get_country)
+    except ValueError as exc:
+        return jsonify({"error": str(exc), "tile": f"{z}/{x}/{y}"}), 404
+    except FileNotFoundError:
+        return jsonify({"error": "Country boundaries are not available"}), 503
+
+    return Response(tile, mimetype=MVT_MIMETYPE)
@@ -2,41 +2,98 @@ import os
 import sys
 from datetime import datetime
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 
 if __package__ in (None, ""):
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     if base_dir not in sys.path:
         sys.path.insert(0, base_dir)
+    from backend.api.changes import changes_api
     from backend.api.country_data import country_api
-    from backend.utils.data_manager import DataManager
+    from backend.api.debug import debug_api
+    from backend.api.events import events_api
+    from backend.api.export import export_api
+    from backend.api.geometry import geometry_api
+    from backend.api.search import search_api
+    from backend.api.series import series_api
+    from backend.api.simulate import simulate_api
+    from backend.api.snapshots import snapshots_api
+    from backend.api.tiles import tiles_api
+    from backend.utils.compression import init_compression
+    from backend.utils.data_manager import get_data_manager
+    from backend.utils.merged_versions import UnknownVersionError
+    from backend.utils.server_timing import init_server_timing
+    from backend.utils.static_assets import send_asset
+    from backend.utils.storage import get_geojson_path, get_tile_cache_dir
 else:
+    from .api.changes import changes_api
     from .api.country_data import country_api
-    from .utils.data_manager import DataManager
-
-
-def create_app():
+    from .api.debug import debug_api
+    from .api.events import events_api
+    from .api.export import export_api
+    from .api.geometry import geometry_api
+    from .api.search import search_api
+    from .api.series import series_api
+    from .api.simulate import simulate_api
+    from .api.snapshots import snapshots_api
+    from .api.tiles import tiles_api
+    from .utils.compression import init_compression
+    from .utils.data_manager import get_data_manager
+    from .utils.merged_versions import UnknownVersionError
+    from .utils.server_timing import init_server_timing
+    from .utils.static_assets import send_asset
+    from .utils.storage import get_geojson_path, get_tile_cache_dir
+
+
+def create_app(data_backend=None):
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     data_path = os.environ.get(
         "WORLD_GAME_DATA_PATH",
         os.path.join(base_dir, "data", "merged", "countries_data.json"),
     )
 
-    app = Flask(
-        __name__,
-        static_folder=os.path.join(base_dir, "static"),
-        static_url_path="/static",
+    # Static files go through send_asset (see below) instead of Flask's
+    # built-in static route so Range handling is the same for every asset.
+    app = Flask(__name__, static_folder=None)
+    # Range clients (e.g. FlatGeobuf readers) need these headers cross-origin,
+    # and browser devtools/RUM read Server-Timing.
+    CORS(
+        app,
+        expose_headers=["Accept-Ranges", "Content-Length", "Content-Range", "ETag", "Server-Timing"],
     )
-    app.json.ensure_ascii = False
-    CORS(app)
 
     app.config["DATA_PATH"] = data_path
     app.config["DATA_VERSION"] = "0.1"
-
+    # Entry points pick their own default (backend.wsgi uses mmap).
+    app.config["DATA_BACKEND"] = data_backend or os.environ.get("WORLD_GAME_DATA_BACKEND", "json")
+    # seed-tiles resolves the same paths, so it fills the cache the app reads.
+    app.config["GEOJSON_PATH"] = get_geojson_path()
+    app.config["TILE_CACHE_DIR"] = get_tile_cache_dir()
+    # Where the SSE fan-out listens; /api/events answers 503 if neither is set.
+    app.config["EVENTS_URL"] = os.environ.get("WORLD_GAME_EVENTS_URL")
+    app.config["EVENTS_PORT"] = os.environ.get("WORLD_GAME_EVENTS_PORT")
+    # Enables /debug/profile for callers presenting this token.
+    app.config["ADMIN_TOKEN"] = os.environ.get("WORLD_GAME_ADMIN_TOKEN")
+
+    app.register_blueprint(changes_api, url_prefix="/api")
     app.register_blueprint(country_api, url_prefix="/api")
+    app.register_blueprint(debug_api)
+    app.register_blueprint(events_api, url_prefix="/api")
+    app.register_blueprint(export_api, url_prefix="/api")
+    app.register_blueprint(geometry_api, url_prefix="/api")
+    app.register_blueprint(search_api, url_prefix="/api")
+    app.register_blueprint(series_api, url_prefix="/api")
+    app.register_blueprint(simulate_api, url_prefix="/api")
+    app.register_blueprint(snapshots_api, url_prefix="/api")
+    app.register_blueprint(tiles_api)
+    # Installs a timed JSON provider, so configure JSON output after it.
+    init_server_timing(app)
+    app.json.ensure_ascii = False
+    init_compression(app)
 
     frontend_dir = os.path.join(base_dir, "frontend")
+    static_dir = os.path.join(base_dir, "static")
 
     @app.route("/", methods=["GET"])
     def index():
@@ -46,21 +103,39 @@ def create_app():
     def frontend_assets(filename):
         return send_from_directory(frontend_dir, filename)
 
+    @app.route("/static/<path:filename>", methods=["GET"])
+    def static_assets(filename):
+        return send_asset(static_dir, filename)
+
     @app.route("/static/data/<path:filename>", methods=["GET"])
     def data_assets(filename):
         data_dir = os.path.join(base_dir, "data", "merged")
-        return send_from_directory(data_dir, filename)
+        data_path = app.config["DATA_PATH"]
+        if filename == os.path.basename(data_path):
+            # Serve the same version as the API: pinned, active, or the plain file.
+            manager = get_data_manager(data_path, app.config["DATA_BACKEND"])
+            version_id, _ = manager.reader(request.args.get("version"))
+            if version_id:
+                data_dir = os.path.dirname(manager.versions.data_path(version_id))
+        return send_asset(data_dir, filename)
+
+    @app.errorhandler(UnknownVersionError)
+    def unknown_version(error):
+        return jsonify({"error": "Unknown data version", "version": error.args[0]}), 404
 
     @app.route("/api/health", methods=["GET"])
     def health():
-        manager = DataManager(app.config["DATA_PATH"])
-        metadata = manager.get_metadata()
+        manager = get_data_manager(app.config["DATA_PATH"], app.config["DATA_BACKEND"])
+        active_version, reader = manager.reader()
+        metadata = reader.get_metadata()
         return jsonify(
             {
                 "status": "healthy",
                 "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
                 "data_version": metadata.get("version", app.config["DATA_VERSION"]),
                 "last_crawl": metadata.get("last_crawl", metadata.get("generated_at")),
+                "active_version": active_version,
+                "events": bool(app.config["EVENTS_URL"] or app.config["EVENTS_PORT"]),
             }
         )
 
@@ -71,4 +146,11 @@ app = create_app()
 
 
 if __name__ == "__main__":
+    from backend.utils.event_server import start_event_server
+
+    # The reloader runs this block in a watcher and a serving process; only
+    # the serving one gets the fan-out.
+    if not app.config["EVENTS_URL"] and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        app.config["EVENTS_PORT"] = app.config["EVENTS_PORT"] or 5001
+        start_event_server("0.0.0.0", int(app.config["EVENTS_PORT"]))
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -1,53 +1,203 @@
 import argparse
+import os
 import sys
 
-from .crawler.eia_oil import crawl_oil
-from .crawler.fao_agriculture import crawl_agriculture
-from .crawler.usgs_minerals import crawl_minerals
-from .crawler.worldbank_gdp import crawl_gdp
-from .crawler.te_gold_reserves import crawl_gold_reserves
+from .crawler.registry import command_name, crawler_sources, get_crawler
 from .utils.data_merger import merge_all_data
+from .utils.event_server import run_event_server
+from .utils.merged_versions import UnknownVersionError, get_version_store
+from .utils.profiling import format_report, maybe_profile
+from .utils.refresh import get_refresh_coordinator
+from .utils.scheduler import CrawlScheduler
+from .utils.snapshot_store import RAW_SOURCES, get_snapshot_store
+from .utils.storage import get_data_dir, get_geojson_path, get_tile_cache_dir
+from .utils.vector_tiles import seed_tiles
 
 
 def main(argv=None):
     parser = argparse.ArgumentParser(prog="world-game")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
-    sub.add_parser("crawl-gdp")
-    sub.add_parser("crawl-oil")
-    sub.add_parser("crawl-agriculture")
-    sub.add_parser("crawl-minerals")
-    sub.add_parser("crawl-gold-reserves")
-    sub.add_parser("crawl-all")
-    sub.add_parser("merge")
+    profiling = argparse.ArgumentParser(add_help=False)
+    profiling.add_argument("--profile", action="store_true", help="time each stage and track peak memory")
+    profiling.add_argument("--cprofile", action="store_true", help="also dump cProfile stats (.prof)")
+    profiling.add_argument("--collapsed", action="store_true", help="also dump sampled collapsed stacks")
+    profiling.add_argument("--profile-dir", default=None, help="where to write profile files (default data/profiles)")
+
+    # One crawl-<source> command per registered crawler; the crawler module
+    # itself is only imported when its command runs.
+    crawl_commands = {command_name(source): source for source in crawler_sources()}
+    for command in crawl_commands:
+        sub.add_parser(command, parents=[profiling])
+    sub.add_parser("crawl-all", parents=[profiling])
+    sub.add_parser("merge", parents=[profiling])
+
+    sub.add_parser("precompress")
+
+    snapshots = sub.add_parser("snapshots")
+    snapshots.add_argument("action", choices=["list", "import", "compact"])
+    snapshots.add_argument("--source", choices=RAW_SOURCES, default=None)
+    snapshots.add_argument("--keep", type=int, default=12)
+
+    seed = sub.add_parser("seed-tiles")
+    seed.add_argument("--min-zoom", type=int, default=0)
+    seed.add_argument("--max-zoom", type=int, default=4)
+    seed.add_argument("--workers", type=int, default=None)
+
+    versions = sub.add_parser("versions")
+    versions.add_argument("action", choices=["list", "rollback", "prune"])
+    versions.add_argument("--to", default=None, help="version id to activate (default: previous)")
+    versions.add_argument("--keep", type=int, default=20)
+
+    schedule = sub.add_parser("schedule")
+    schedule.add_argument("--once", action="store_true", help="check all sources once and exit")
+    schedule.add_argument("--dry-run", action="store_true", help="only print which sources are due")
+    schedule.add_argument("--tick-minutes", type=int, default=10)
+    schedule.add_argument("--source", choices=RAW_SOURCES, action="append", default=None)
+
+    serve = sub.add_parser("serve")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=5000)
+    serve.add_argument("--workers", type=int, default=None)
+    serve.add_argument("--events-port", type=int, default=None, help="SSE fan-out port (default: --port + 1)")
+
+    export = sub.add_parser("export")
+    export.add_argument("--format", choices=["csv", "ndjson", "parquet"], default="csv")
+    export.add_argument("--metrics", default=None, help="comma-separated metrics (default: all)")
+    export.add_argument("--version", default=None, help="data version id (default: active)")
+    export.add_argument("--output", default="-", help="file to write (default: stdout)")
+
+    events = sub.add_parser("events-server")
+    events.add_argument("--host", default="0.0.0.0")
+    events.add_argument("--port", type=int, default=5001)
 
     args = parser.parse_args(argv)
+    profile = None
+    if getattr(args, "profile", False) or getattr(args, "cprofile", False) or getattr(args, "collapsed", False):
+        profile = {"cprofile": args.cprofile, "collapsed": args.collapsed, "output_dir": args.profile_dir}
+
+    if args.cmd in crawl_commands:
+        source = crawl_commands[args.cmd]
+        with maybe_profile(f"crawl-{source}", profile) as session:
+            get_crawler(source)()
+        if session is not None:
+            print(format_report(session.report))
+        return 0
+    if args.cmd == "crawl-all":
+        # Through the coordinator so a running server refresh isn't raced.
+        result = get_refresh_coordinator().run("all", force=True, profile=profile)
+        print(f"crawled: {', '.join(result['crawled']) or '-'}")
+        for source, entry in result["sources"].items():
+            if entry["status"] != "ok":
+                print(f"{source}: {entry['status']} {entry.get('error') or ''}".rstrip())
+            if entry.get("profile"):
+                print(format_report(entry["profile"]))
+        if result.get("profile"):
+            print(format_report(result["profile"]))
+        return 0
+    if args.cmd == "merge":
+        with maybe_profile("merge", profile) as session:
+            merge_all_data()
+        if session is not None:
+            print(format_report(session.report))
+        return 0
+    if args.cmd == "snapshots":
+        for source in [args.source] if args.source else RAW_SOURCES:
+            store = get_snapshot_store(source)
+            if args.action == "import":
+                entries = store.import_legacy()
+                print(f"{source}: imported {len(entries)} legacy file(s)")
+            elif args.action == "compact":
+                removed = store.compact(keep_recent=args.keep)
+                print(f"{source}: removed {len(removed)} snapshot(s)")
+            else:
+                for entry in store.entries():
+                    print(f"{source}\t{entry['id']}\t{entry['created_at']}\t{entry['period']}\t{entry['size']}")
+        return 0
+    if args.cmd == "precompress":
+        # Imported here: the compression module also carries the Flask hooks.
+        from .utils.compression import precompress_file, precompress_targets
 
-    if args.cmd == "crawl-gdp":
-        crawl_gdp()
+        for path in precompress_targets():
+            for sibling in precompress_file(path):
+                print(f"wrote {sibling}")
         return 0
-    if args.cmd == "crawl-oil":
-        crawl_oil()
+    if args.cmd == "seed-tiles":
+        count = seed_tiles(
+            get_tile_cache_dir(),
+            get_geojson_path(),
+            args.min_zoom,
+            args.max_zoom,
+            workers=args.workers,
+        )
+        print(f"seeded {count} tiles (z{args.min_zoom}-z{args.max_zoom})")
         return 0
-    if args.cmd == "crawl-agriculture":
-        crawl_agriculture()
+    if args.cmd == "versions":
+        store = get_version_store(get_data_dir("merged", "countries_data.json"))
+        if args.action == "rollback":
+            try:
+                print(f"active: {store.rollback(args.to)}")
+            except KeyError as exc:
+                print(f"rollback failed: {exc.args[0]}")
+                return 1
+        elif args.action == "prune":
+            removed = store.prune(keep=args.keep)
+            print(f"removed {len(removed)} version(s)")
+        else:
+            active = store.active()
+            for version_id in store.versions():
+                print(f"{'*' if version_id == active else ' '} {version_id}")
         return 0
-    if args.cmd == "crawl-minerals":
-        crawl_minerals()
+    if args.cmd == "schedule":
+        scheduler = CrawlScheduler()
+        if args.once or args.dry_run:
+            decisions = scheduler.tick(
+                sources=args.source, dry_run=args.dry_run, force_check=args.dry_run
+            )
+            for source, (due, reason) in decisions.items():
+                print(f"{source}\t{'due' if due else 'skip'}\t{reason}")
+            return 0
+        print(f"scheduler running, checking every {args.tick_minutes} min")
+        scheduler.run_forever(tick_minutes=args.tick_minutes)
         return 0
-    if args.cmd == "crawl-gold-reserves":
-        crawl_gold_reserves()
+    if args.cmd == "serve":
+        # Imported here: loading the WSGI module builds the Flask app.
+        from .wsgi import serve as serve_app
+
+        serve_app(args.host, args.port, workers=args.workers, events_port=args.events_port)
         return 0
-    if args.cmd == "crawl-all":
-        crawl_gdp()
-        crawl_oil()
-        crawl_agriculture()
-        crawl_minerals()
-        crawl_gold_reserves()
-        merge_all_data()
+    if args.cmd == "export":
+        # Imported here: only this command needs the dataset readers.
+        from .utils.data_manager import get_data_manager
+        from .utils.export import export_stream, parquet_available, parse_metrics
+
+        try:
+            metrics = parse_metrics(args.metrics)
+        except ValueError as exc:
+            print(f"unknown metrics: {exc}", file=sys.stderr)
+            return 1
+        if args.format == "parquet" and not parquet_available():
+            print("parquet export needs pyarrow installed", file=sys.stderr)
+            return 1
+        manager = get_data_manager(get_data_dir("merged", "countries_data.json"))
+        try:
+            _, reader = manager.reader(args.version)
+        except UnknownVersionError as exc:
+            print(f"unknown version: {exc.args[0]}", file=sys.stderr)
+            return 1
+        out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        try:
+            for chunk in export_stream(reader, args.format, metrics):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+            else:
+                out.flush()
         return 0
-    if args.cmd == "merge":
-        merge_all_data()
+    if args.cmd == "events-server":
+        print(f"Events on http://{args.host}:{args.port}/api/events")
+        run_event_server(args.host, args.port)
         return 0
 
     return 2
@@ -9,7 +9,9 @@ from bs4 import BeautifulSoup
 
 from ..utils.country_codes import to_iso3
 from ..utils.lag_checker import check_data_freshness
-from ..utils.storage import get_data_dir, write_json
+from ..utils.profiling import stage
+from ..utils.series_store import FREQ_MONTHLY, write_series
+from ..utils.snapshot_store import save_raw_snapshot
 
 TE_CRUDE_OIL_URL = "https://zh.tradingeconomics.com/country-list/crude-oil-production"
 
@@ -56,12 +58,33 @@ def _slug_to_name(slug: str):
     return overrides.get(lowered, name)
 
 
-def crawl_oil():
-    response = requests.get(TE_CRUDE_OIL_URL, headers=REQUEST_HEADERS, timeout=60)
-    response.raise_for_status()
+def _write_history(values):
+    # Each crawl only sees the latest release, so monthly history is built up
+    # by upserting every crawl's observations into the series store.
+    dated = [(iso, entry) for iso, entry in values.items() if entry["year"] and entry["month"]]
+    if not dated:
+        return
+    write_series(
+        "oil_production",
+        [iso for iso, _ in dated],
+        [entry["year"] * 100 + entry["month"] for _, entry in dated],
+        [entry["value"] for _, entry in dated],
+        FREQ_MONTHLY,
+        unit="桶/日",
+        source="Trading Economics (Crude Oil Production)",
+    )
+
 
-    soup = BeautifulSoup(response.text, "lxml")
-    table = soup.select_one("table.table-heatmap")
+def crawl_oil():
+    with stage("fetch"):
+        response = requests.get(TE_CRUDE_OIL_URL, headers=REQUEST_HEADERS, timeout=60)
+        response.raise_for_status()
+    with stage("decode"):
+        html = response.text
+
+    with stage("parse"):
+        soup = BeautifulSoup(html, "lxml")
+        table = soup.select_one("table.table-heatmap")
     if not table:
         raise RuntimeError("TradingEconomics crude oil table not found")
 
@@ -69,50 +92,51 @@ def crawl_oil():
     latest_year = None
     latest_month = None
 
-    for row in table.select("tr"):
-        tds = row.find_all("td")
-        if not tds or len(tds) < 3:
-            continue
-
-        link = tds[0].find("a")
-        href = (link.get("href") if link else "") or ""
-        # e.g. /united-states/crude-oil-production
-        slug = href.strip("/").split("/")[0] if href else ""
-        name_for_iso = _slug_to_name(slug)
-        iso = to_iso3(name_for_iso)
-        if not iso:
-            continue
-
-        recent = _parse_number(tds[1].get_text())
-        if recent is None:
-            continue
-
-        ref_text = " ".join(td.get_text(" ", strip=True) for td in tds)
-        match = re.search(r"(\d{4})-(\d{2})", ref_text)
-        year = None
-        month = None
-        if match:
-            year = int(match.group(1))
-            month = int(match.group(2))
-            latest_year = year if latest_year is None else max(latest_year, year)
-            if latest_month is None or (year, month) > latest_month:
-                latest_month = (year, month)
-
-        # TradingEconomics unit: BBL/D/1K (thousand barrels per day).
-        barrels_per_day = float(recent) * 1000.0
-        if year and month:
-            last_day = calendar.monthrange(year, month)[1]
-            data_date = datetime(year, month, last_day)
-        else:
-            data_date = datetime.utcnow()
-
-        values[iso.upper()] = {
-            "value": barrels_per_day,
-            "unit": "桶/日",
-            "year": year,
-            "month": month,
-            "lag_note": check_data_freshness(data_date, max_lag_days=60),
-        }
+    with stage("parse"):
+        for row in table.select("tr"):
+            tds = row.find_all("td")
+            if not tds or len(tds) < 3:
+                continue
+
+            link = tds[0].find("a")
+            href = (link.get("href") if link else "") or ""
+            # e.g. /united-states/crude-oil-production
+            slug = href.strip("/").split("/")[0] if href else ""
+            name_for_iso = _slug_to_name(slug)
+            iso = to_iso3(name_for_iso)
+            if not iso:
+                continue
+
+            recent = _parse_number(tds[1].get_text())
+            if recent is None:
+                continue
+
+            ref_text = " ".join(td.get_text(" ", strip=True) for td in tds)
+            match = re.search(r"(\d{4})-(\d{2})", ref_text)
+            year = None
+            month = None
+            if match:
+                year = int(match.group(1))
+                month = int(match.group(2))
+                latest_year = year if latest_year is None else max(latest_year, year)
+                if latest_month is None or (year, month) > latest_month:
+                    latest_month = (year, month)
+
+            # TradingEconomics unit: BBL/D/1K (thousand barrels per day).
+            barrels_per_day = float(recent) * 1000.0
+            if year and month:
+                last_day = calendar.monthrange(year, month)[1]
+                data_date = datetime(year, month, last_day)
+            else:
+                data_date = datetime.utcnow()
+
+            values[iso.upper()] = {
+                "value": barrels_per_day,
+                "unit": "桶/日",
+                "year": year,
+                "month": month,
+                "lag_note": check_data_freshness(data_date, max_lag_days=60),
+            }
 
     payload = {
         "last_updated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
@@ -125,7 +149,8 @@ def crawl_oil():
         "url": TE_CRUDE_OIL_URL,
     }
 
+    _write_history(values)
+
     file_name = datetime.utcnow().strftime("%Y-%m") + ".json"
-    output_path = get_data_dir("raw", "oil", file_name)
-    write_json(output_path, payload)
+    save_raw_snapshot("oil", file_name, payload)
     return payload
@@ -5,7 +5,9 @@ import requests
 from io import StringIO
 
 from ..utils.lag_checker import check_data_freshness
-from ..utils.storage import get_data_dir, write_json
+from ..utils.profiling import stage
+from ..utils.series_store import FREQ_ANNUAL, write_series
+from ..utils.snapshot_store import save_raw_snapshot
 
 OWID_CSVS = {
     "wheat": "https://ourworldindata.org/grapher/wheat-production.csv",
@@ -15,47 +17,90 @@ OWID_CSVS = {
 
 
 def _fetch_category(url):
-    response = requests.get(url, timeout=60)
-    response.raise_for_status()
-    df = pd.read_csv(StringIO(response.text))
-    df = df.rename(columns={"Entity": "country", "Code": "iso_code"})
-    value_col = df.columns[-1]
-    df = df[["iso_code", "Year", value_col]].dropna(subset=["iso_code", "Year", value_col])
-    df = df[df["iso_code"].astype(str).str.len() == 3]
-    df["Year"] = df["Year"].astype(int)
-    df[value_col] = pd.to_numeric(df[value_col], errors="coerce")
-    df = df.dropna(subset=[value_col])
-    df = df.sort_values(["iso_code", "Year"]).groupby("iso_code", as_index=False).tail(1)
-    return df, value_col
+    with stage("fetch"):
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+    with stage("decode"):
+        df = pd.read_csv(StringIO(response.text))
+    with stage("parse"):
+        df = df.rename(columns={"Entity": "country", "Code": "iso_code"})
+        value_col = df.columns[-1]
+        df = df[["iso_code", "Year", value_col]].dropna(subset=["iso_code", "Year", value_col])
+        df = df[df["iso_code"].astype(str).str.len() == 3]
+        df["Year"] = df["Year"].astype(int)
+        df[value_col] = pd.to_numeric(df[value_col], errors="coerce")
+        df = df.dropna(subset=[value_col])
+        return df.sort_values(["iso_code", "Year"]), value_col
+
+
+def _write_history(category, df, value_col):
+    write_series(
+        f"grain_{category}",
+        df["iso_code"].astype(str).str.upper().to_numpy(),
+        df["Year"].to_numpy(),
+        df[value_col].to_numpy(dtype=float),
+        FREQ_ANNUAL,
+        unit="吨/年",
+        source="Our World in Data grapher",
+    )
 
 
 def crawl_agriculture():
     data_by_country = {}
     target_year = None
 
+    history = []
     for category, url in OWID_CSVS.items():
         df, value_col = _fetch_category(url)
         if df.empty:
             continue
-        if target_year is None:
-            target_year = int(df["Year"].max())
+        _write_history(category, df, value_col)
+        with stage("aggregate"):
+            history.append(df.rename(columns={value_col: "value"}))
+            df = df.groupby("iso_code", as_index=False).tail(1)
+            if target_year is None:
+                target_year = int(df["Year"].max())
 
-        for _, row in df.iterrows():
-            iso = str(row["iso_code"]).upper()
-            year = int(row["Year"])
-            value = float(row[value_col])
+            for _, row in df.iterrows():
+                iso = str(row["iso_code"]).upper()
+                year = int(row["Year"])
+                value = float(row[value_col])
 
-            entry = data_by_country.setdefault(
-                iso,
-                {"total": 0, "unit": "吨/年", "by_category": {}, "year": year},
-            )
-            entry["by_category"][category] = value
-            entry["year"] = max(entry.get("year", year), year)
+                entry = data_by_country.setdefault(
+                    iso,
+                    {"total": 0, "unit": "吨/年", "by_category": {}, "year": year},
+                )
+                entry["by_category"][category] = value
+                entry["year"] = max(entry.get("year", year), year)
 
-    for entry in data_by_country.values():
-        entry["total"] = sum(entry["by_category"].values())
-        data_date = datetime(entry["year"], 12, 31)
-        entry["lag_note"] = check_data_freshness(data_date, max_lag_days=365)
+    with stage("aggregate"):
+        for entry in data_by_country.values():
+            # A partial sum would read as a real (low) total; leave it unset
+            # unless every crop is reported.
+            complete = len(entry["by_category"]) == len(OWID_CSVS)
+            entry["total"] = sum(entry["by_category"].values()) if complete else None
+            data_date = datetime(entry["year"], 12, 31)
+            entry["lag_note"] = check_data_freshness(data_date, max_lag_days=365)
+
+    if history:
+        with stage("aggregate"):
+            totals = (
+                pd.concat(history)
+                .assign(iso_code=lambda frame: frame["iso_code"].astype(str).str.upper())
+                .groupby(["iso_code", "Year"], as_index=False)["value"]
+                .agg(["sum", "count"])
+            )
+            # Only country-years with every crop reported get a total.
+            totals = totals[totals["count"] == len(OWID_CSVS)]
+        write_series(
+            "grain_total",
+            totals["iso_code"].to_numpy(),
+            totals["Year"].to_numpy(),
+            totals["sum"].to_numpy(dtype=float),
+            FREQ_ANNUAL,
+            unit="吨/年",
+            source="Our World in Data grapher (wheat+rice+maize)",
+        )
 
     payload = {
         "last_updated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
@@ -66,6 +111,5 @@ def crawl_agriculture():
     }
 
     file_name = datetime.utcnow().strftime("%Y") + ".json"
-    output_path = get_data_dir("raw", "agriculture", file_name)
-    write_json(output_path, payload)
+    save_raw_snapshot("agriculture", file_name, payload)
     return payload
@@ -0,0 +1,39 @@
+import importlib
+import threading
+
+# source -> (module, function). Modules are imported only when the crawler is
+# first used: they pull in requests, bs4/lxml and, for some, pandas.
+_crawlers = {
+    "gdp": ("backend.crawler.worldbank_gdp", "crawl_gdp"),
+    "oil": ("backend.crawler.eia_oil", "crawl_oil"),
+    "agriculture": ("backend.crawler.fao_agriculture", "crawl_agriculture"),
+    "minerals": ("backend.crawler.usgs_minerals", "crawl_minerals"),
+    "gold_reserves": ("backend.crawler.te_gold_reserves", "crawl_gold_reserves"),
+}
+_resolved = {}
+_lock = threading.Lock()
+
+
+def register_crawler(source, module, function):
+    """Register a crawler by dotted module path; nothing is imported yet."""
+    with _lock:
+        _crawlers[source] = (module, function)
+        _resolved.pop(source, None)
+
+
+def crawler_sources():
+    return list(_crawlers)
+
+
+def command_name(source):
+    return "crawl-" + source.replace("_", "-")
+
+
+def get_crawler(source):
+    """Import (once) and return the crawl function for `source`."""
+    with _lock:
+        crawler = _resolved.get(source)
+        if crawler is None:
+            module, function = _crawlers[source]
+            crawler = _resolved[source] = getattr(importlib.import_module(module), function)
+        return crawler
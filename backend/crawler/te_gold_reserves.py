@@ -9,7 +9,9 @@ from bs4 import BeautifulSoup
 
 from ..utils.country_codes import to_iso3
 from ..utils.lag_checker import check_data_freshness
-from ..utils.storage import get_data_dir, write_json
+from ..utils.profiling import stage
+from ..utils.series_store import FREQ_MONTHLY, write_series
+from ..utils.snapshot_store import save_raw_snapshot
 
 
 TE_GOLD_RESERVES_URL = "https://zh.tradingeconomics.com/country-list/gold-reserves"
@@ -56,12 +58,33 @@ def _slug_to_name(slug: str):
     return overrides.get(lowered, name)
 
 
-def crawl_gold_reserves():
-    response = requests.get(TE_GOLD_RESERVES_URL, headers=REQUEST_HEADERS, timeout=60)
-    response.raise_for_status()
+def _write_history(values):
+    # Each crawl only sees the latest release, so monthly history is built up
+    # by upserting every crawl's observations into the series store.
+    dated = [(iso, entry) for iso, entry in values.items() if entry["year"] and entry["month"]]
+    if not dated:
+        return
+    write_series(
+        "gold_reserves",
+        [iso for iso, _ in dated],
+        [entry["year"] * 100 + entry["month"] for _, entry in dated],
+        [entry["value"] for _, entry in dated],
+        FREQ_MONTHLY,
+        unit="吨",
+        source="Trading Economics (Gold Reserves)",
+    )
+
 
-    soup = BeautifulSoup(response.text, "lxml")
-    table = soup.select_one("table.table-heatmap")
+def crawl_gold_reserves():
+    with stage("fetch"):
+        response = requests.get(TE_GOLD_RESERVES_URL, headers=REQUEST_HEADERS, timeout=60)
+        response.raise_for_status()
+    with stage("decode"):
+        html = response.text
+
+    with stage("parse"):
+        soup = BeautifulSoup(html, "lxml")
+        table = soup.select_one("table.table-heatmap")
     if not table:
         raise RuntimeError("TradingEconomics gold reserves table not found")
 
@@ -70,55 +93,56 @@ def crawl_gold_reserves():
     latest_month = None
     unit = "吨"
 
-    for row in table.select("tr"):
-        tds = row.find_all("td")
-        if not tds or len(tds) < 4:
-            continue
-
-        link = tds[0].find("a")
-        href = (link.get("href") if link else "") or ""
-        # e.g. /united-states/gold-reserves
-        slug = href.strip("/").split("/")[0] if href else ""
-        name_for_iso = _slug_to_name(slug)
-        iso = to_iso3(name_for_iso)
-        if not iso:
-            continue
-
-        recent = _parse_number(tds[1].get_text(" ", strip=True))
-        if recent is None:
-            continue
-        previous = _parse_number(tds[2].get_text(" ", strip=True))
-
-        ref_text = tds[3].get_text(" ", strip=True)
-        match = re.search(r"(\d{4})-(\d{2})", ref_text)
-        year = None
-        month = None
-        if match:
-            year = int(match.group(1))
-            month = int(match.group(2))
-            latest_year = year if latest_year is None else max(latest_year, year)
-            if latest_month is None or (year, month) > latest_month:
-                latest_month = (year, month)
-
-        if len(tds) >= 5:
-            row_unit = tds[4].get_text(" ", strip=True) or ""
-            if row_unit:
-                unit = row_unit
-
-        if year and month:
-            last_day = calendar.monthrange(year, month)[1]
-            data_date = datetime(year, month, last_day)
-        else:
-            data_date = datetime.utcnow()
-
-        values[iso.upper()] = {
-            "value": float(recent),
-            "previous": float(previous) if previous is not None else None,
-            "unit": unit,
-            "year": year,
-            "month": month,
-            "lag_note": check_data_freshness(data_date, max_lag_days=90),
-        }
+    with stage("parse"):
+        for row in table.select("tr"):
+            tds = row.find_all("td")
+            if not tds or len(tds) < 4:
+                continue
+
+            link = tds[0].find("a")
+            href = (link.get("href") if link else "") or ""
+            # e.g. /united-states/gold-reserves
+            slug = href.strip("/").split("/")[0] if href else ""
+            name_for_iso = _slug_to_name(slug)
+            iso = to_iso3(name_for_iso)
+            if not iso:
+                continue
+
+            recent = _parse_number(tds[1].get_text(" ", strip=True))
+            if recent is None:
+                continue
+            previous = _parse_number(tds[2].get_text(" ", strip=True))
+
+            ref_text = tds[3].get_text(" ", strip=True)
+            match = re.search(r"(\d{4})-(\d{2})", ref_text)
+            year = None
+            month = None
+            if match:
+                year = int(match.group(1))
+                month = int(match.group(2))
+                latest_year = year if latest_year is None else max(latest_year, year)
+                if latest_month is None or (year, month) > latest_month:
+                    latest_month = (year, month)
+
+            if len(tds) >= 5:
+                row_unit = tds[4].get_text(" ", strip=True) or ""
+                if row_unit:
+                    unit = row_unit
+
+            if year and month:
+                last_day = calendar.monthrange(year, month)[1]
+                data_date = datetime(year, month, last_day)
+            else:
+                data_date = datetime.utcnow()
+
+            values[iso.upper()] = {
+                "value": float(recent),
+                "previous": float(previous) if previous is not None else None,
+                "unit": unit,
+                "year": year,
+                "month": month,
+                "lag_note": check_data_freshness(data_date, max_lag_days=90),
+            }
 
     payload = {
         "last_updated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
@@ -130,7 +154,8 @@ def crawl_gold_reserves():
         "url": TE_GOLD_RESERVES_URL,
     }
 
+    _write_history(values)
+
     file_name = datetime.utcnow().strftime("%Y-%m") + ".json"
-    output_path = get_data_dir("raw", "gold_reserves", file_name)
-    write_json(output_path, payload)
+    save_raw_snapshot("gold_reserves", file_name, payload)
     return payload
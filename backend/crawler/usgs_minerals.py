@@ -12,14 +12,16 @@ try:
     # Try relative imports first (when running as part of package)
     from ..utils.country_codes import to_iso3
     from ..utils.lag_checker import check_data_freshness
-    from ..utils.storage import get_data_dir, write_json
+    from ..utils.profiling import stage
+    from ..utils.snapshot_store import save_raw_snapshot
 except ImportError:
     # Fall back to absolute imports (when running directly or from other scripts)
     import sys
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from utils.country_codes import to_iso3
     from utils.lag_checker import check_data_freshness
-    from utils.storage import get_data_dir, write_json
+    from utils.profiling import stage
+    from utils.snapshot_store import save_raw_snapshot
 
 USGS_MCS_URL = os.environ.get(
     "USGS_MCS_URL",
@@ -98,11 +100,12 @@ def _extract_sheet_data(df, year):
 
 def _load_data():
     """Load USGS MCS 2025 data from ZIP file containing CSV."""
-    response = requests.get(USGS_MCS_URL, headers=REQUEST_HEADERS, timeout=60)
-    response.raise_for_status()
+    with stage("fetch"):
+        response = requests.get(USGS_MCS_URL, headers=REQUEST_HEADERS, timeout=60)
+        response.raise_for_status()
     
     # Open ZIP file
-    with zipfile.ZipFile(BytesIO(response.content)) as z:
+    with stage("decode"), zipfile.ZipFile(BytesIO(response.content)) as z:
         # Read CSV from ZIP
         csv_content = z.read(USGS_MCS_CSV_FILENAME)
         df = pd.read_csv(BytesIO(csv_content), encoding='utf-8')
@@ -151,13 +154,16 @@ def _select_gold_table(tables):
 
 def _crawl_gold_wikipedia():
     try:
-        response = requests.get(WIKI_GOLD_URL, headers=REQUEST_HEADERS, timeout=60)
-        response.raise_for_status()
-        html = response.text
+        with stage("fetch"):
+            response = requests.get(WIKI_GOLD_URL, headers=REQUEST_HEADERS, timeout=60)
+            response.raise_for_status()
+        with stage("decode"):
+            html = response.text
     except requests.RequestException as exc:
         return {}, None, f"Wikipedia fetch failed: {exc}"
     try:
-        tables = pd.read_html(StringIO(html))
+        with stage("parse"):
+            tables = pd.read_html(StringIO(html))
     except Exception as exc:
         return {}, None, f"Wikipedia parse failed: {exc}"
     table = _select_gold_table(tables)
@@ -177,31 +183,32 @@ def _crawl_gold_wikipedia():
     if not country_col or not production_col:
         return {}, year, "Wikipedia gold columns not found"
 
-    gold_data = {}
-    for _, row in table.iterrows():
-        name = str(row.get(country_col, "")).strip()
-        if not name:
-            continue
-        lower_name = name.lower()
-        if lower_name in {"world", "other countries"}:
-            continue
+    with stage("aggregate"):
+        gold_data = {}
+        for _, row in table.iterrows():
+            name = str(row.get(country_col, "")).strip()
+            if not name:
+                continue
+            lower_name = name.lower()
+            if lower_name in {"world", "other countries"}:
+                continue
 
-        iso = to_iso3(name)
-        if not iso:
-            continue
-        value = pd.to_numeric(row.get(production_col), errors="coerce")
-        if pd.isna(value):
-            continue
-        # Wikipedia data is already in kg, no conversion needed
-        # Verified against Our World in Data 2024 production data
-        value_kg = float(value)
-        data_date = datetime(year, 12, 31)
-        gold_data[iso] = {
-            "value": value_kg,
-            "unit": "公斤/年",
-            "year": year,
-            "lag_note": check_data_freshness(data_date, max_lag_days=365),
-        }
+            iso = to_iso3(name)
+            if not iso:
+                continue
+            value = pd.to_numeric(row.get(production_col), errors="coerce")
+            if pd.isna(value):
+                continue
+            # Wikipedia data is already in kg, no conversion needed
+            # Verified against Our World in Data 2024 production data
+            value_kg = float(value)
+            data_date = datetime(year, 12, 31)
+            gold_data[iso] = {
+                "value": value_kg,
+                "unit": "公斤/年",
+                "year": year,
+                "lag_note": check_data_freshness(data_date, max_lag_days=365),
+            }
 
     source_note = "Our World in Data / Wikipedia list of countries by gold production"
     return gold_data, year, source_note
@@ -220,80 +227,80 @@ def crawl_minerals():
             payload["gold"]["year"] = gold_year
             payload["source"] = f"USGS MCS blocked ({exc}); gold from Wikipedia"
         file_name = datetime.utcnow().strftime("%Y") + ".json"
-        output_path = get_data_dir("raw", "minerals", file_name)
-        write_json(output_path, payload)
+        save_raw_snapshot("minerals", file_name, payload)
         return payload
     
     nonferrous_data = {}
     gold_data = {}
     target_year = 2024  # USGS 2025 data has PROD_EST_ 2024
     
-    # Process gold data from CSV
-    gold_df = df[df['COMMODITY'].str.contains('Gold', case=False, na=False)]
-    for _, row in gold_df.iterrows():
-        country = str(row['COUNTRY']).strip()
-        if not country or country.lower() in {'world total (rounded)', 'other countries'}:
-            continue
-        
-        iso = to_iso3(country)
-        if not iso:
-            continue
-        
-        # Use 2024 estimated production, fallback to 2023
-        value_2024 = pd.to_numeric(row.get('PROD_EST_ 2024'), errors='coerce')
-        value_2023 = pd.to_numeric(row.get('PROD_2023'), errors='coerce')
-        value_tonnes = value_2024 if not pd.isna(value_2024) else value_2023
-        
-        if pd.isna(value_tonnes):
-            continue
-        
-        # Convert metric tons to kg
-        value_kg = float(value_tonnes) * 1000.0
-        data_date = datetime(target_year, 12, 31)
-        
-        gold_data[iso] = {
-            "value": value_kg,
-            "unit": "公斤/年",
-            "year": target_year,
-            "lag_note": check_data_freshness(data_date, max_lag_days=365),
-        }
-    
-    # Process nonferrous metals from CSV
-    nonferrous_commodities = ['Aluminum', 'Copper', 'Nickel']
-    for commodity in nonferrous_commodities:
-        commodity_df = df[df['COMMODITY'].str.contains(commodity, case=False, na=False)]
-        for _, row in commodity_df.iterrows():
+    with stage("aggregate"):
+        # Process gold data from CSV
+        gold_df = df[df['COMMODITY'].str.contains('Gold', case=False, na=False)]
+        for _, row in gold_df.iterrows():
             country = str(row['COUNTRY']).strip()
             if not country or country.lower() in {'world total (rounded)', 'other countries'}:
                 continue
-            
+        
             iso = to_iso3(country)
             if not iso:
                 continue
-            
+        
             # Use 2024 estimated production, fallback to 2023
             value_2024 = pd.to_numeric(row.get('PROD_EST_ 2024'), errors='coerce')
             value_2023 = pd.to_numeric(row.get('PROD_2023'), errors='coerce')
             value_tonnes = value_2024 if not pd.isna(value_2024) else value_2023
-            
+        
             if pd.isna(value_tonnes):
                 continue
-            
+        
+            # Convert metric tons to kg
+            value_kg = float(value_tonnes) * 1000.0
             data_date = datetime(target_year, 12, 31)
-            lag_note = check_data_freshness(data_date, max_lag_days=365)
+        
+            gold_data[iso] = {
+                "value": value_kg,
+                "unit": "公斤/年",
+                "year": target_year,
+                "lag_note": check_data_freshness(data_date, max_lag_days=365),
+            }
+    
+        # Process nonferrous metals from CSV
+        nonferrous_commodities = ['Aluminum', 'Copper', 'Nickel']
+        for commodity in nonferrous_commodities:
+            commodity_df = df[df['COMMODITY'].str.contains(commodity, case=False, na=False)]
+            for _, row in commodity_df.iterrows():
+                country = str(row['COUNTRY']).strip()
+                if not country or country.lower() in {'world total (rounded)', 'other countries'}:
+                    continue
+            
+                iso = to_iso3(country)
+                if not iso:
+                    continue
+            
+                # Use 2024 estimated production, fallback to 2023
+                value_2024 = pd.to_numeric(row.get('PROD_EST_ 2024'), errors='coerce')
+                value_2023 = pd.to_numeric(row.get('PROD_2023'), errors='coerce')
+                value_tonnes = value_2024 if not pd.isna(value_2024) else value_2023
+            
+                if pd.isna(value_tonnes):
+                    continue
+            
+                data_date = datetime(target_year, 12, 31)
+                lag_note = check_data_freshness(data_date, max_lag_days=365)
             
-            entry_payload = nonferrous_data.setdefault(
-                iso,
-                {
-                    "unit": "吨/年",
-                    "by_category": {},
-                    "year": target_year,
-                    "lag_note": lag_note,
-                },
-            )
-            entry_payload["by_category"][commodity.lower()] = float(value_tonnes)
-            entry_payload["year"] = target_year
-            entry_payload["lag_note"] = lag_note
+                entry_payload = nonferrous_data.setdefault(
+                    iso,
+                    {
+                        "unit": "吨/年",
+                        "by_category": {},
+                        "year": target_year,
+                        "lag_note": lag_note,
+                    },
+                )
+                entry_payload["by_category"][commodity.lower()] = float(value_tonnes)
+                entry_payload["year"] = target_year
+                entry_payload["lag_note"] = lag_note
     
     # Fallback to Wikipedia if no gold data from USGS
     if not gold_data:
@@ -311,6 +318,5 @@ def crawl_minerals():
         payload["gold"]["source"] = "USGS MCS 2025 - Mineral Commodity Summaries"
     
     file_name = datetime.utcnow().strftime("%Y") + ".json"
-    output_path = get_data_dir("raw", "minerals", file_name)
-    write_json(output_path, payload)
+    save_raw_snapshot("minerals", file_name, payload)
     return payload
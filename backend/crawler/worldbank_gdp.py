@@ -3,12 +3,17 @@ from datetime import datetime
 import requests
 
 from ..utils.lag_checker import check_data_freshness
-from ..utils.storage import get_data_dir, write_json
+from ..utils.profiling import stage
+from ..utils.series_store import FREQ_ANNUAL, write_series
+from ..utils.snapshot_store import save_raw_snapshot
 
 WORLD_BANK_URL = (
     "https://api.worldbank.org/v2/country/all/indicator/NY.GDP.MKTP.CD"
 )
 
+# First year requested from the API; the full range feeds the GDP series store.
+SERIES_START_YEAR = 1960
+
 EXCLUDED_ISO3 = {
     "AFE",
     "AFW",
@@ -66,18 +71,20 @@ def _fetch_gdp():
     page = 1
     all_records = []
     while True:
-        response = requests.get(
-            WORLD_BANK_URL,
-            params={
-                "format": "json",
-                "per_page": 300,
-                "date": "2020:2024",
-                "page": page,
-            },
-            timeout=30,
-        )
-        response.raise_for_status()
-        payload = response.json()
+        with stage("fetch"):
+            response = requests.get(
+                WORLD_BANK_URL,
+                params={
+                    "format": "json",
+                    "per_page": 1000,
+                    "date": f"{SERIES_START_YEAR}:{datetime.utcnow().year}",
+                    "page": page,
+                },
+                timeout=30,
+            )
+            response.raise_for_status()
+        with stage("decode"):
+            payload = response.json()
         if not isinstance(payload, list) or len(payload) < 2:
             break
 
@@ -96,32 +103,40 @@ def _fetch_gdp():
 def crawl_gdp():
     records = _fetch_gdp()
     latest_by_country = {}
-
-    for record in records:
-        value = record.get("value")
-        if value is None:
-            continue
-        iso_code = record.get("countryiso3code")
-        if not iso_code or iso_code == "":
-            continue
-        if iso_code in EXCLUDED_ISO3:
-            continue
-        try:
-            year = int(record.get("date"))
-        except (TypeError, ValueError):
-            continue
-
-        existing = latest_by_country.get(iso_code)
-        if existing and year <= existing["year"]:
-            continue
-
-        data_date = datetime(year, 12, 31)
-        latest_by_country[iso_code] = {
-            "value": float(value),
-            "unit": "USD",
-            "year": year,
-            "lag_note": check_data_freshness(data_date),
-        }
+    series_codes = []
+    series_years = []
+    series_values = []
+
+    with stage("aggregate"):
+        for record in records:
+            value = record.get("value")
+            if value is None:
+                continue
+            iso_code = record.get("countryiso3code")
+            if not iso_code or iso_code == "":
+                continue
+            if iso_code in EXCLUDED_ISO3:
+                continue
+            try:
+                year = int(record.get("date"))
+            except (TypeError, ValueError):
+                continue
+
+            series_codes.append(iso_code)
+            series_years.append(year)
+            series_values.append(float(value))
+
+            existing = latest_by_country.get(iso_code)
+            if existing and year <= existing["year"]:
+                continue
+
+            data_date = datetime(year, 12, 31)
+            latest_by_country[iso_code] = {
+                "value": float(value),
+                "unit": "USD",
+                "year": year,
+                "lag_note": check_data_freshness(data_date),
+            }
 
     payload = {
         "last_updated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
@@ -129,7 +144,16 @@ def crawl_gdp():
         "data": latest_by_country,
     }
 
+    write_series(
+        "gdp",
+        series_codes,
+        series_years,
+        series_values,
+        FREQ_ANNUAL,
+        unit="USD",
+        source="World Bank NY.GDP.MKTP.CD",
+    )
+
     file_name = datetime.utcnow().strftime("%Y-%m") + ".json"
-    output_path = get_data_dir("raw", "gdp", file_name)
-    write_json(output_path, payload)
+    save_raw_snapshot("gdp", file_name, payload)
     return payload
@@ -0,0 +1,120 @@
+import sys
+
+# Keys stored in MetricRecord slots; anything else lands in `extra`.
+METRIC_FIELDS = (
+    "value",
+    "total",
+    "previous",
+    "unit",
+    "by_category",
+    "year",
+    "month",
+    "lag_note",
+    "source",
+)
+
+
+class _Interner:
+    """Shares strings and key-layout tuples across every record."""
+
+    def __init__(self):
+        self._tuples = {}
+
+    def text(self, value):
+        return sys.intern(value) if isinstance(value, str) else value
+
+    def layout(self, keys):
+        keys = tuple(sys.intern(key) for key in keys)
+        return self._tuples.setdefault(keys, keys)
+
+
+class MetricRecord:
+    """One metric entry; `layout` keeps the original key order."""
+
+    __slots__ = METRIC_FIELDS + ("layout", "categories", "extra")
+
+    def __init__(self, entry, interner):
+        self.layout = interner.layout(entry)
+        self.categories = None
+        self.extra = None
+        for field in METRIC_FIELDS:
+            setattr(self, field, None)
+        for key, value in entry.items():
+            if key == "by_category" and isinstance(value, dict):
+                self.categories = interner.layout(value)
+                self.by_category = tuple(value.values())
+            elif key in METRIC_FIELDS:
+                setattr(self, key, interner.text(value))
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def get(self, key, default=None):
+        if key not in self.layout:
+            return default
+        if key == "by_category" and self.categories is not None:
+            return dict(zip(self.categories, self.by_category))
+        if key in METRIC_FIELDS:
+            return getattr(self, key)
+        return self.extra.get(key, default)
+
+    def to_dict(self):
+        return {key: self.get(key) for key in self.layout}
+
+
+class CountryRecord:
+    """Top-level country fields (names, capital) plus metric records."""
+
+    __slots__ = ("layout", "items")
+
+    def __init__(self, country, interner):
+        self.layout = interner.layout(country)
+        self.items = tuple(
+            MetricRecord(value, interner) if isinstance(value, dict) else interner.text(value)
+            for value in country.values()
+        )
+
+    def get(self, key, default=None):
+        for name, value in zip(self.layout, self.items):
+            if name == key:
+                return value
+        return default
+
+    def metrics(self):
+        for name, value in zip(self.layout, self.items):
+            if isinstance(value, MetricRecord):
+                yield name, value
+
+    def to_dict(self):
+        return {
+            name: value.to_dict() if isinstance(value, MetricRecord) else value
+            for name, value in zip(self.layout, self.items)
+        }
+
+
+class CompactDataset:
+    """Merged data held as slotted records, expanded to dicts on the way out."""
+
+    __slots__ = ("metadata", "countries")
+
+    def __init__(self, data):
+        interner = _Interner()
+        self.metadata = data.get("metadata", {})
+        self.countries = {
+            interner.text(iso): CountryRecord(country, interner)
+            for iso, country in data.get("countries", {}).items()
+        }
+
+    def codes(self):
+        return list(self.countries)
+
+    def get_country(self, iso_code):
+        record = self.countries.get(iso_code)
+        return record.to_dict() if record is not None else None
+
+    def to_dict(self):
+        return {
+            "metadata": self.metadata,
+            "countries": {iso: record.to_dict() for iso, record in self.countries.items()},
+        }
@@ -0,0 +1,230 @@
+import filecmp
+import gzip
+import math
+import os
+import shutil
+import threading
+
+from .lru_cache import LRUCache
+from .merged_versions import data_version_stamp
+from .profiling import timed
+from .storage import get_data_dir, get_repo_root
+
+# Encodings in server preference order, with the sibling suffix written by
+# `precompress_file`.
+ENCODING_SUFFIXES = {
+    "br": ".br",
+    "gzip": ".gz",
+}
+
+# API bodies smaller than this are sent as-is; compressing them costs more
+# than it saves.
+MIN_COMPRESS_SIZE = 1024
+
+
+def precompress_targets():
+    root = get_repo_root()
+    return [
+        os.path.join(root, "static", "geojson", "world_50m_custom.geojson"),
+        os.path.join(root, "static", "geojson", "populated_places_50m.geojson"),
+        get_data_dir("merged", "countries_data.json"),
+    ]
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def available_encodings():
+    if _brotli() is None:
+        return ["gzip"]
+    return ["br", "gzip"]
+
+
+def compress_bytes(payload, encoding, level=None):
+    if encoding == "gzip":
+        # mtime=0 keeps output deterministic, so identical input -> identical ETag.
+        return gzip.compress(payload, compresslevel=level or 6, mtime=0)
+    if encoding == "br":
+        brotli = _brotli()
+        if brotli is None:
+            raise RuntimeError("brotli is not installed")
+        return brotli.compress(payload, quality=5 if level is None else level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def _atomic_write_bytes(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _fresh_sibling(path, encoding):
+    sibling = path + ENCODING_SUFFIXES[encoding]
+    if os.path.exists(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(path):
+        return sibling
+    return None
+
+
+def precompress_file(path, reuse_from=None):
+    """Write maximally compressed .br/.gz siblings next to `path`.
+
+    Siblings that are already newer than the source are left alone. If
+    `reuse_from` is a byte-identical copy of `path`, its up-to-date siblings
+    are copied instead of compressing again. Returns the list of sibling
+    paths that were (re)written.
+    """
+    written = []
+    if not os.path.exists(path):
+        return written
+    same = bool(reuse_from) and os.path.exists(reuse_from) and filecmp.cmp(reuse_from, path, shallow=False)
+    payload = None
+    for encoding in available_encodings():
+        if _fresh_sibling(path, encoding):
+            continue
+        sibling = path + ENCODING_SUFFIXES[encoding]
+        reusable = _fresh_sibling(reuse_from, encoding) if same else None
+        if reusable:
+            shutil.copyfile(reusable, sibling + ".tmp")
+            os.replace(sibling + ".tmp", sibling)
+            written.append(sibling)
+            continue
+        if payload is None:
+            with open(path, "rb") as handle:
+                payload = handle.read()
+        level = 11 if encoding == "br" else 9
+        _atomic_write_bytes(sibling, compress_bytes(payload, encoding, level=level))
+        written.append(sibling)
+    return written
+
+
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header; a malformed q counts as 0."""
+    qualities = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+                if not (math.isfinite(quality) and 0 <= quality <= 1):
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def accepted_encodings():
+    """Encodings to offer, best first, by the client's q-values.
+
+    q=0 refuses an encoding; ties go to the server's order. An encoding the
+    client ranks below an explicit `identity` is not used.
+    """
+    # Flask is imported lazily: merges and the CLI precompress files offline.
+    from flask import request
+
+    qualities = parse_accept_encoding(request.headers.get("Accept-Encoding"))
+    wildcard = qualities.get("*", 0.0)
+    identity = qualities.get("identity", 0.0)
+    ranked = []
+    for preference, encoding in enumerate(available_encodings()):
+        quality = qualities.get(encoding, wildcard)
+        if quality > 0 and quality >= identity:
+            ranked.append((-quality, preference, encoding))
+    return [encoding for _, _, encoding in sorted(ranked)]
+
+
+def precompressed_sibling(path):
+    """Return (encoding, sibling path) for the best fresh sibling the client accepts."""
+    if not os.path.isfile(path):
+        return None, None
+    source_mtime = os.path.getmtime(path)
+    for encoding in accepted_encodings():
+        sibling = path + ENCODING_SUFFIXES[encoding]
+        if os.path.isfile(sibling) and os.path.getmtime(sibling) >= source_mtime:
+            return encoding, sibling
+    return None, None
+
+
+def has_precompressed_sibling(path):
+    return any(os.path.isfile(path + suffix) for suffix in ENCODING_SUFFIXES.values())
+
+
+class ResponseCompressor:
+    """Compress JSON API responses, remembering results per data version.
+
+    Bodies are keyed by request path, query and encoding; a hit is only
+    used if the stored body is byte-for-byte the same (a memcmp, far cheaper
+    than hashing), since a few endpoints change between merges. When the
+    data version changes the cache is dropped, so memory only holds the
+    live version.
+    """
+
+    def __init__(self, maxsize=512):
+        self._cache = LRUCache(maxsize)
+        self._version = None
+        # Guards the version switch; compression itself runs unlocked.
+        self._lock = threading.Lock()
+
+    def compressed(self, key, body, encoding, version):
+        key = (key, encoding)
+        with self._lock:
+            if version != self._version:
+                self._cache.clear()
+                self._version = version
+            cached = self._cache.get(key)
+        if cached is not None and cached[0] == body:
+            return cached[1]
+        compressed = compress_bytes(body, encoding)
+        with self._lock:
+            # A request still on the old version must not refill the cache
+            # after another one has switched it.
+            if version == self._version:
+                self._cache.put(key, (body, compressed))
+        return compressed
+
+    def after_request(self, response):
+        from flask import current_app, request
+
+        if request.method != "GET" or response.status_code != 200:
+            return response
+        if not request.path.startswith("/api/") or response.mimetype != "application/json":
+            return response
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if "Content-Encoding" in response.headers:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        body = response.get_data()
+        if len(body) < MIN_COMPRESS_SIZE:
+            return response
+        encodings = accepted_encodings()
+        if not encodings:
+            return response
+
+        version = data_version_stamp(current_app.config["DATA_PATH"])
+        encoding = encodings[0]
+        with timed("compress"):
+            key = (request.path, request.query_string)
+            response.set_data(self.compressed(key, body, encoding, version))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def init_compression(app):
+    compressor = ResponseCompressor()
+    app.extensions["response_compressor"] = compressor
+    app.after_request(compressor.after_request)
+    return compressor
@@ -1,5 +1,7 @@
 import pycountry
 
+from .profiling import stage
+
 SPECIAL_CASES = {
     "Bolivia": "BOL",
     "Brunei": "BRN",
@@ -27,6 +29,11 @@ SPECIAL_CASES = {
 
 
 def to_iso3(value):
+    with stage("iso"):
+        return _to_iso3(value)
+
+
+def _to_iso3(value):
     if not value:
         return None
     code = str(value).strip()
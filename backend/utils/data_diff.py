@@ -0,0 +1,58 @@
+_ABSENT = object()
+
+# Shares and ranks are recomputed over all countries, so one country's change
+# would touch every record; clients read them from /api/derived instead.
+UNDIFFED_KEYS = ("derived",)
+
+
+def _diff_entry(old, new):
+    """Changed/added fields of one country field, plus removed sub-fields."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = {key: value for key, value in new.items() if old.get(key, _ABSENT) != value}
+        removed = [key for key in old if key not in new]
+        return changed, removed
+    return new, []
+
+
+def diff_country(old, new):
+    """Patch turning one merged country record into another, or None if equal.
+
+    `set` maps top-level keys to their new value; for metric dicts only the
+    changed fields are included and should be merged into the existing
+    entry. `unset` lists removed keys as "metric" or "metric.field".
+    Keys in UNDIFFED_KEYS are left out.
+    """
+    patch_set = {}
+    unset = []
+    for key, value in new.items():
+        if key in UNDIFFED_KEYS:
+            continue
+        if key not in old:
+            patch_set[key] = value
+            continue
+        if old[key] == value:
+            continue
+        changed, removed = _diff_entry(old[key], value)
+        if changed or not removed:
+            patch_set[key] = changed
+        unset.extend(f"{key}.{field}" for field in removed)
+    unset.extend(key for key in old if key not in new and key not in UNDIFFED_KEYS)
+    if not patch_set and not unset:
+        return None
+    patch = {"set": patch_set}
+    if unset:
+        patch["unset"] = unset
+    return patch
+
+
+def diff_countries(old_countries, new_countries):
+    """Per-country patches between two `countries` maps; None marks removal."""
+    changes = {}
+    for iso, country in new_countries.items():
+        patch = diff_country(old_countries.get(iso, {}), country)
+        if patch is not None:
+            changes[iso] = patch
+    for iso in old_countries:
+        if iso not in new_countries:
+            changes[iso] = None
+    return changes
@@ -2,23 +2,56 @@ import json
 import os
 import threading
 
+from .compact_model import CompactDataset
+from .data_diff import diff_country
+from .flatten import VALUE_FIELDS
+from .lru_cache import LRUCache
+from .mapped_data import MappedDataset, binary_path_for
+from .merged_versions import UnknownVersionError, get_version_store
+from .profiling import timed
+from .sqlite_store import SqliteBackend, sqlite_path_for
+from .warm_cache import load_sidecar
 
-class DataManager:
-    def __init__(self, data_path):
+BACKENDS = ("json", "sqlite", "mmap")
+
+
+class DatasetReader:
+    """Reads one merged data file through the configured backend."""
+
+    def __init__(self, data_path, backend="json"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown data backend: {backend}")
         self.data_path = data_path
+        self.backend = backend
         self._lock = threading.Lock()
         self._cache = None
         self._last_mtime = None
+        self._store = None
+        if backend == "sqlite":
+            self._store = SqliteBackend(sqlite_path_for(data_path))
+        elif backend == "mmap":
+            self._store = MappedDataset(binary_path_for(data_path))
+
+    def _use_store(self):
+        # Until the first merge has written the compiled file, fall back to JSON.
+        return self._store is not None and self._store.exists()
+
+    def _use_sqlite(self):
+        return self.backend == "sqlite" and self._use_store()
 
     def _load_from_disk(self):
-        with open(self.data_path, "r", encoding="utf-8") as handle:
-            data = json.load(handle)
-        return data, os.path.getmtime(self.data_path)
+        mtime = os.path.getmtime(self.data_path)
+        # The sidecar is only written at merge time; a miss reads the JSON.
+        data = load_sidecar(self.data_path)
+        if data is None:
+            with open(self.data_path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        return CompactDataset(data), mtime
 
-    def load(self):
-        with self._lock:
+    def _dataset(self):
+        with timed("load"), self._lock:
             if not os.path.exists(self.data_path):
-                self._cache = {"metadata": {}, "countries": {}}
+                self._cache = CompactDataset({})
                 self._last_mtime = None
                 return self._cache
 
@@ -27,13 +60,237 @@ class DataManager:
                 self._cache, self._last_mtime = self._load_from_disk()
             return self._cache
 
+    def load(self):
+        """The whole dataset as plain dicts; expands every record, so request
+        paths use get_country()/iter_countries() instead."""
+        if self._use_store():
+            return self._store.load()
+        return self._dataset().to_dict()
+
     def get_country(self, iso_code):
         if not iso_code:
             return None
-        data = self.load()
-        countries = data.get("countries", {})
-        return countries.get(iso_code.upper())
+        if self._use_store():
+            return self._store.get_country(iso_code.upper())
+        return self._dataset().get_country(iso_code.upper())
 
     def get_metadata(self):
-        data = self.load()
-        return data.get("metadata", {})
+        if self._use_store():
+            return self._store.get_metadata()
+        return self._dataset().metadata
+
+    def iter_countries(self):
+        """Yield (iso, country) in ISO order, reading one country at a time."""
+        codes = self._store.codes() if self._use_store() else self._dataset().codes()
+        for iso in sorted(codes):
+            country = self.get_country(iso)
+            if country is not None:
+                yield iso, country
+
+    def _metric_rows(self, metric):
+        if self.backend == "mmap" and self._use_store():
+            # Fixed-width metric tables: no country record is decoded.
+            rows = self._store.metric_rows(metric)
+            if rows is not None:
+                return rows
+        return self._scan_metric_rows(metric)
+
+    def _scan_metric_rows(self, metric):
+        field = VALUE_FIELDS.get(metric, "value")
+        if self._use_store():
+            countries = self._store.load().get("countries", {})
+        else:
+            countries = self._dataset().countries
+        # Plain dicts and compact records both answer .get().
+        for iso, country in countries.items():
+            entry = country.get(metric)
+            if entry is None or isinstance(entry, str):
+                continue
+            value = entry.get(field)
+            if isinstance(value, (int, float)):
+                yield {"code": iso, "value": value, "unit": entry.get("unit"), "year": entry.get("year")}
+
+    def derived(self, column, limit=10, descending=True):
+        """Countries ordered by a stored derived column (see derived_metrics).
+
+        Merges store each column's order in the metadata, so only the
+        returned countries are read; older versions are scanned and sorted.
+        """
+        order = ((self.get_metadata().get("derived") or {}).get("order") or {}).get(column)
+        if order is None:
+            return self._derived_scan(column, limit, descending)
+        codes = order[:limit] if descending else order[::-1][:limit]
+        rows = []
+        for iso in codes:
+            value = ((self.get_country(iso) or {}).get("derived") or {}).get(column)
+            rows.append({"code": iso, "value": value, "rank": len(rows) + 1})
+        return rows
+
+    def _derived_scan(self, column, limit, descending):
+        if self._use_sqlite():
+            entries = self._store.metric_records("derived")
+        else:
+            countries = self._store.load()["countries"] if self._use_store() else self._dataset().countries
+            entries = ((iso, country.get("derived")) for iso, country in countries.items())
+        rows = []
+        for iso, entry in entries:
+            value = entry.get(column) if entry is not None else None
+            if isinstance(value, (int, float)):
+                rows.append({"code": iso, "value": value})
+        rows.sort(key=lambda row: row["value"], reverse=descending)
+        return [dict(row, rank=position) for position, row in enumerate(rows[:limit], 1)]
+
+    def query_countries(self, metric, min_value=None, max_value=None, year=None, limit=250):
+        if self._use_sqlite():
+            return self._store.query_countries(metric, min_value, max_value, year, limit)
+        rows = [
+            row
+            for row in self._metric_rows(metric)
+            if (min_value is None or row["value"] >= min_value)
+            and (max_value is None or row["value"] <= max_value)
+            and (year is None or row["year"] == year)
+        ]
+        rows.sort(key=lambda row: row["value"], reverse=True)
+        return rows[:limit]
+
+    def rank(self, metric, limit=10, descending=True):
+        if self._use_sqlite():
+            return self._store.rank(metric, limit, descending)
+        rows = sorted(self._metric_rows(metric), key=lambda row: row["value"], reverse=descending)
+        return [dict(row, rank=position) for position, row in enumerate(rows[:limit], 1)]
+
+
+def diff_readers(old, new):
+    """diff_countries() between two readers, one country at a time."""
+    changes = {}
+    old_codes = set()
+    for iso, country in old.iter_countries():
+        old_codes.add(iso)
+        current = new.get_country(iso)
+        if current is None:
+            changes[iso] = None
+            continue
+        patch = diff_country(country, current)
+        if patch is not None:
+            changes[iso] = patch
+    for iso, country in new.iter_countries():
+        if iso not in old_codes:
+            changes[iso] = diff_country({}, country)
+    return changes
+
+
+class DataManager:
+    """Serves the active merged version, or a pinned one via `version=`.
+
+    Without published versions it reads `data_path` directly. When ACTIVE
+    moves, the first request to notice warms the new version while other
+    requests keep answering from the old one, then the reader is swapped.
+    """
+
+    def __init__(self, data_path, backend="json", cached_versions=4):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown data backend: {backend}")
+        self.data_path = data_path
+        self.backend = backend
+        self.versions = get_version_store(data_path)
+        self._fallback = DatasetReader(data_path, backend)
+        self._readers = LRUCache(cached_versions)
+        self._active = (None, self._fallback)
+        self._changes = LRUCache(32)
+        self._switch_lock = threading.Lock()
+
+    def _reader_for(self, version_id):
+        reader = self._readers.get(version_id)
+        if reader is None:
+            reader = DatasetReader(self.versions.data_path(version_id), self.backend)
+            self._readers.put(version_id, reader)
+        return reader
+
+    def _active_reader(self):
+        active_id = self.versions.active()
+        current_id, current = self._active
+        if active_id == current_id or not self.versions.exists(active_id):
+            return current_id, current
+        if not self._switch_lock.acquire(blocking=current_id is None):
+            return current_id, current
+        try:
+            if self._active[0] != active_id:
+                reader = self._reader_for(active_id)
+                reader.get_metadata()
+                self._active = (active_id, reader)
+            return self._active
+        finally:
+            self._switch_lock.release()
+
+    def reader(self, version=None):
+        """Return (version id, reader) for a pinned version or the active one."""
+        with timed("load"):
+            if version:
+                if not self.versions.exists(version):
+                    raise UnknownVersionError(version)
+                return version, self._reader_for(version)
+            return self._active_reader()
+
+    def active_version(self):
+        return self._active_reader()[0]
+
+    def changes_since(self, since):
+        """Return (active id, per-country patches from `since` to the active version)."""
+        if not self.versions.exists(since):
+            raise UnknownVersionError(since)
+        active_id, reader = self._active_reader()
+        if active_id is None or since == active_id:
+            return active_id, {}
+        key = (since, active_id)
+        changes = self._changes.get(key)
+        if changes is None:
+            recorded = self.versions.changes(active_id)
+            if recorded is not None and recorded.get("parent") == since:
+                changes = recorded["countries"]
+            else:
+                # Not a direct parent (several merges or a rollback apart): diff the two.
+                # Country by country, so neither version is expanded to one big dict.
+                changes = diff_readers(self.reader(since)[1], reader)
+            self._changes.put(key, changes)
+        return active_id, changes
+
+    # Server-Timing: "lookup" is the query itself; resolving the version and
+    # (re)loading the dataset count as "load" (nested, so not counted twice).
+    def load(self, version=None):
+        with timed("lookup"):
+            return self.reader(version)[1].load()
+
+    def get_country(self, iso_code, version=None):
+        with timed("lookup"):
+            return self.reader(version)[1].get_country(iso_code)
+
+    def get_metadata(self, version=None):
+        with timed("lookup"):
+            return self.reader(version)[1].get_metadata()
+
+    def query_countries(self, metric, min_value=None, max_value=None, year=None, limit=250, version=None):
+        with timed("lookup"):
+            return self.reader(version)[1].query_countries(metric, min_value, max_value, year, limit)
+
+    def rank(self, metric, limit=10, descending=True, version=None):
+        with timed("lookup"):
+            return self.reader(version)[1].rank(metric, limit, descending)
+
+    def derived(self, column, limit=10, descending=True, version=None):
+        with timed("lookup"):
+            return self.reader(version)[1].derived(column, limit, descending)
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_data_manager(data_path, backend="json"):
+    # Shared per process so the JSON cache and SQLite pool survive across requests.
+    key = (data_path, backend)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = DataManager(data_path, backend=backend)
+            _managers[key] = manager
+        return manager
@@ -3,7 +3,18 @@ import os
 
 from dateutil import parser
 
-from .storage import get_data_dir, latest_json_file, read_json, write_json
+from .compression import precompress_file
+from .data_diff import diff_countries
+from .derived_metrics import attach_derived
+from .events import publish_event
+from .flatten import category_names
+from .mapped_data import binary_path_for, write_binary
+from .merge_sources import load_sources, merge_countries, registered_sources
+from .merged_versions import get_version_store
+from .profiling import stage
+from .sqlite_store import sqlite_path_for, write_sqlite
+from .storage import get_data_dir, read_json, write_json
+from .warm_cache import write_sidecar
 
 
 def _parse_timestamp(value):
@@ -15,129 +26,96 @@ def _parse_timestamp(value):
         return None
 
 
-def _load_latest(dir_path):
-    latest_path = latest_json_file(dir_path)
-    if not latest_path:
-        return None
-    return read_json(latest_path)
+# Published merged versions kept on disk for pinned reads and rollback.
+KEEP_VERSIONS = 20
+
+
+def _write_artifacts(data_path, merged_data, compressed_from=None):
+    # The version copy is byte-identical to the top-level file, whose
+    # siblings were just compressed; copy them rather than redo brotli 11.
+    precompress_file(data_path, reuse_from=compressed_from)
+    write_sqlite(merged_data, sqlite_path_for(data_path))
+    write_binary(merged_data, binary_path_for(data_path))
+    write_sidecar(merged_data, data_path)
 
 
-def merge_all_data():
+def merge_all_data(as_of=None, write=True, source_status=None):
+    """Merge the latest raw snapshots, or those current at `as_of`.
+
+    Every source registered in `merge_sources` is loaded in parallel and
+    folded in through its field mappings; adding a dataset means registering
+    a MergeSource, not editing this function.
+
+    Historical merges are usually previews, so callers pass write=False to
+    leave the served merged file untouched. `source_status` (from a refresh)
+    is recorded per source in the metadata next to each snapshot's age.
+    """
     merged_path = get_data_dir("merged", "countries_data.json")
     base_data = {}
     if os.path.exists(merged_path):
         base_data = read_json(merged_path)
 
     base_countries = base_data.get("countries", {})
-    merged_countries = {}
-    last_updated_values = []
-
-    def ensure_country(code):
-        if code not in merged_countries:
-            merged_countries[code] = {}
-            base_entry = base_countries.get(code, {})
-            for key in ("name", "name_zh", "capital"):
-                if key in base_entry:
-                    merged_countries[code][key] = base_entry[key]
-        return merged_countries[code]
-
-    gdp = _load_latest(get_data_dir("raw", "gdp"))
-    if gdp:
-        last_updated_values.append(gdp.get("last_updated"))
-        for code, entry in gdp.get("data", {}).items():
-            country = ensure_country(code)
-            country["gdp"] = {
-                "value": entry.get("value"),
-                "unit": entry.get("unit", gdp.get("unit", "USD")),
-                "year": entry.get("year"),
-                "lag_note": entry.get("lag_note"),
-            }
-
-    oil = _load_latest(get_data_dir("raw", "oil"))
-    if oil:
-        last_updated_values.append(oil.get("last_updated"))
-        for code, entry in oil.get("data", {}).items():
-            country = ensure_country(code)
-            country["oil_production"] = {
-                "value": entry.get("value"),
-                "unit": entry.get("unit", oil.get("unit", "桶/日")),
-                "year": entry.get("year"),
-                "month": entry.get("month"),
-                "lag_note": entry.get("lag_note"),
-            }
-
-    agriculture = _load_latest(get_data_dir("raw", "agriculture"))
-    if agriculture:
-        last_updated_values.append(agriculture.get("last_updated"))
-        for code, entry in agriculture.get("data", {}).items():
-            country = ensure_country(code)
-            country["grain_production"] = {
-                "total": entry.get("total"),
-                "unit": entry.get("unit", agriculture.get("unit", "吨/年")),
-                "by_category": entry.get("by_category", {}),
-                "year": entry.get("year"),
-                "lag_note": entry.get("lag_note"),
-            }
-
-    minerals = _load_latest(get_data_dir("raw", "minerals"))
-    if minerals:
-        last_updated_values.append(minerals.get("last_updated"))
-
-        nonferrous = minerals.get("nonferrous", {})
-        for code, entry in nonferrous.get("data", {}).items():
-            country = ensure_country(code)
-            country["nonferrous_metals"] = {
-                "unit": entry.get("unit", nonferrous.get("unit", "吨/年")),
-                "by_category": entry.get("by_category", {}),
-                "year": entry.get("year"),
-                "lag_note": entry.get("lag_note"),
-            }
-
-        gold = minerals.get("gold", {})
-        for code, entry in gold.get("data", {}).items():
-            country = ensure_country(code)
-            country["gold_production"] = {
-                "value": entry.get("value"),
-                "unit": entry.get("unit", gold.get("unit", "吨/年")),
-                "year": entry.get("year"),
-                "lag_note": entry.get("lag_note"),
-            }
-            if entry.get("source") or gold.get("source"):
-                country["gold_production"]["source"] = entry.get(
-                    "source", gold.get("source")
-                )
-
-    gold_reserves = _load_latest(get_data_dir("raw", "gold_reserves"))
-    if gold_reserves:
-        last_updated_values.append(gold_reserves.get("last_updated"))
-        for code, entry in gold_reserves.get("data", {}).items():
-            country = ensure_country(code)
-            country["gold_reserves"] = {
-                "value": entry.get("value"),
-                "previous": entry.get("previous"),
-                "unit": entry.get("unit", gold_reserves.get("unit", "吨")),
-                "year": entry.get("year"),
-                "month": entry.get("month"),
-                "lag_note": entry.get("lag_note"),
-            }
-            if entry.get("source") or gold_reserves.get("source"):
-                country["gold_reserves"]["source"] = entry.get(
-                    "source", gold_reserves.get("source")
-                )
+    sources = registered_sources()
+    with stage("load"):
+        payloads = load_sources(sources, as_of=as_of)
+    with stage("merge"):
+        merged_countries = merge_countries(sources, payloads, base_countries)
+    with stage("derive"):
+        # Shares, ranks and per-capita values are stored with the version, so
+        # requests read them instead of recomputing them.
+        derived_info = attach_derived(merged_countries)
 
     metadata = base_data.get("metadata", {})
     version = metadata.get("version", "0.1")
+    last_updated_values = [payload.get("last_updated") for payload in payloads.values() if payload]
     parsed_updates = [value for value in (_parse_timestamp(value) for value in last_updated_values) if value]
     last_crawl = max(parsed_updates).isoformat(timespec="seconds") + "Z" if parsed_updates else None
 
+    source_info = {}
+    for name, payload in payloads.items():
+        source_info[name] = {"last_updated": payload.get("last_updated") if payload else None}
+        source_info[name].update((source_status or {}).get(name, {}))
+
     merged_data = {
         "metadata": {
             "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
             "version": version,
             "last_crawl": last_crawl or metadata.get("last_crawl"),
+            "sources": source_info,
+            "derived": derived_info,
+            # Lets tabular exports write their header without a pass over rows.
+            "categories": category_names(merged_countries.items()),
         },
         "countries": merged_countries,
     }
 
-    write_json(merged_path, merged_data)
+    if write:
+        # The top-level file stays the latest merge output for offline tools;
+        # the API serves whichever published version ACTIVE points at.
+        with stage("write"):
+            write_json(merged_path, merged_data)
+            precompress_file(merged_path)
+        versions = get_version_store(merged_path)
+        parent_id = versions.active()
+        with stage("diff"):
+            if versions.exists(parent_id):
+                parent_countries = read_json(versions.data_path(parent_id)).get("countries", {})
+            else:
+                parent_id, parent_countries = None, base_countries
+            changes = {"parent": parent_id, "countries": diff_countries(parent_countries, merged_countries)}
+        with stage("write"):
+            version_id = versions.publish(
+                merged_data, lambda path: _write_artifacts(path, merged_data, merged_path), changes=changes
+            )
+        publish_event(
+            "merge",
+            {
+                "version": version_id,
+                "parent": parent_id,
+                "changed": sorted(changes["countries"]),
+                "generated_at": merged_data["metadata"]["generated_at"],
+            },
+        )
+        versions.prune(keep=KEEP_VERSIONS)
     return merged_data
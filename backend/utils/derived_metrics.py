@@ -0,0 +1,176 @@
+import math
+import os
+import threading
+
+from .flatten import CATEGORY_METRICS, VALUE_FIELDS
+from .storage import get_repo_root, read_json
+
+# Metrics that get a per-capita column (and a rank over it).
+PER_CAPITA_METRICS = ("gdp", "oil_production", "grain_production", "gold_production")
+
+# Scalar columns in each country's "derived" entry; `/api/derived/<column>`
+# serves any of these. Category mixes (`<metric>_mix`) are dicts.
+DERIVED_COLUMNS = (
+    ("population",)
+    + tuple(f"{metric}_per_capita" for metric in PER_CAPITA_METRICS)
+    + tuple(f"{metric}_share" for metric in VALUE_FIELDS)
+    + ("gold_reserves_change", "gold_reserves_change_pct")
+)
+
+POPULATION_SOURCE = "population metric, else Natural Earth POP_EST"
+
+_population_cache = {}
+_population_lock = threading.Lock()
+
+
+def default_geojson_path():
+    return os.environ.get(
+        "WORLD_GAME_GEOJSON_PATH",
+        os.path.join(get_repo_root(), "static", "geojson", "world_50m_custom.geojson"),
+    )
+
+
+def feature_iso(props):
+    # Natural Earth marks some ISO codes as "-99" (France, Norway, ...);
+    # ADM0_A3 has its own codes for a few others (SDS, PSX), so prefer ISO_A3.
+    iso = props.get("ISO_A3")
+    if iso and iso != "-99":
+        return iso
+    return props.get("ADM0_A3")
+
+
+def load_population(geojson_path=None):
+    """{iso: (population, year)} from the GeoJSON's POP_EST/POP_YEAR, cached by mtime."""
+    path = geojson_path or default_geojson_path()
+    if not os.path.exists(path):
+        return {}
+    mtime = os.path.getmtime(path)
+    with _population_lock:
+        cached = _population_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        population = {}
+        for feature in read_json(path).get("features", []):
+            props = feature.get("properties") or {}
+            iso = feature_iso(props)
+            value = props.get("POP_EST")
+            if iso and isinstance(value, (int, float)) and value > 0:
+                population[iso] = (float(value), props.get("POP_YEAR"))
+        _population_cache[path] = (mtime, population)
+        return population
+
+
+def _column(np, countries, codes, metric, field):
+    values = np.full(len(codes), np.nan)
+    for index, iso in enumerate(codes):
+        entry = countries[iso].get(metric)
+        if isinstance(entry, dict):
+            value = entry.get(field)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[index] = value
+    return values
+
+
+def _ranks(np, values):
+    # 1 = largest; ties share the better rank; NaN gets no rank.
+    present = ~np.isnan(values)
+    ordered = np.sort(values[present])
+    ranks = np.full(len(values), np.nan)
+    ranks[present] = len(ordered) - np.searchsorted(ordered, values[present], side="right") + 1
+    return ranks
+
+
+def compute_derived(countries, population=None):
+    """Derived numbers for every country, as {iso: {column: value}}.
+
+    Each metric is laid out as one float array over the sorted ISO codes
+    (NaN where missing), so per-capita values, world shares, ranks, the
+    gold-reserve change and category mixes are whole-array operations.
+    A country's own "population" metric wins over the GeoJSON estimate.
+    """
+    # Imported here: only merges need numpy, not the CLI's import path.
+    import numpy as np
+
+    codes = sorted(countries)
+    population = population if population is not None else load_population()
+    people = _column(np, countries, codes, "population", "value")
+    people_year = np.full(len(codes), np.nan)
+    for index, iso in enumerate(codes):
+        entry = countries[iso].get("population")
+        if isinstance(entry, dict) and not np.isnan(people[index]):
+            year = entry.get("year")
+        elif iso in population:
+            people[index], year = population[iso]
+        else:
+            continue
+        if isinstance(year, int):
+            people_year[index] = year
+    people[people <= 0] = np.nan
+
+    columns = {"population": people, "population_year": people_year}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for metric, field in VALUE_FIELDS.items():
+            values = _column(np, countries, codes, metric, field)
+            total = np.nansum(values)
+            columns[f"{metric}_share"] = values / total if total else np.full(len(codes), np.nan)
+            columns[f"{metric}_rank"] = _ranks(np, values)
+            if metric in PER_CAPITA_METRICS:
+                per_capita = values / people
+                columns[f"{metric}_per_capita"] = per_capita
+                columns[f"{metric}_per_capita_rank"] = _ranks(np, per_capita)
+
+        current = _column(np, countries, codes, "gold_reserves", "value")
+        previous = _column(np, countries, codes, "gold_reserves", "previous")
+        change = current - previous
+        columns["gold_reserves_change"] = change
+        columns["gold_reserves_change_pct"] = np.where(previous != 0, change / previous * 100, np.nan)
+
+    derived = {iso: {} for iso in codes}
+    for name, values in columns.items():
+        as_int = name.endswith("_rank") or name.endswith("_year")
+        for iso, value in zip(codes, values.tolist()):
+            if math.isfinite(value):
+                derived[iso][name] = int(value) if as_int else value
+
+    for metric in CATEGORY_METRICS:
+        breakdowns = []
+        for iso in codes:
+            entry = countries[iso].get(metric)
+            breakdowns.append((entry.get("by_category") if isinstance(entry, dict) else None) or {})
+        names = sorted({name for categories in breakdowns for name in categories})
+        if not names:
+            continue
+        amounts = np.full((len(codes), len(names)), np.nan)
+        for row, categories in enumerate(breakdowns):
+            for column, name in enumerate(names):
+                value = categories.get(name)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    amounts[row, column] = value
+        totals = np.nansum(amounts, axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mix = np.where(totals > 0, amounts / totals, np.nan)
+        for iso, shares in zip(codes, mix.tolist()):
+            shares = {name: share for name, share in zip(names, shares) if math.isfinite(share)}
+            if shares:
+                derived[iso][f"{metric}_mix"] = shares
+    return {iso: values for iso, values in derived.items() if values}
+
+
+def attach_derived(countries, population=None):
+    """Store compute_derived() output under each country's "derived" key.
+
+    The returned metadata carries each column's ISO codes ordered by value,
+    largest first, so `/api/derived` reads a slice instead of sorting.
+    """
+    derived = compute_derived(countries, population)
+    for iso, values in derived.items():
+        countries[iso]["derived"] = values
+    order = {}
+    for column in DERIVED_COLUMNS:
+        present = [(values[column], iso) for iso, values in derived.items() if column in values]
+        order[column] = [iso for _, iso in sorted(present, key=lambda item: (-item[0], item[1]))]
+    return {
+        "columns": list(DERIVED_COLUMNS),
+        "population": POPULATION_SOURCE,
+        "order": order,
+    }
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from .events import HEARTBEAT_INTERVAL, POLL_INTERVAL, EventLogReader, format_sse
+
+EVENTS_PATH = "/api/events"
+# Slow clients that fall this far behind are disconnected instead of
+# buffering without bound; EventSource reconnects with Last-Event-ID.
+CLIENT_QUEUE_SIZE = 256
+# Seconds a client gets to send its request line and headers.
+REQUEST_TIMEOUT = 10
+
+
+class EventFanout:
+    """Single-threaded SSE fan-out: one log tailer, many idle connections.
+
+    Every client is a coroutine waiting on its own queue, so an idle
+    subscriber costs a socket and a few objects rather than a worker thread.
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL, heartbeat=HEARTBEAT_INTERVAL):
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.clients = {}
+
+    async def tail(self):
+        reader = EventLogReader()
+        loop = asyncio.get_running_loop()
+        while True:
+            # File reads go to the default executor so a slow disk never
+            # stalls the connections this loop serves.
+            for event_id, event in await loop.run_in_executor(None, reader.read_new):
+                message = format_sse(event_id, event).encode("utf-8")
+                for queue, writer in list(self.clients.items()):
+                    try:
+                        queue.put_nowait((event_id, message))
+                    except asyncio.QueueFull:
+                        del self.clients[queue]
+                        writer.close()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        parts = request_line.decode("latin-1").split()
+        return (parts[0], parts[1]) if len(parts) >= 2 else (None, None), headers
+
+    async def handle(self, reader, writer):
+        queue = None
+        try:
+            (method, target), headers = await asyncio.wait_for(
+                self._read_request(reader), timeout=REQUEST_TIMEOUT
+            )
+            url = urlsplit(target or "")
+            if method != "GET" or url.path != EVENTS_PATH:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+
+            since = headers.get("last-event-id") or parse_qs(url.query).get("since", [None])[0]
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Access-Control-Allow-Origin: *\r\n"
+                b"Connection: keep-alive\r\n\r\n"
+                + f"retry: {int(self.heartbeat * 1000)}\n\n".encode("ascii")
+            )
+            queue = asyncio.Queue(CLIENT_QUEUE_SIZE)
+            self.clients[queue] = writer
+            sent_up_to = 0
+            if since and since.isdigit():
+                # Replay what the client missed, then follow the shared tail.
+                loop = asyncio.get_running_loop()
+                replay = await loop.run_in_executor(None, EventLogReader(since=since).read_new)
+                for event_id, event in replay:
+                    writer.write(format_sse(event_id, event).encode("utf-8"))
+                    sent_up_to = event_id
+            await writer.drain()
+
+            while not writer.is_closing():
+                try:
+                    event_id, message = await asyncio.wait_for(queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    event_id, message = None, b": keep-alive\n\n"
+                if event_id is not None and event_id <= sent_up_to:
+                    continue  # already sent during replay
+                writer.write(message)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.clients.pop(queue, None)
+            writer.close()
+
+    async def serve(self, host, port, ready=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        self._tail_task = asyncio.get_running_loop().create_task(self.tail())
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+
+def run_event_server(host="0.0.0.0", port=5001):
+    asyncio.run(EventFanout().serve(host, port))
+
+
+def start_event_server(host="0.0.0.0", port=5001):
+    """Run the fan-out on a daemon thread with its own event loop."""
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=lambda: asyncio.run(EventFanout().serve(host, port, ready)),
+        name="event-fanout",
+        daemon=True,
+    )
+    thread.start()
+    ready.wait(timeout=5)
+    return thread
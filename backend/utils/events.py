@@ -0,0 +1,163 @@
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+from .file_lock import FileLock
+from .storage import ensure_dir, get_data_dir
+
+# Rotate the log once it grows past this (one old file is kept as .1);
+# readers finish the rotated file, then follow the new one.
+MAX_LOG_BYTES = 4 * 1024 * 1024
+POLL_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = 15.0
+
+
+def events_log_path():
+    return os.environ.get("WORLD_GAME_EVENTS_LOG") or get_data_dir("events", "events.ndjson")
+
+
+def _last_logged_id(path):
+    # Recovers the sequence from the newest event when the counter is missing.
+    for candidate in (path, path + ".1"):
+        if not os.path.exists(candidate) or not os.path.getsize(candidate):
+            continue
+        with open(candidate, "rb") as handle:
+            handle.seek(max(0, os.path.getsize(candidate) - 65536))
+            lines = handle.read().splitlines()
+        for line in reversed(lines):
+            try:
+                return int(json.loads(line)["id"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return 0
+
+
+def _next_id(path):
+    counter_path = path + ".seq"
+    try:
+        with open(counter_path, "r", encoding="ascii") as handle:
+            current = int(handle.read().strip())
+    except (OSError, ValueError):
+        current = _last_logged_id(path)
+    with open(counter_path, "w", encoding="ascii") as handle:
+        handle.write(str(current + 1))
+    return current + 1
+
+
+def publish_event(event_type, data=None, path=None):
+    """Append one event; returns its id.
+
+    Any process may publish. Ids come from a counter next to the log, taken
+    under the log's file lock, so they keep increasing across rotations and
+    restarts and a resuming client never confuses old and new events.
+    """
+    path = path or events_log_path()
+    ensure_dir(os.path.dirname(path))
+    with FileLock(path + ".lock"):
+        if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+            os.replace(path, path + ".1")
+        event_id = _next_id(path)
+        line = json.dumps(
+            {
+                "id": event_id,
+                "type": event_type,
+                "time": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "data": data or {},
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8") + b"\n"
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    return event_id
+
+
+@contextmanager
+def job_events(event_type, **data):
+    """Publish started/finished (or failed) events around a job."""
+    publish_event(event_type, dict(data, status="started"))
+    try:
+        yield
+    except Exception as exc:
+        publish_event(event_type, dict(data, status="failed", error=str(exc)))
+        raise
+    publish_event(event_type, dict(data, status="finished"))
+
+
+def _read_lines(path, offset, end=None):
+    """[(event id, event)] from complete lines in path[offset:end], and the new offset."""
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        chunk = handle.read() if end is None else handle.read(end - offset)
+    events = []
+    position = offset
+    for line in chunk.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break  # partial write; pick it up next time
+        position += len(line)
+        try:
+            event = json.loads(line)
+            events.append((int(event["id"]), event))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return events, position
+
+
+class EventLogReader:
+    """Incremental reader over the events log, resumable from an event id."""
+
+    def __init__(self, path=None, since=None):
+        self.path = path or events_log_path()
+        self.last_id = None if since is None else int(since)
+        self.offset = None
+        self._inode = None
+
+    def read_new(self):
+        """Return [(event id, event)] published since the last call."""
+        rotated = self.path + ".1"
+        events = []
+        if self.offset is None:
+            if self.last_id is None:
+                # Fresh subscriber: only events from now on.
+                if os.path.exists(self.path):
+                    stat = os.stat(self.path)
+                    self.offset, self._inode = stat.st_size, stat.st_ino
+                else:
+                    self.offset = 0
+                self.last_id = 0 if self.offset == 0 else _last_logged_id(self.path)
+                return []
+            # Resuming: anything newer than `since` in the rotated and current logs.
+            if os.path.exists(rotated):
+                events += _read_lines(rotated, 0)[0]
+            self.offset = 0
+        if not os.path.exists(self.path):
+            return self._newer(events)
+
+        stat = os.stat(self.path)
+        if self._inode is not None and stat.st_ino != self._inode:
+            # Rotated: finish the old file (now .1), then start the new one.
+            if os.path.exists(rotated) and os.stat(rotated).st_ino == self._inode:
+                events += _read_lines(rotated, self.offset)[0]
+            self.offset = 0
+        elif stat.st_size < self.offset:
+            self.offset = 0
+        self._inode = stat.st_ino
+        if stat.st_size > self.offset:
+            new, self.offset = _read_lines(self.path, self.offset, stat.st_size)
+            events += new
+        return self._newer(events)
+
+    def _newer(self, events):
+        fresh = [(event_id, event) for event_id, event in events if self.last_id is None or event_id > self.last_id]
+        if fresh:
+            self.last_id = fresh[-1][0]
+        return fresh
+
+
+def format_sse(event_id, event):
+    body = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {body}\n\n"
@@ -0,0 +1,192 @@
+import csv
+import io
+import json
+
+from .flatten import CATEGORY_METRICS, EXTRA_FIELDS, VALUE_FIELDS, category_names, flatten_country
+
+EXPORT_FORMATS = {
+    # Passed as the mimetype; Flask adds "; charset=utf-8" to text types.
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_METRICS = tuple(dict.fromkeys((*VALUE_FIELDS, *CATEGORY_METRICS)))
+BASE_COLUMNS = ("iso", "name", "name_zh", "capital")
+
+# Rows per yielded chunk (text formats) or per row group (Parquet).
+CHUNK_ROWS = 64
+ROW_GROUP_ROWS = 1000
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parse_metrics(value):
+    """Split a comma list of metrics; None means all. Raises ValueError."""
+    if not value:
+        return None
+    metrics = [metric.strip() for metric in value.split(",") if metric.strip()]
+    unknown = [metric for metric in metrics if metric not in EXPORT_METRICS]
+    if unknown:
+        raise ValueError(", ".join(unknown))
+    return metrics
+
+
+def _row(iso, country, metrics):
+    flat = flatten_country(country, metrics)
+    if not flat:
+        return None
+    row = {"iso": iso}
+    for key in BASE_COLUMNS[1:]:
+        if country.get(key) is not None:
+            row[key] = country[key]
+    row.update(flat)
+    return row
+
+
+def export_rows(countries, metrics=None):
+    """Flat rows, one per country, built lazily from (iso, country) pairs.
+
+    Countries without any of the selected metrics are left out.
+    """
+    for iso, country in countries:
+        row = _row(iso, country, metrics)
+        if row is not None:
+            yield row
+
+
+def export_columns(categories, metrics=None):
+    """Column order for tabular formats.
+
+    `categories` maps each category metric to its category names: headline
+    value, extra fields, `<metric>_<category>` (sorted) and `<metric>_year`
+    per metric, in EXPORT_METRICS order.
+    """
+    metrics = list(metrics or EXPORT_METRICS)
+    columns = list(BASE_COLUMNS)
+    for metric in EXPORT_METRICS:
+        if metric not in metrics:
+            continue
+        if metric in VALUE_FIELDS:
+            columns.append(metric)
+        columns.extend(f"{metric}_{field}" for field in EXTRA_FIELDS.get(metric, ()))
+        columns.extend(f"{metric}_{category}" for category in sorted(categories.get(metric, ())))
+        columns.append(f"{metric}_year")
+    return columns
+
+
+def _dataset_categories(reader):
+    categories = reader.get_metadata().get("categories")
+    if categories is None:
+        # Versions merged before the names were recorded need a key-only pass.
+        categories = category_names(reader.iter_countries())
+    return categories
+
+
+def _csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+        if len(lines) == CHUNK_ROWS:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _parquet_chunks(columns, rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = []
+    for column in columns:
+        if column in BASE_COLUMNS:
+            fields.append(pa.field(column, pa.string()))
+        elif column.endswith("_year"):
+            fields.append(pa.field(column, pa.int64()))
+        else:
+            fields.append(pa.field(column, pa.float64()))
+    schema = pa.schema(fields)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    batch = []
+
+    def flush():
+        writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+        batch.clear()
+        return sink.drain()
+
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) == ROW_GROUP_ROWS:
+                yield flush()
+        if batch:
+            yield flush()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_stream(reader, output="csv", metrics=None):
+    """Yield the export of one dataset reader as byte chunks.
+
+    Countries are read and flattened one at a time in a single pass, so
+    memory stays flat and the first chunk goes out after CHUNK_ROWS rows.
+    The CSV/Parquet header comes from the category names in the metadata.
+    """
+    if output not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {output}")
+    rows = export_rows(reader.iter_countries(), metrics)
+    if output == "ndjson":
+        yield from _ndjson_chunks(rows)
+        return
+    columns = export_columns(_dataset_categories(reader), metrics)
+    if output == "csv":
+        yield from _csv_chunks(columns, rows)
+    else:
+        yield from _parquet_chunks(columns, rows)
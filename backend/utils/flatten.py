@@ -0,0 +1,68 @@
+import math
+
+# Merged metric key -> the field holding its headline number.
+VALUE_FIELDS = {
+    "gdp": "value",
+    "oil_production": "value",
+    "grain_production": "total",
+    "gold_production": "value",
+    "gold_reserves": "value",
+}
+
+CATEGORY_METRICS = ("grain_production", "nonferrous_metals")
+
+EXTRA_FIELDS = {
+    "gold_reserves": ("previous",),
+}
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def category_names(countries):
+    """Sorted `by_category` names per CATEGORY_METRICS metric over (iso, country) pairs."""
+    names = {metric: set() for metric in CATEGORY_METRICS}
+    for _, country in countries:
+        for metric, found in names.items():
+            entry = country.get(metric)
+            if isinstance(entry, dict):
+                found.update(entry.get("by_category") or ())
+    return {metric: sorted(found) for metric, found in names.items()}
+
+
+def flatten_country(country, metrics=None):
+    """Flatten one merged country record into scalar columns.
+
+    Headline values become `<metric>`, category breakdowns become
+    `<metric>_<category>` and the data year is kept as `<metric>_year`.
+    """
+    flat = {}
+    for metric, entry in country.items():
+        if not isinstance(entry, dict):
+            continue
+        if metrics is not None and metric not in metrics:
+            continue
+
+        value_field = VALUE_FIELDS.get(metric)
+        if value_field:
+            value = _number(entry.get(value_field))
+            if value is not None:
+                flat[metric] = value
+        for field in EXTRA_FIELDS.get(metric, ()):
+            value = _number(entry.get(field))
+            if value is not None:
+                flat[f"{metric}_{field}"] = value
+        if metric in CATEGORY_METRICS:
+            for category, value in (entry.get("by_category") or {}).items():
+                value = _number(value)
+                if value is not None:
+                    flat[f"{metric}_{category}"] = value
+        year = entry.get("year")
+        if isinstance(year, int):
+            flat[f"{metric}_year"] = year
+    return flat
@@ -0,0 +1,211 @@
+import json
+import math
+import os
+import threading
+
+from .lru_cache import LRUCache
+
+# Properties the map needs to resolve ISO codes and display names; everything
+# else in the Natural Earth attributes is dropped from viewport responses.
+GEOMETRY_PROPERTIES = (
+    "ADM0_A3",
+    "ISO_A3",
+    "ISO_A2",
+    "ADMIN",
+    "NAME",
+    "NAME_LONG",
+    "NAME_ZH",
+)
+
+MIN_ZOOM = 0
+MAX_ZOOM = 12
+# Quantization grid: a quarter of a tile width at the requested zoom.
+GRID_DIVISIONS = 4
+
+
+def parse_bbox(value):
+    if not value:
+        raise ValueError("bbox is required")
+    parts = [part.strip() for part in str(value).split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be minx,miny,maxx,maxy")
+    try:
+        minx, miny, maxx, maxy = (float(part) for part in parts)
+    except ValueError:
+        raise ValueError("bbox values must be numbers")
+    if not all(math.isfinite(part) for part in (minx, miny, maxx, maxy)):
+        raise ValueError("bbox values must be finite")
+    if minx >= maxx or miny >= maxy:
+        raise ValueError("bbox min must be smaller than max")
+    # Queries are clamped to the world; one outside it would clamp to nothing.
+    if minx >= 180 or maxx <= -180 or miny >= 90 or maxy <= -90:
+        raise ValueError("bbox must overlap -180,-90,180,90")
+    return minx, miny, maxx, maxy
+
+
+def parse_zoom(value):
+    try:
+        zoom = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("zoom must be a number")
+    if not math.isfinite(zoom):
+        raise ValueError("zoom must be finite")
+    return zoom
+
+
+def clamp_zoom(zoom):
+    return max(MIN_ZOOM, min(MAX_ZOOM, int(round(float(zoom)))))
+
+
+def quantize_bbox(bbox, zoom):
+    step = 360.0 / (2 ** zoom) / GRID_DIVISIONS
+    minx, miny, maxx, maxy = bbox
+    minx = max(-180.0, math.floor(minx / step) * step)
+    miny = max(-90.0, math.floor(miny / step) * step)
+    maxx = min(180.0, math.ceil(maxx / step) * step)
+    maxy = min(90.0, math.ceil(maxy / step) * step)
+    return minx, miny, maxx, maxy
+
+
+def simplify_tolerance(zoom):
+    # Half a screen pixel, in degrees, for a 256px Web Mercator tile.
+    return 360.0 / (256 * (2 ** zoom)) / 2
+
+
+def polygonal(geom):
+    # clip_by_rect can leave degenerate lines or points on the viewport edge.
+    if geom.geom_type in ("Polygon", "MultiPolygon"):
+        return geom
+    from shapely.geometry import MultiPolygon
+
+    polygons = []
+    for part in getattr(geom, "geoms", []):
+        if part.geom_type == "Polygon":
+            polygons.append(part)
+        elif part.geom_type == "MultiPolygon":
+            polygons.extend(part.geoms)
+    return MultiPolygon(polygons)
+
+
+def _round_coords(coords, ndigits):
+    if isinstance(coords, (int, float)):
+        return round(coords, ndigits)
+    return [_round_coords(item, ndigits) for item in coords]
+
+
+class GeometryIndex:
+    def __init__(self, geojson_path, cache_size=256):
+        self.geojson_path = geojson_path
+        self._lock = threading.Lock()
+        self._cache = LRUCache(cache_size)
+        # (mtime, tree, geometries, properties), replaced as a whole.
+        self._state = None
+
+    def _load(self, mtime):
+        # Lazy import: shapely is only needed once a viewport is requested.
+        from shapely.geometry import shape
+        from shapely.strtree import STRtree
+
+        with open(self.geojson_path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+
+        geometries = []
+        properties = []
+        for feature in data.get("features", []):
+            geometry = feature.get("geometry")
+            if not geometry or not geometry.get("coordinates"):
+                continue
+            geom = shape(geometry)
+            if geom.is_empty:
+                continue
+            props = feature.get("properties") or {}
+            geometries.append(geom)
+            properties.append({key: props[key] for key in GEOMETRY_PROPERTIES if key in props})
+
+        return mtime, STRtree(geometries), tuple(geometries), tuple(properties)
+
+    def _snapshot(self):
+        """The loaded state, reloaded when the file changes.
+
+        Queries work on the tuple they got here, so a reload never pairs a new
+        tree with old geometries. Raises FileNotFoundError without the file.
+        """
+        with self._lock:
+            mtime = os.path.getmtime(self.geojson_path)
+            if self._state is None or self._state[0] != mtime:
+                self._state = self._load(mtime)
+                self._cache.clear()
+            return self._state
+
+    def intersecting(self, bbox):
+        """Return (feature_id, geometry, properties) for features touching bbox."""
+        from shapely.geometry import box
+
+        _, tree, geometries, properties = self._snapshot()
+        hits = tree.query(box(*bbox), predicate="intersects")
+        return [(int(index) + 1, geometries[index], properties[index]) for index in sorted(hits)]
+
+    def query(self, bbox, zoom):
+        state = self._snapshot()
+        zoom = clamp_zoom(zoom)
+        bbox = quantize_bbox(bbox, zoom)
+        # The mtime keeps a body built from the old file out of a new cache.
+        key = (state[0], bbox, zoom)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        body = json.dumps(
+            self._build_collection(state, bbox, zoom), ensure_ascii=False, separators=(",", ":")
+        )
+        self._cache.put(key, body)
+        return body
+
+    def _build_collection(self, state, bbox, zoom):
+        import shapely
+        from shapely.geometry import box, mapping
+
+        _, tree, geometries, properties = state
+        tolerance = simplify_tolerance(zoom)
+        ndigits = max(2, int(math.ceil(-math.log10(tolerance))) + 1)
+        viewport = box(*bbox)
+
+        features = []
+        for index in sorted(tree.query(viewport, predicate="intersects")):
+            clipped = polygonal(shapely.clip_by_rect(geometries[index], *bbox))
+            if clipped.is_empty:
+                continue
+            simplified = clipped.simplify(tolerance, preserve_topology=True)
+            if simplified.is_empty:
+                continue
+            geometry = mapping(simplified)
+            features.append(
+                {
+                    "type": "Feature",
+                    "properties": properties[index],
+                    "geometry": {
+                        "type": geometry["type"],
+                        "coordinates": _round_coords(geometry["coordinates"], ndigits),
+                    },
+                }
+            )
+
+        return {
+            "type": "FeatureCollection",
+            "bbox": list(bbox),
+            "zoom": zoom,
+            "features": features,
+        }
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_geometry_index(geojson_path):
+    with _indexes_lock:
+        index = _indexes.get(geojson_path)
+        if index is None:
+            index = GeometryIndex(geojson_path)
+            _indexes[geojson_path] = index
+        return index
@@ -0,0 +1,245 @@
+import json
+import mmap
+import os
+import struct
+import threading
+
+from .flatten import VALUE_FIELDS
+
+# Layout: header, metric table location (format 2+), country records
+# (compact UTF-8 JSON), metadata record, index, metric tables.
+# The index holds one fixed-width entry per ISO code, sorted by code. Each
+# metric table holds fixed-width (code, value, year, unit) rows sorted by
+# value, largest first, so queries and ranks never decode country records;
+# a JSON catalog maps metric -> [offset, rows, units].
+MAGIC = b"WGD1"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sIQQQI")
+METRICS_HEADER = struct.Struct("<QQ")
+INDEX_ENTRY = struct.Struct("<8sQI")
+METRIC_ROW = struct.Struct("<8sdiH")
+CODE_BYTES = 8
+NO_YEAR = -(2**31)
+NO_UNIT = 0xFFFF
+
+
+def binary_path_for(data_path):
+    root, _ = os.path.splitext(data_path)
+    return root + ".bin"
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _code(iso):
+    code = iso.encode("ascii")
+    if len(code) > CODE_BYTES:
+        raise ValueError(f"Country code {iso!r} is longer than {CODE_BYTES} bytes")
+    return code
+
+
+def _metric_tables(countries):
+    """{metric: (rows, units)} for every metric with a numeric value field.
+
+    Metrics whose year or unit does not fit the row layout are left out;
+    readers fall back to decoding the records for those.
+    """
+    tables = {}
+    skipped = set()
+    for iso in sorted(countries):
+        for metric, entry in countries[iso].items():
+            if metric in skipped or not isinstance(entry, dict):
+                continue
+            value = entry.get(VALUE_FIELDS.get(metric, "value"))
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            year, unit = entry.get("year"), entry.get("unit")
+            if not (year is None or (isinstance(year, int) and not isinstance(year, bool) and year != NO_YEAR)) or not (
+                unit is None or isinstance(unit, str)
+            ):
+                skipped.add(metric)
+                tables.pop(metric, None)
+                continue
+            tables.setdefault(metric, []).append((iso, float(value), year, unit))
+    compiled = {}
+    for metric, rows in tables.items():
+        rows.sort(key=lambda row: (-row[1], row[0]))
+        units = sorted({row[3] for row in rows if row[3] is not None})
+        if len(units) >= NO_UNIT:
+            continue
+        packed = b"".join(
+            METRIC_ROW.pack(
+                _code(iso),
+                value,
+                NO_YEAR if year is None else year,
+                NO_UNIT if unit is None else units.index(unit),
+            )
+            for iso, value, year, unit in rows
+        )
+        compiled[metric] = (packed, len(rows), units)
+    return compiled
+
+
+def write_binary(merged_data, bin_path):
+    """Compile merged data into the mapped format and swap it in atomically.
+
+    Raises ValueError for a country code that does not fit the index.
+    """
+    countries = merged_data.get("countries", {})
+    records = []
+    offset = HEADER.size + METRICS_HEADER.size
+    chunks = []
+    for iso in sorted(countries):
+        body = _encode(countries[iso])
+        records.append((_code(iso), offset, len(body)))
+        chunks.append(body)
+        offset += len(body)
+
+    metadata = _encode(merged_data.get("metadata", {}))
+    meta_offset = offset
+    chunks.append(metadata)
+    index_offset = meta_offset + len(metadata)
+    chunks.extend(INDEX_ENTRY.pack(*record) for record in records)
+
+    offset = index_offset + len(records) * INDEX_ENTRY.size
+    catalog = {}
+    for metric, (packed, count, units) in _metric_tables(countries).items():
+        catalog[metric] = [offset, count, units]
+        chunks.append(packed)
+        offset += len(packed)
+    catalog = _encode(catalog)
+    chunks.append(catalog)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, meta_offset, len(metadata), index_offset, len(records))
+    tmp_path = bin_path + ".tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(header)
+        handle.write(METRICS_HEADER.pack(offset, len(catalog)))
+        for chunk in chunks:
+            handle.write(chunk)
+    os.replace(tmp_path, bin_path)
+
+
+def _format_version(bin_path):
+    with open(bin_path, "rb") as handle:
+        header = handle.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    magic, version = HEADER.unpack(header)[:2]
+    return version if magic == MAGIC else None
+
+
+def ensure_binary(data_path):
+    """Compile `data_path` if its binary sibling is missing, older or in an older format."""
+    bin_path = binary_path_for(data_path)
+    if not os.path.exists(data_path):
+        return None
+    if (
+        not os.path.exists(bin_path)
+        or os.path.getmtime(bin_path) < os.path.getmtime(data_path)
+        or _format_version(bin_path) != FORMAT_VERSION
+    ):
+        with open(data_path, "r", encoding="utf-8") as handle:
+            write_binary(json.load(handle), bin_path)
+    return bin_path
+
+
+class _Mapping:
+    def __init__(self, path):
+        with open(path, "rb") as handle:
+            stat = os.fstat(handle.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, meta_offset, meta_length, index_offset, count = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled data file")
+        self.metadata_span = (meta_offset, meta_length)
+        # Files from before the metric tables have no catalog.
+        self.catalog = None
+        if version >= 2:
+            self.catalog = self.read(METRICS_HEADER.unpack_from(self.buffer, HEADER.size))
+        self._metric_rows = {}
+        self.index = {}
+        for position in range(count):
+            code, offset, length = INDEX_ENTRY.unpack_from(
+                self.buffer, index_offset + position * INDEX_ENTRY.size
+            )
+            self.index[code.rstrip(b"\0").decode("ascii")] = (offset, length)
+
+    def read(self, span):
+        offset, length = span
+        return json.loads(self.buffer[offset : offset + length])
+
+    def metric_rows(self, metric):
+        rows = self._metric_rows.get(metric)
+        if rows is None:
+            offset, count, units = self.catalog.get(metric) or (0, 0, [])
+            rows = [
+                {
+                    "code": code.rstrip(b"\0").decode("ascii"),
+                    "value": value,
+                    "unit": None if unit == NO_UNIT else units[unit],
+                    "year": None if year == NO_YEAR else year,
+                }
+                for code, value, year, unit in METRIC_ROW.iter_unpack(
+                    self.buffer[offset : offset + count * METRIC_ROW.size]
+                )
+            ]
+            # The file never changes under a mapping, so decode each table once.
+            self._metric_rows[metric] = rows
+        return rows
+
+
+class MappedDataset:
+    """Read-only view of the compiled data file, shared through the page cache.
+
+    Every worker maps the same file, so the records live once in memory. A
+    new merge replaces the file; the next read notices the new inode and
+    swaps in a fresh mapping while readers holding the old one finish.
+    """
+
+    def __init__(self, bin_path):
+        self.bin_path = bin_path
+        self._lock = threading.Lock()
+        self._mapping = None
+
+    def exists(self):
+        return os.path.exists(self.bin_path)
+
+    def _current(self):
+        stat = os.stat(self.bin_path)
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        mapping = self._mapping
+        if mapping is not None and mapping.identity == identity:
+            return mapping
+        with self._lock:
+            if self._mapping is None or self._mapping.identity != identity:
+                self._mapping = _Mapping(self.bin_path)
+            return self._mapping
+
+    def codes(self):
+        return list(self._current().index)
+
+    def get_country(self, iso_code):
+        mapping = self._current()
+        span = mapping.index.get(iso_code)
+        return mapping.read(span) if span else None
+
+    def get_metadata(self):
+        mapping = self._current()
+        return mapping.read(mapping.metadata_span)
+
+    def metric_rows(self, metric):
+        """[{code, value, unit, year}] largest value first, or None for old files."""
+        mapping = self._current()
+        if mapping.catalog is None:
+            return None
+        return mapping.metric_rows(metric)
+
+    def load(self):
+        mapping = self._current()
+        return {
+            "metadata": mapping.read(mapping.metadata_span),
+            "countries": {iso: mapping.read(span) for iso, span in mapping.index.items()},
+        }
@@ -0,0 +1,184 @@
+import importlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .snapshot_store import load_raw
+
+
+class FieldMapping:
+    """Copies one block of a raw payload into one field of each country.
+
+    `section` names the sub-dict of the payload holding `data` (None for the
+    payload itself). `fields` are copied from every entry in order; "unit"
+    falls back to the section's unit and then to `unit`, other keys to
+    `defaults` (a callable default is called per entry). `inherited` keys are
+    added only when the entry or the section has a value for them.
+    """
+
+    def __init__(self, target, fields, section=None, unit=None, defaults=None, inherited=()):
+        self.target = target
+        self.fields = tuple(fields)
+        self.section = section
+        self.unit = unit
+        self.defaults = defaults or {}
+        self.inherited = tuple(inherited)
+
+    def block(self, payload):
+        return payload.get(self.section, {}) if self.section else payload
+
+    def build(self, entry, block):
+        value = {}
+        for key in self.fields:
+            if key == "unit":
+                value[key] = entry.get("unit", block.get("unit", self.unit))
+            elif key in self.defaults:
+                default = self.defaults[key]
+                value[key] = entry.get(key, default() if callable(default) else default)
+            else:
+                value[key] = entry.get(key)
+        for key in self.inherited:
+            if entry.get(key) or block.get(key):
+                value[key] = entry.get(key, block.get(key))
+        return value
+
+
+class MergeSource:
+    """A raw dataset the merger folds into `countries_data.json`."""
+
+    def __init__(self, name, mappings, raw_dir=None, loader=None):
+        self.name = name
+        self.mappings = tuple(mappings)
+        self.raw_dir = raw_dir or name
+        self.loader = loader or load_raw
+
+    def load(self, as_of=None):
+        return self.loader(self.raw_dir, as_of=as_of)
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+_plugins_loaded = False
+
+
+def register_source(source):
+    """Add (or replace) a merge source; merge order is registration order."""
+    with _registry_lock:
+        _registry[source.name] = source
+    return source
+
+
+def _load_plugins():
+    # Extra sources live in their own modules and call register_source on
+    # import; WORLD_GAME_MERGE_PLUGINS lists them, comma separated.
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for module in os.environ.get("WORLD_GAME_MERGE_PLUGINS", "").split(","):
+        if module.strip():
+            importlib.import_module(module.strip())
+
+
+def registered_sources():
+    _load_plugins()
+    with _registry_lock:
+        return list(_registry.values())
+
+
+def load_sources(sources, as_of=None):
+    """Load every source's raw payload in parallel; returns {name: payload}."""
+    if not sources:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="merge-load") as pool:
+        payloads = pool.map(lambda source: source.load(as_of=as_of), sources)
+        return dict(zip((source.name for source in sources), payloads))
+
+
+def merge_countries(sources, payloads, base_countries):
+    """Build the merged country dicts in a single pass per country."""
+    blocks = []
+    for source in sources:
+        payload = payloads.get(source.name)
+        if payload:
+            for mapping in source.mappings:
+                block = mapping.block(payload)
+                blocks.append((mapping, block, block.get("data", {})))
+
+    # Countries keep the order in which the sources first mention them.
+    codes = dict.fromkeys(code for _, _, data in blocks for code in data)
+    merged = {}
+    for code in codes:
+        base_entry = base_countries.get(code, {})
+        country = {key: base_entry[key] for key in ("name", "name_zh", "capital") if key in base_entry}
+        for mapping, block, data in blocks:
+            entry = data.get(code)
+            if entry is not None:
+                country[mapping.target] = mapping.build(entry, block)
+        merged[code] = country
+    return merged
+
+
+register_source(
+    MergeSource(
+        "gdp",
+        [FieldMapping("gdp", ("value", "unit", "year", "lag_note"), unit="USD")],
+    )
+)
+register_source(
+    MergeSource(
+        "oil",
+        [
+            FieldMapping(
+                "oil_production", ("value", "unit", "year", "month", "lag_note"), unit="桶/日"
+            )
+        ],
+    )
+)
+register_source(
+    MergeSource(
+        "agriculture",
+        [
+            FieldMapping(
+                "grain_production",
+                ("total", "unit", "by_category", "year", "lag_note"),
+                unit="吨/年",
+                defaults={"by_category": dict},
+            )
+        ],
+    )
+)
+register_source(
+    MergeSource(
+        "minerals",
+        [
+            FieldMapping(
+                "nonferrous_metals",
+                ("unit", "by_category", "year", "lag_note"),
+                section="nonferrous",
+                unit="吨/年",
+                defaults={"by_category": dict},
+            ),
+            FieldMapping(
+                "gold_production",
+                ("value", "unit", "year", "lag_note"),
+                section="gold",
+                unit="吨/年",
+                inherited=("source",),
+            ),
+        ],
+    )
+)
+register_source(
+    MergeSource(
+        "gold_reserves",
+        [
+            FieldMapping(
+                "gold_reserves",
+                ("value", "previous", "unit", "year", "month", "lag_note"),
+                unit="吨",
+                inherited=("source",),
+            )
+        ],
+    )
+)
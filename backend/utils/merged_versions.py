@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+
+from .events import publish_event
+from .storage import ensure_dir, file_stamp, read_json, write_json
+
+ACTIVE_NAME = "ACTIVE"
+CHANGES_NAME = "changes.json"
+VERSION_PATTERN = re.compile(r"^\d{8}T\d{6}Z-[0-9a-f]{8}$")
+
+
+class UnknownVersionError(KeyError):
+    pass
+
+
+def versions_dir_for(data_path):
+    return os.path.join(os.path.dirname(data_path), "versions")
+
+
+class VersionStore:
+    """Immutable merged datasets under `versions/<id>/` plus an ACTIVE pointer.
+
+    Publishing writes a complete version directory and renames it into place,
+    then repoints ACTIVE. Rolling back only rewrites the pointer, so it costs
+    the same regardless of dataset size.
+    """
+
+    def __init__(self, root, file_name="countries_data.json"):
+        self.root = root
+        self.file_name = file_name
+        self.active_path = os.path.join(root, ACTIVE_NAME)
+        self._lock = threading.Lock()
+        self._active = None
+        self._active_stat = None
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if VERSION_PATTERN.match(name))
+
+    def exists(self, version_id):
+        return isinstance(version_id, str) and VERSION_PATTERN.match(version_id) is not None and os.path.isfile(
+            self.data_path(version_id)
+        )
+
+    def data_path(self, version_id):
+        return os.path.join(self.root, version_id, self.file_name)
+
+    def changes(self, version_id):
+        """Patches recorded against the version that was active at publish time."""
+        path = os.path.join(self.root, version_id, CHANGES_NAME)
+        return read_json(path) if os.path.exists(path) else None
+
+    def active(self):
+        if not os.path.exists(self.active_path):
+            return None
+        stat = os.stat(self.active_path)
+        marker = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self._lock:
+            if marker != self._active_stat:
+                with open(self.active_path, "r", encoding="utf-8") as handle:
+                    self._active = handle.read().strip() or None
+                self._active_stat = marker
+            return self._active
+
+    def set_active(self, version_id):
+        if not self.exists(version_id):
+            raise KeyError(version_id)
+        previous = self.active()
+        tmp_path = self.active_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.write(version_id + "\n")
+        os.replace(tmp_path, self.active_path)
+        if version_id != previous:
+            recorded = self.changes(version_id)
+            changed = None
+            if recorded is not None and recorded.get("parent") == previous:
+                changed = sorted(recorded["countries"])
+            # changed=None means "unknown": clients should ask /api/changes.
+            publish_event("version", {"version": version_id, "previous": previous, "changed": changed})
+        return version_id
+
+    def publish(self, merged_data, write_artifacts=None, activate=True, changes=None):
+        """Write `merged_data` as a new version; `write_artifacts(path)` adds siblings.
+
+        `changes` is stored as changes.json next to the data, typically the
+        diff against the previously active version.
+        """
+        body = json.dumps(merged_data, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        version_id = f"{stamp}-{hashlib.sha256(body).hexdigest()[:8]}"
+
+        final_dir = os.path.join(self.root, version_id)
+        if not os.path.isdir(final_dir):
+            tmp_dir = final_dir + ".tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            ensure_dir(tmp_dir)
+            data_path = os.path.join(tmp_dir, self.file_name)
+            write_json(data_path, merged_data)
+            if changes is not None:
+                write_json(os.path.join(tmp_dir, CHANGES_NAME), changes)
+            if write_artifacts is not None:
+                write_artifacts(data_path)
+            os.replace(tmp_dir, final_dir)
+        if activate:
+            self.set_active(version_id)
+        return version_id
+
+    def previous(self, version_id=None):
+        versions = self.versions()
+        current = version_id or self.active()
+        if current not in versions:
+            return versions[-1] if versions else None
+        position = versions.index(current)
+        return versions[position - 1] if position > 0 else None
+
+    def rollback(self, version_id=None):
+        target = version_id or self.previous()
+        if target is None:
+            raise KeyError("no earlier version to roll back to")
+        return self.set_active(target)
+
+    def prune(self, keep=10):
+        """Delete the oldest versions beyond `keep`, never the active one."""
+        versions = self.versions()
+        active = self.active()
+        removed = []
+        for version_id in versions[: max(0, len(versions) - keep)]:
+            if version_id == active:
+                continue
+            shutil.rmtree(os.path.join(self.root, version_id), ignore_errors=True)
+            removed.append(version_id)
+        return removed
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_version_store(data_path):
+    root = versions_dir_for(data_path)
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = VersionStore(root, os.path.basename(data_path))
+            _stores[root] = store
+        return store
+
+
+def data_version_stamp(data_path):
+    """Change marker for the data the API serves: the active version if any."""
+    active = get_version_store(data_path).active()
+    return active or file_stamp(data_path)
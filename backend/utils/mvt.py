@@ -0,0 +1,177 @@
+# Minimal Mapbox Vector Tile (v2.1) encoder.
+#
+# Only what the country tiles need is implemented: polygon geometries, string
+# and numeric attributes, and attribute-only features. The protobuf wire format
+# is written by hand so the tile server has no protobuf dependency. A tile is a
+# sequence of `layers` fields, so independently encoded layers can simply be
+# concatenated into one tile.
+
+import struct
+
+GEOM_UNKNOWN = 0
+GEOM_POLYGON = 3
+
+CMD_MOVE_TO = 1
+CMD_LINE_TO = 2
+CMD_CLOSE_PATH = 7
+
+DEFAULT_EXTENT = 4096
+
+_WIRE_VARINT = 0
+_WIRE_64BIT = 1
+_WIRE_BYTES = 2
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field, payload):
+    return _key(field, _WIRE_BYTES) + _varint(len(payload)) + payload
+
+
+def _varint_field(field, value):
+    return _key(field, _WIRE_VARINT) + _varint(value)
+
+
+def _packed_field(field, values):
+    return _bytes_field(field, b"".join(_varint(value) for value in values))
+
+
+def _encode_value(value):
+    if isinstance(value, bool):
+        return _varint_field(7, 1 if value else 0)
+    if isinstance(value, int) and value >= 0:
+        return _varint_field(5, value)
+    if isinstance(value, int):
+        return _varint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _key(3, _WIRE_64BIT) + struct.pack("<d", value)
+    return _bytes_field(1, str(value).encode("utf-8"))
+
+
+def _command(command_id, count):
+    return (command_id & 0x7) | (count << 3)
+
+
+def _signed_area(ring):
+    area = 0
+    for index in range(len(ring)):
+        x1, y1 = ring[index]
+        x2, y2 = ring[(index + 1) % len(ring)]
+        area += x1 * y2 - x2 * y1
+    return area
+
+
+def _quantize_ring(coords):
+    ring = []
+    for x, y in coords:
+        point = (int(round(x)), int(round(y)))
+        if not ring or ring[-1] != point:
+            ring.append(point)
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    return ring
+
+
+def encode_polygon_commands(polygons):
+    """Encode (exterior, interiors) rings already in tile coordinates.
+
+    Exterior rings are emitted with positive and interior rings with negative
+    surveyor's-formula area, as the spec requires; rings that collapse when
+    snapped to the integer grid are dropped.
+    """
+    commands = []
+    cursor = (0, 0)
+    for exterior, interiors in polygons:
+        rings = []
+        ring = _quantize_ring(exterior)
+        if len(ring) < 3 or _signed_area(ring) == 0:
+            continue
+        if _signed_area(ring) < 0:
+            ring.reverse()
+        rings.append(ring)
+        for interior in interiors:
+            hole = _quantize_ring(interior)
+            if len(hole) < 3 or _signed_area(hole) == 0:
+                continue
+            if _signed_area(hole) > 0:
+                hole.reverse()
+            rings.append(hole)
+
+        for ring in rings:
+            x, y = ring[0]
+            commands.append(_command(CMD_MOVE_TO, 1))
+            commands.extend((_zigzag(x - cursor[0]), _zigzag(y - cursor[1])))
+            cursor = (x, y)
+            commands.append(_command(CMD_LINE_TO, len(ring) - 1))
+            for x, y in ring[1:]:
+                commands.extend((_zigzag(x - cursor[0]), _zigzag(y - cursor[1])))
+                cursor = (x, y)
+            commands.append(_command(CMD_CLOSE_PATH, 1))
+    return commands
+
+
+def encode_layer(name, features, extent=DEFAULT_EXTENT):
+    """Encode one layer as a complete Tile message.
+
+    `features` is an iterable of dicts with `id`, `properties` and optional
+    `geometry` (a list of polygon commands from `encode_polygon_commands`).
+    Features without geometry are written as GEOM_UNKNOWN attribute records.
+    """
+    keys = {}
+    values = {}
+    encoded_features = []
+    for feature in features:
+        tags = []
+        for key, value in feature.get("properties", {}).items():
+            if value is None:
+                continue
+            key_index = keys.setdefault(key, len(keys))
+            value_key = (type(value).__name__, value)
+            value_index = values.setdefault(value_key, len(values))
+            tags.extend((key_index, value_index))
+
+        body = bytearray()
+        if feature.get("id") is not None:
+            body += _varint_field(1, feature["id"])
+        if tags:
+            body += _packed_field(2, tags)
+        geometry = feature.get("geometry")
+        if geometry:
+            body += _varint_field(3, GEOM_POLYGON)
+            body += _packed_field(4, geometry)
+        else:
+            body += _varint_field(3, GEOM_UNKNOWN)
+        encoded_features.append(bytes(body))
+
+    if not encoded_features:
+        return b""
+
+    layer = bytearray()
+    layer += _varint_field(15, 2)
+    layer += _bytes_field(1, name.encode("utf-8"))
+    for body in encoded_features:
+        layer += _bytes_field(2, body)
+    for key in keys:
+        layer += _bytes_field(3, key.encode("utf-8"))
+    for _, value in values:
+        layer += _bytes_field(4, _encode_value(value))
+    layer += _varint_field(5, extent)
+    return _bytes_field(3, bytes(layer))
@@ -0,0 +1,325 @@
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from .storage import ensure_dir, get_data_dir
+
+# Stage names used by the crawlers; merges use load/merge/diff/write.
+CRAWL_STAGES = ("fetch", "decode", "parse", "iso", "aggregate", "write")
+SAMPLE_INTERVAL = 0.005
+
+_local = threading.local()
+_request_local = threading.local()
+_tracing_lock = threading.Lock()
+_tracing_sessions = 0
+_started_tracing = False
+
+
+def _session():
+    return getattr(_local, "session", None)
+
+
+class StageTimer:
+    """Exclusive wall time and call count per stage name.
+
+    A nested stage (e.g. "iso" inside "parse") is not counted again in its
+    parent, so the stages of a run add up to its wall time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._stack = []
+
+    @contextmanager
+    def measure(self, name):
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += elapsed - frame[2]
+            entry["calls"] += 1
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+
+@contextmanager
+def stage(name):
+    """Attribute the time spent inside the block to `name`.
+
+    A no-op unless a ProfileSession is active on this thread.
+    """
+    session = _session()
+    if session is None:
+        yield
+        return
+    with session.timer.measure(name):
+        yield
+
+
+@contextmanager
+def timed(name):
+    """Add the block's time to the current request's Server-Timing `name`.
+
+    A no-op unless server_timing has started a timer on this thread, so the
+    data layer can call it from the CLI and merges too.
+    """
+    timer = request_timer()
+    if timer is None:
+        yield
+        return
+    with timer.measure(name):
+        yield
+
+
+def start_request_timer():
+    _request_local.timer = StageTimer()
+    return _request_local.timer
+
+
+def request_timer():
+    return getattr(_request_local, "timer", None)
+
+
+def stop_request_timer():
+    _request_local.timer = None
+
+
+def _frame_label(key):
+    filename, _, name = key
+    return f"{os.path.basename(filename)}:{name}"
+
+
+class StackSampler:
+    """Samples Python stacks into counts of (thread name, frames) pairs.
+
+    With `thread_id` only that thread is sampled; otherwise every thread
+    except the sampler itself and those in `exclude`. Frames are
+    (filename, first line, function) keys, outermost first.
+    """
+
+    def __init__(self, thread_id=None, interval=SAMPLE_INTERVAL, exclude=()):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.exclude = set(exclude)
+        self.counts = Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        started = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                targets, names = [(self.thread_id, frames.get(self.thread_id))], {}
+            else:
+                targets = frames.items()
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in targets:
+                if frame is None or ident == own or ident in self.exclude:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                self.counts[(names.get(ident), tuple(reversed(stack)))] += 1
+            self.samples += 1
+        self.elapsed = time.perf_counter() - started
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def run_for(self, seconds):
+        self.start()
+        try:
+            time.sleep(seconds)
+        finally:
+            self.stop()
+        return self
+
+    def collapsed(self):
+        # One "frame;frame;frame count" line per stack: the input format of
+        # flamegraph.pl, speedscope and inferno. Threads become root frames.
+        lines = Counter()
+        for (thread_name, stack), count in self.counts.items():
+            frames = [_frame_label(key) for key in stack]
+            if thread_name is not None:
+                frames.insert(0, f"thread:{thread_name}")
+            lines[";".join(frames)] += count
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(lines.items()))
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(self.collapsed())
+
+    def pstats_data(self):
+        """Marshalled stats in the cProfile dump format, for pstats/snakeviz.
+
+        Times are estimated from sample counts (each sample stands for the
+        measured time between samples); call counts are the number of
+        samples a function appeared in, not real calls.
+        """
+        tick = self.elapsed / self.samples if self.samples else self.interval
+        stats = {}
+        for (_, stack), count in self.counts.items():
+            seconds = count * tick
+            seen = set()
+            for depth, key in enumerate(stack):
+                entry = stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+                entry[0] += count
+                entry[1] += count
+                if key not in seen:  # recursion counts once towards cumulative time
+                    entry[3] += seconds
+                    seen.add(key)
+                if depth:
+                    caller = entry[4].setdefault(stack[depth - 1], [0, 0, 0.0, 0.0])
+                    caller[0] += count
+                    caller[1] += count
+                    caller[3] += seconds
+                    if depth == len(stack) - 1:
+                        caller[2] += seconds
+            if stack:
+                stats[stack[-1]][2] += seconds
+        return marshal.dumps(
+            {
+                key: (cc, nc, tt, ct, {caller: tuple(values) for caller, values in callers.items()})
+                for key, (cc, nc, tt, ct, callers) in stats.items()
+            }
+        )
+
+
+class ProfileSession:
+    """Per-stage timing and peak memory for one crawl or merge.
+
+    Peak memory comes from tracemalloc, which is process-wide: overlapping
+    sessions (parallel crawls in a refresh) share one peak, measured from
+    when the first of them started. Optionally dumps cProfile stats (.prof,
+    readable with pstats/snakeviz) and a sampled collapsed-stack file under
+    `output_dir` (default `data/profiles`).
+    """
+
+    def __init__(self, label, cprofile=False, collapsed=False, output_dir=None):
+        self.label = label
+        self.cprofile = cprofile
+        self.collapsed = collapsed
+        self.output_dir = output_dir
+        self.timer = StageTimer()
+        self.report = None
+        self._profiler = None
+        self._sampler = None
+
+    def __enter__(self):
+        global _tracing_sessions, _started_tracing
+        if _session() is not None:
+            raise RuntimeError("a profile session is already active on this thread")
+        with _tracing_lock:
+            if _tracing_sessions == 0:
+                _started_tracing = not tracemalloc.is_tracing()
+                if _started_tracing:
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+            _tracing_sessions += 1
+        if self.collapsed:
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+        if self.cprofile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        _local.session = self
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        global _tracing_sessions
+        wall = time.perf_counter() - self._started
+        _local.session = None
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        with _tracing_lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            _tracing_sessions -= 1
+            if _tracing_sessions == 0 and _started_tracing:
+                tracemalloc.stop()
+
+        stages = self.timer.stages
+        staged = sum(entry["seconds"] for entry in stages.values())
+        self.report = {
+            "label": self.label,
+            "wall_seconds": round(wall, 4),
+            "stages": {
+                name: {"seconds": round(entry["seconds"], 4), "calls": entry["calls"]}
+                for name, entry in stages.items()
+            },
+            "other_seconds": round(max(wall - staged, 0.0), 4),
+            "peak_memory_bytes": peak,
+            "files": self._write_files(),
+        }
+        if exc is not None:
+            self.report["error"] = str(exc)
+        return False
+
+    def _write_files(self):
+        if self._profiler is None and self._sampler is None:
+            return []
+        output_dir = self.output_dir or get_data_dir("profiles")
+        ensure_dir(output_dir)
+        stem = os.path.join(output_dir, f"{self.label}-{datetime.utcnow():%Y%m%dT%H%M%S}")
+        files = []
+        if self._profiler is not None:
+            self._profiler.dump_stats(stem + ".prof")
+            files.append(stem + ".prof")
+        if self._sampler is not None:
+            self._sampler.write(stem + ".collapsed")
+            files.append(stem + ".collapsed")
+        return files
+
+
+@contextmanager
+def maybe_profile(label, options):
+    """ProfileSession unless `options` is None/False; True or a dict enables it."""
+    if options is None or options is False:
+        yield None
+        return
+    options = options if isinstance(options, dict) else {}
+    session = ProfileSession(
+        label,
+        cprofile=bool(options.get("cprofile")),
+        collapsed=bool(options.get("collapsed")),
+        output_dir=options.get("output_dir"),
+    )
+    with session:
+        yield session
+
+
+def format_report(report):
+    lines = [
+        f"{report['label']}: {report['wall_seconds'] * 1000:.1f} ms, "
+        f"peak memory {report['peak_memory_bytes'] / 1048576:.1f} MiB"
+    ]
+    stages = sorted(report["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+    for name, entry in stages + [("(other)", {"seconds": report["other_seconds"], "calls": None})]:
+        calls = f"  x{entry['calls']}" if entry["calls"] else ""
+        lines.append(f"  {name:<10} {entry['seconds'] * 1000:9.1f} ms{calls}")
+    lines.extend(f"  wrote {path}" for path in report["files"])
+    return "\n".join(lines)
@@ -0,0 +1,338 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from dateutil import parser
+
+from ..crawler.registry import crawler_sources, get_crawler
+from .data_merger import merge_all_data
+from .events import job_events, publish_event
+from .file_lock import FileLock
+from .profiling import ProfileSession, maybe_profile
+from .storage import ensure_dir, get_data_dir
+
+# Sources crawled more recently than this are skipped unless forced.
+SOURCE_COOLDOWNS = {
+    "gdp": timedelta(hours=6),
+    "oil": timedelta(hours=1),
+    "agriculture": timedelta(hours=24),
+    "minerals": timedelta(hours=24),
+    "gold_reserves": timedelta(hours=1),
+}
+
+# Total wall-clock budget per crawler, in seconds. A crawler that overruns is
+# reported as timed out and the merge goes ahead without it; the crawl itself
+# runs on, holding the refresh lock, and a late success is recorded and merged.
+SOURCE_DEADLINES = {
+    "gdp": 120,
+    "oil": 60,
+    "agriculture": 180,
+    "minerals": 90,
+    "gold_reserves": 60,
+}
+
+# After this many consecutive failures a source is skipped for a while; the
+# pause doubles with every further failure up to BREAKER_MAX_OPEN.
+BREAKER_THRESHOLD = 3
+BREAKER_BASE_OPEN = timedelta(minutes=30)
+BREAKER_MAX_OPEN = timedelta(hours=6)
+
+
+def sources_for_scope(scope):
+    sources = crawler_sources()
+    if scope in sources:
+        return [scope]
+    return sources
+
+
+@contextmanager
+def _crawl_profile(source, profile):
+    """Profile one crawl with stage timings and, if asked, the sampler.
+
+    Crawls run in parallel threads and cProfile allows one active profiler
+    per process, so crawls never use it. A profiler that fails to start or
+    to write its files yields no report; it never fails the crawl.
+    """
+    if profile is None or profile is False:
+        yield None
+        return
+    options = profile if isinstance(profile, dict) else {}
+    session = ProfileSession(
+        f"crawl-{source}", collapsed=bool(options.get("collapsed")), output_dir=options.get("output_dir")
+    )
+    try:
+        session.__enter__()
+    except Exception:
+        yield None
+        return
+    try:
+        yield session
+    finally:
+        try:
+            session.__exit__(*sys.exc_info())
+        except Exception as exc:
+            session.report = {"label": session.label, "error": f"profiling failed: {exc}"}
+
+
+def _now():
+    return datetime.utcnow().replace(microsecond=0)
+
+
+class RefreshState:
+    """Per-source crawl bookkeeping in `data/refresh/state.json`.
+
+    Crawl threads and the coordinator update it concurrently, so every
+    read-modify-write happens under one lock and each save goes through its
+    own temporary file.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_data_dir("refresh", "state.json")
+        self._lock = threading.RLock()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def save(self, state):
+        directory = os.path.dirname(self.path)
+        ensure_dir(directory)
+        fd, tmp_path = tempfile.mkstemp(prefix="state.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(state, handle, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def update(self, source, **fields):
+        with self._lock:
+            state = self.load()
+            state.setdefault(source, {}).update(fields)
+            self.save(state)
+            return state[source]
+
+    def last_success(self, source):
+        value = self.load().get(source, {}).get("last_success")
+        return parser.parse(value.rstrip("Z")) if value else None
+
+    def breaker_open_until(self, source, now=None):
+        value = self.load().get(source, {}).get("open_until")
+        if not value:
+            return None
+        until = parser.parse(value.rstrip("Z"))
+        return until if until > (now or _now()) else None
+
+    def record_success(self, source):
+        now = _now().isoformat() + "Z"
+        return self.update(
+            source, status="ok", error=None, last_success=now, failures=0, open_until=None
+        )
+
+    def record_failure(self, source, status, error):
+        with self._lock:
+            failures = self.load().get(source, {}).get("failures", 0) + 1
+            open_until = None
+            if failures >= BREAKER_THRESHOLD:
+                pause = min(BREAKER_BASE_OPEN * 2 ** (failures - BREAKER_THRESHOLD), BREAKER_MAX_OPEN)
+                open_until = (_now() + pause).isoformat() + "Z"
+            return self.update(
+                source, status=status, error=error, failures=failures, open_until=open_until
+            )
+
+
+class _Flight:
+    def __init__(self, sources):
+        self.sources = set(sources)
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RefreshCoordinator:
+    """Single-flight crawl-and-merge runs with per-source cooldowns.
+
+    Within a process, a request whose sources overlap the running refresh
+    waits for it and reuses its result if nothing is left to crawl. Across
+    processes, the lock file serialises runs, and the state file (re-read
+    under the lock) lets a waiting process skip what another just crawled.
+
+    Due crawlers run in parallel, each under its SOURCE_DEADLINES budget.
+    A failing or overrunning source does not fail the refresh: the merge is
+    published from the fresh sources plus the last good snapshot of the
+    rest, and repeated failures open a circuit that skips the source until
+    `open_until` (one retry is let through after that). A timed-out crawl
+    keeps the lock until it ends, so its snapshot writes stay serialised.
+    """
+
+    def __init__(self, state=None, lock_path=None, cooldowns=None):
+        self.state = state or RefreshState()
+        self.lock_path = lock_path or get_data_dir("refresh", "refresh.lock")
+        self.cooldowns = cooldowns or SOURCE_COOLDOWNS
+        self._lock = threading.Lock()
+        self._flight = None
+        self._executor = ThreadPoolExecutor(max_workers=len(crawler_sources()), thread_name_prefix="crawl")
+
+    def due_sources(self, sources, force=False):
+        if force:
+            return list(sources)
+        now = _now()
+        due = []
+        for source in sources:
+            last = self.state.last_success(source)
+            if last is None or now - last >= self.cooldowns.get(source, timedelta(0)):
+                due.append(source)
+        return due
+
+    def run(self, scope="all", force=False, sources=None, profile=None):
+        """Crawl what is due and merge; `profile` (True or ProfileSession
+        options) adds per-stage timings for every crawl and the merge."""
+        sources = list(sources) if sources else sources_for_scope(scope)
+        attached = None
+        while True:
+            with self._lock:
+                flight = self._flight
+                if flight is None:
+                    if attached is not None and not self.due_sources(sources, force=False):
+                        # The run we waited for covered everything we needed.
+                        return dict(attached, coalesced=True)
+                    flight = self._flight = _Flight(sources)
+                    break
+            flight.done.wait()
+            if flight.error is not None and flight.sources & set(sources):
+                raise flight.error
+            attached = flight.result or attached
+
+        try:
+            flight.result = self._run_locked(sources, force, profile)
+            return flight.result
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flight = None
+            flight.done.set()
+
+    def _crawl(self, source, profile, reports):
+        self.state.update(source, last_attempt=_now().isoformat() + "Z")
+        session = None
+        try:
+            with job_events("crawl", source=source), _crawl_profile(source, profile) as session:
+                get_crawler(source)()
+        finally:
+            if session is not None:
+                reports[source] = session.report
+
+    def _settle_late(self, lock, late):
+        """Wait for crawls that overran their budget, then release the lock.
+
+        A late success is recorded and merged; a late failure was already
+        counted as the timeout.
+        """
+        try:
+            status = {}
+            for source, future in late.items():
+                try:
+                    future.result()
+                except Exception as exc:
+                    self.state.update(source, error=str(exc))
+                else:
+                    self.state.record_success(source)
+                    publish_event("crawl", {"source": source, "status": "ok", "late": True})
+                    status[source] = {"status": "ok"}
+            if status:
+                merge_all_data(source_status=status)
+        finally:
+            lock.release()
+
+    def _run_locked(self, sources, force, profile=None):
+        lock = FileLock(self.lock_path).acquire()
+        late = {}
+        try:
+            # Re-check under the lock: another process may have just crawled.
+            due = self.due_sources(sources, force)
+            status = {source: {"status": "cooldown"} for source in sources if source not in due}
+            futures = {}
+            reports = {}
+            for source in due:
+                open_until = self.state.breaker_open_until(source)
+                if open_until is not None and not force:
+                    status[source] = {"status": "circuit_open", "retry_after": open_until.isoformat() + "Z"}
+                else:
+                    futures[source] = self._executor.submit(self._crawl, source, profile, reports)
+
+            started = time.monotonic()
+            for source, future in futures.items():
+                budget = SOURCE_DEADLINES.get(source, 60)
+                try:
+                    future.result(timeout=max(0.0, budget - (time.monotonic() - started)))
+                except FutureTimeout:
+                    late[source] = future
+                    error = f"no result within {budget}s"
+                    self.state.record_failure(source, "timeout", error)
+                    publish_event("crawl", {"source": source, "status": "timeout", "error": error})
+                    status[source] = {"status": "timeout", "error": error}
+                except Exception as exc:
+                    self.state.record_failure(source, "failed", str(exc))
+                    status[source] = {"status": "failed", "error": str(exc)}
+                else:
+                    self.state.record_success(source)
+                    status[source] = {"status": "ok"}
+
+            status = {source: status[source] for source in sources}
+            # Publish whatever succeeded; the others keep their last good snapshot.
+            merged = None
+            merge_profile = None
+            # Only a fresh source makes a new version worth publishing.
+            if any(entry["status"] == "ok" for entry in status.values()):
+                with maybe_profile("merge", profile) as session:
+                    merged = merge_all_data(source_status=status)
+                merge_profile = session.report if session is not None else None
+            # After the merge, so timings stay out of the published metadata.
+            for source, report in list(reports.items()):
+                status[source]["profile"] = report
+        finally:
+            if late:
+                # The overrunning crawls still write snapshots; they keep the lock.
+                threading.Thread(
+                    target=self._settle_late, args=(lock, late), name="crawl-late", daemon=True
+                ).start()
+            else:
+                lock.release()
+        crawled = [source for source in sources if status[source]["status"] == "ok"]
+        metadata = (merged or {}).get("metadata", {})
+        return {
+            "crawled": crawled,
+            "skipped": [source for source in sources if source not in crawled],
+            "sources": status,
+            "partial": any(entry["status"] in ("failed", "timeout") for entry in status.values()),
+            "merged": merged is not None,
+            "generated_at": metadata.get("generated_at"),
+            "last_crawl": metadata.get("last_crawl"),
+            "coalesced": False,
+            "profile": merge_profile,
+        }
+
+
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+def get_refresh_coordinator():
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            _coordinator = RefreshCoordinator()
+        return _coordinator
@@ -0,0 +1,180 @@
+import calendar
+import json
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+from dateutil import parser
+
+from .lag_checker import check_data_freshness
+from .refresh import get_refresh_coordinator
+from .snapshot_store import RAW_SOURCES, load_raw
+from .storage import ensure_dir, get_data_dir
+
+# How often each source is re-evaluated, and how long after the end of its
+# newest period the next release is expected (the lag_checker threshold).
+SOURCE_CADENCES = {
+    "gdp": {"release": "annual", "check_every": timedelta(days=7), "max_lag_days": 210},
+    "oil": {"release": "monthly", "check_every": timedelta(hours=12), "max_lag_days": 60},
+    "agriculture": {"release": "annual", "check_every": timedelta(days=7), "max_lag_days": 400},
+    "minerals": {"release": "annual", "check_every": timedelta(days=7), "max_lag_days": 400},
+    "gold_reserves": {"release": "monthly", "check_every": timedelta(hours=12), "max_lag_days": 60},
+}
+
+# Random delay added to every next check, as a fraction of the interval, so
+# several deployments don't hit the same upstream at the same moment.
+JITTER_FRACTION = 0.1
+MAX_JITTER = timedelta(hours=1)
+
+
+def _period_end(year, month=None):
+    if month is None:
+        return datetime(year, 12, 31)
+    return datetime(year, month, calendar.monthrange(year, month)[1])
+
+
+def _periods(node):
+    if isinstance(node, dict):
+        year = node.get("year")
+        if isinstance(year, int):
+            month = node.get("month")
+            yield (year, month if isinstance(month, int) and 1 <= month <= 12 else None)
+        for value in node.values():
+            yield from _periods(value)
+
+
+def latest_data_date(payload):
+    """End date of the newest period in a raw payload, or its crawl time."""
+    if not payload:
+        return None
+    latest_month = payload.get("latest_month")
+    if isinstance(latest_month, str) and len(latest_month) == 7:
+        return _period_end(int(latest_month[:4]), int(latest_month[5:]))
+    periods = list(_periods(payload))
+    if periods:
+        year, month = max(periods, key=lambda period: (period[0], period[1] or 12))
+        return _period_end(year, month)
+    if payload.get("last_updated"):
+        return parser.parse(payload["last_updated"].rstrip("Z"))
+    return None
+
+
+def _timestamp(value):
+    return value.replace(microsecond=0).isoformat() + "Z"
+
+
+class CrawlScheduler:
+    """Decides which sources are due and crawls only those.
+
+    A source is checked at most once per `check_every` (plus jitter). When
+    checked, it is crawled only if `check_data_freshness` says its newest
+    period is older than the expected release lag. Run state lives in
+    `data/refresh/schedule.json` so restarts keep the cadence.
+    """
+
+    def __init__(self, state_path=None, cadences=None, coordinator=None, rng=None):
+        self.state_path = state_path or get_data_dir("refresh", "schedule.json")
+        self.cadences = cadences or SOURCE_CADENCES
+        self.coordinator = coordinator or get_refresh_coordinator()
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def save_state(self, state):
+        ensure_dir(os.path.dirname(self.state_path))
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(state, handle, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _jitter(self, interval):
+        limit = min(interval * JITTER_FRACTION, MAX_JITTER)
+        return timedelta(seconds=self.rng.uniform(0, limit.total_seconds()))
+
+    def evaluate(self, source, now=None, force_check=False):
+        """Return (due, reason) for one source, without crawling."""
+        now = now or datetime.utcnow()
+        entry = self.load_state().get(source, {})
+        next_check = entry.get("next_check")
+        if not force_check and next_check and parser.parse(next_check.rstrip("Z")) > now:
+            return False, f"next check at {next_check}"
+        data_date = latest_data_date(load_raw(source))
+        if data_date is None:
+            return True, "no data yet"
+        lag_note = check_data_freshness(
+            data_date, current_date=now, max_lag_days=self.cadences[source]["max_lag_days"]
+        )
+        if lag_note:
+            return True, f"new release expected ({lag_note})"
+        return False, f"fresh through {data_date:%Y-%m-%d}"
+
+    def tick(self, sources=None, now=None, dry_run=False, force_check=False):
+        """Check the given sources once, crawl those that are due, persist state."""
+        now = now or datetime.utcnow()
+        sources = sources or [source for source in RAW_SOURCES if source in self.cadences]
+        with self._lock:
+            decisions = {source: self.evaluate(source, now, force_check) for source in sources}
+            if dry_run:
+                return decisions
+            due = [source for source, (is_due, _) in decisions.items() if is_due]
+            checked = [
+                source
+                for source, (is_due, reason) in decisions.items()
+                if is_due or not reason.startswith("next check")
+            ]
+
+            result = None
+            error = None
+            if due:
+                try:
+                    result = self.coordinator.run(sources=due)
+                except Exception as exc:
+                    # Leave the failure in state; the next check retries it.
+                    error = str(exc)
+
+            state = self.load_state()
+            for source in checked:
+                interval = self.cadences[source]["check_every"]
+                entry = state.setdefault(source, {})
+                entry["last_check"] = _timestamp(now)
+                entry["next_check"] = _timestamp(now + interval + self._jitter(interval))
+                entry["reason"] = decisions[source][1]
+                if source in due:
+                    outcome = (result or {}).get("sources", {}).get(source, {})
+                    crawled = outcome.get("status") == "ok"
+                    if crawled:
+                        entry["last_result"] = "crawled"
+                    elif error or outcome.get("error"):
+                        entry["last_result"] = outcome.get("status", "failed")
+                    else:
+                        entry["last_result"] = "skipped"
+                    entry["error"] = error or outcome.get("error")
+                    if crawled:
+                        entry["last_crawl"] = _timestamp(now)
+                data_date = latest_data_date(load_raw(source))
+                entry["data_through"] = data_date.strftime("%Y-%m-%d") if data_date else None
+            self.save_state(state)
+            return decisions
+
+    def run_forever(self, tick_minutes=10):
+        from apscheduler.schedulers.blocking import BlockingScheduler
+
+        scheduler = BlockingScheduler(timezone="UTC")
+        # Per-source timing lives in the persisted next_check; the job just
+        # wakes up regularly and crawls whatever has come due.
+        scheduler.add_job(
+            self.tick,
+            "interval",
+            minutes=tick_minutes,
+            jitter=int(tick_minutes * 60 * JITTER_FRACTION),
+            next_run_time=datetime.utcnow(),
+            max_instances=1,
+            coalesce=True,
+        )
+        scheduler.start()
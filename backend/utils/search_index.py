@@ -0,0 +1,292 @@
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+import pycountry
+
+from .country_codes import SPECIAL_CASES
+from .derived_metrics import default_geojson_path, feature_iso
+from .lru_cache import LRUCache
+from .storage import get_repo_root, read_json
+
+# Base score per kind of match; the field weight is subtracted from it.
+EXACT_SCORE = 1000
+PREFIX_SCORE = 600
+WORD_PREFIX_SCORE = 400
+FUZZY_SCORE = 200
+MIN_FUZZY_SIMILARITY = 0.5
+
+# Searchable fields, best first: (field, weight).
+FIELD_WEIGHTS = {
+    "iso3": 0,
+    "iso2": 5,
+    "name": 10,
+    "name_zh": 10,
+    "alias": 30,
+    "capital": 50,
+    "capital_zh": 50,
+}
+
+# Short Chinese names the map UI shows (frontend COUNTRY_NAMES_ZH) where the
+# GeoJSON NAME_ZH is the formal name or missing.
+ALIASES_ZH = {
+    "ARE": ("阿联酋",),
+    "BIH": ("波黑",),
+    "CHN": ("中国",),
+    "COD": ("刚果（金）",),
+    "COG": ("刚果（布）",),
+    "GUF": ("法属圭亚那",),
+    "HKG": ("中国香港",),
+    "KOR": ("韩国",),
+    "MAC": ("中国澳门",),
+    "REU": ("留尼汪",),
+    "TWN": ("中国台湾", "台湾"),
+    "XKX": ("科索沃",),
+}
+# Populated places use Natural Earth's ADM0_A3 even where the map features
+# and the data use another code. Somaliland's capital is skipped, as on the
+# map, where Somaliland is merged into Somalia.
+PLACE_CODES = {"KOS": "XKX"}
+SKIPPED_PLACE_CODES = ("SOL",)
+# Codes are matched exactly or by prefix only; bigrams of two-letter codes
+# would fuzzy-match almost anything.
+CODE_FIELDS = ("iso2", "iso3")
+
+_SEPARATORS = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize(text):
+    """Casefold, strip accents and collapse punctuation to single spaces."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _SEPARATORS.sub(" ", text.casefold()).strip()
+
+
+def _grams(text):
+    # Padded bigrams: short codes and 2-4 character Chinese names still get
+    # several grams each.
+    padded = f" {text} "
+    return {padded[index:index + 2] for index in range(len(padded) - 1)}
+
+
+def default_places_path():
+    return os.path.join(get_repo_root(), "static", "geojson", "populated_places_50m.geojson")
+
+
+def _geo_entries(geojson_path, places_path):
+    """Names and codes from the map GeoJSON, capitals from populated places."""
+    countries = {}
+    by_adm0 = {}
+    if os.path.exists(geojson_path):
+        for feature in read_json(geojson_path).get("features", []):
+            props = feature.get("properties") or {}
+            iso = feature_iso(props)
+            if not iso:
+                continue
+            by_adm0[props.get("ADM0_A3")] = iso
+            info = countries.setdefault(iso, {"aliases": []})
+            info.setdefault("name", props.get("NAME"))
+            info.setdefault("name_zh", props.get("NAME_ZH"))
+            iso2 = props.get("ISO_A2")
+            if not iso2 or iso2 == "-99":
+                iso2 = props.get("ISO_A2_EH") if props.get("ISO_A3_EH") == iso else None
+            if iso2 and iso2 != "-99":
+                info.setdefault("iso2", iso2)
+            for key in ("NAME_LONG", "NAME_EN", "FORMAL_EN", "NAME_ZHT"):
+                if props.get(key):
+                    info["aliases"].append(props[key])
+    if os.path.exists(places_path):
+        for feature in read_json(places_path).get("features", []):
+            props = feature.get("properties") or {}
+            if props.get("ADM0CAP") != 1:
+                continue
+            adm0 = props.get("ADM0_A3")
+            if adm0 in SKIPPED_PLACE_CODES:
+                continue
+            iso = by_adm0.get(adm0) or PLACE_CODES.get(adm0, adm0)
+            info = countries.setdefault(iso, {"aliases": []})
+            info.setdefault("capitals", []).append((props.get("NAME"), props.get("NAME_ZH")))
+            if props.get("ADM0NAME"):
+                info.setdefault("place_country", props["ADM0NAME"])
+    return countries
+
+
+_geo_cache = {}
+_geo_lock = threading.Lock()
+
+
+def load_geo_entries(geojson_path, places_path):
+    stamp = tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in (geojson_path, places_path))
+    key = (geojson_path, places_path)
+    with _geo_lock:
+        cached = _geo_cache.get(key)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, _geo_entries(geojson_path, places_path))
+            _geo_cache[key] = cached
+        return cached[1]
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = set()
+
+
+class SearchIndex:
+    """Prefix trie plus bigram index over country names, codes and capitals.
+
+    Every searchable string is normalized once; the trie holds the whole
+    string and each of its words, so "kor" finds "South Korea" and "首尔"
+    finds Seoul's country. Bigrams catch typos and infixes. Built once per
+    data version; queries touch only the postings for the query's grams.
+
+    Display names fall back from the map to the places file and pycountry;
+    codes with no name anywhere (aggregates like CHI) are not indexed, so
+    type-ahead never shows a blank row.
+    """
+
+    def __init__(self, countries, geo=None):
+        geo = geo or {}
+        self.countries = {}
+        self.entries = []  # (iso, field, text, normalized)
+        self._trie = _TrieNode()
+        self._exact = defaultdict(set)
+        self._grams = defaultdict(set)
+        self._gram_counts = []
+        self._results = LRUCache(1024)
+
+        aliases = defaultdict(list)
+        for name, iso in SPECIAL_CASES.items():
+            aliases[iso].append(name)
+        for iso, names in ALIASES_ZH.items():
+            aliases[iso].extend(names)
+
+        for iso in sorted(set(countries) | set(geo)):
+            merged = countries.get(iso) or {}
+            info = geo.get(iso) or {}
+            capitals = info.get("capitals") or []
+            country = pycountry.countries.get(alpha_3=iso)
+            name = (
+                merged.get("name")
+                or info.get("name")
+                or info.get("place_country")
+                or (getattr(country, "common_name", None) or country.name if country else None)
+            )
+            if not name:
+                continue
+            record = {
+                "code": iso,
+                "name": name,
+                "name_zh": merged.get("name_zh") or info.get("name_zh") or next(iter(ALIASES_ZH.get(iso, ())), None),
+                "capital": merged.get("capital") or (capitals[0][0] if capitals else None),
+                "has_data": iso in countries,
+            }
+            self.countries[iso] = record
+            fields = [
+                ("iso3", iso),
+                ("iso2", info.get("iso2") or (country.alpha_2 if country else None)),
+                ("name", record["name"]),
+                ("name_zh", record["name_zh"]),
+                ("capital", record["capital"]),
+            ]
+            fields += [("capital", name) for name, _ in capitals] + [("capital_zh", zh) for _, zh in capitals]
+            names = list(info.get("aliases") or []) + aliases.get(iso, [])
+            if country is not None:
+                names += [getattr(country, key, None) for key in ("name", "official_name", "common_name")]
+            fields += [("alias", name) for name in names]
+            seen = set()
+            for field, text in fields:
+                normalized = normalize(text) if text else ""
+                if normalized and normalized not in seen:
+                    seen.add(normalized)
+                    self._add(iso, field, str(text), normalized)
+
+    def _add(self, iso, field, text, normalized):
+        entry_id = len(self.entries)
+        self.entries.append((iso, field, text, normalized))
+        self._exact[normalized].add(entry_id)
+        words = normalized.split(" ")
+        for position in range(len(words)):
+            # The full string from each word on, so multi-word prefixes match too.
+            self._insert(" ".join(words[position:]), entry_id)
+        grams = set() if field in CODE_FIELDS else _grams(normalized)
+        self._gram_counts.append(len(grams))
+        for gram in grams:
+            self._grams[gram].add(entry_id)
+
+    def _insert(self, term, entry_id):
+        node = self._trie
+        for char in term:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.add(entry_id)
+
+    def _prefix(self, term):
+        node = self._trie
+        for char in term:
+            node = node.children.get(char)
+            if node is None:
+                return ()
+        return node.ids
+
+    def search(self, query, limit=10):
+        """Ranked [{code, name, name_zh, capital, has_data, match, field, score}]."""
+        normalized = normalize(query)
+        if not normalized:
+            return []
+        key = (normalized, limit)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
+        best = {}
+
+        def offer(entry_id, base):
+            iso, field, _, _ = self.entries[entry_id]
+            score = base - FIELD_WEIGHTS[field]
+            if iso not in best or score > best[iso][0]:
+                best[iso] = (score, entry_id)
+
+        for entry_id in self._exact.get(normalized, ()):
+            offer(entry_id, EXACT_SCORE)
+        for entry_id in self._prefix(normalized):
+            starts = self.entries[entry_id][3].startswith(normalized)
+            offer(entry_id, PREFIX_SCORE if starts else WORD_PREFIX_SCORE)
+
+        if len(best) < limit:
+            grams = _grams(normalized)
+            overlap = defaultdict(int)
+            for gram in grams:
+                for entry_id in self._grams.get(gram, ()):
+                    overlap[entry_id] += 1
+            for entry_id, shared in overlap.items():
+                similarity = 2 * shared / (len(grams) + self._gram_counts[entry_id])
+                if similarity >= MIN_FUZZY_SIMILARITY:
+                    offer(entry_id, FUZZY_SCORE * similarity)
+
+        ranked = sorted(
+            best.items(),
+            key=lambda item: (-item[1][0], len(self.entries[item[1][1]][3]), item[0]),
+        )[:limit]
+        results = []
+        for iso, (score, entry_id) in ranked:
+            _, field, text, _ = self.entries[entry_id]
+            results.append(dict(self.countries[iso], match=text, field=field, score=round(score, 1)))
+        self._results.put(key, results)
+        return results
+
+
+# Indexes per data version.
+_indexes = LRUCache(4)
+
+
+def get_search_index(key, load_countries, geojson_path=None, places_path=None):
+    index = _indexes.get(key)
+    if index is None:
+        geo = load_geo_entries(geojson_path or default_geojson_path(), places_path or default_places_path())
+        index = SearchIndex(load_countries(), geo)
+        _indexes.put(key, index)
+    return index
@@ -0,0 +1,217 @@
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from .file_lock import FileLock
+from .profiling import stage
+from .storage import ensure_dir, get_data_dir, read_json
+
+# Annual periods are stored as YYYY, monthly periods as YYYYMM.
+FREQ_ANNUAL = "A"
+FREQ_MONTHLY = "M"
+
+META_NAME = "meta.json"
+
+
+def parse_period(value, freq, end=False):
+    """Parse "2020" or "2020-05" into the integer period key for `freq`."""
+    if value is None or value == "":
+        return None
+    text = str(value).strip()
+    parts = text.split("-")
+    if len(parts) > 2 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Invalid period: {value}")
+    year = int(parts[0])
+    month = int(parts[1]) if len(parts) == 2 else None
+    if month is not None and not 1 <= month <= 12:
+        raise ValueError(f"Invalid period: {value}")
+    if freq == FREQ_ANNUAL:
+        return year
+    if month is None:
+        month = 12 if end else 1
+    return year * 100 + month
+
+
+def format_period(period, freq):
+    period = int(period)
+    if freq == FREQ_MONTHLY:
+        return f"{period // 100}-{period % 100:02d}"
+    return str(period)
+
+
+class SeriesStore:
+    """Columnar multi-year series, one directory of .npy arrays per metric.
+
+    Each metric keeps `codes` (ISO3, sorted), `periods` (sorted ints) and a
+    `values` matrix of shape (codes, periods) with NaN for gaps. Writers build
+    a new generation directory and then swap `meta.json`; readers memory-map
+    the arrays of the generation named there, so a query only pages in the
+    rows and columns it slices.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or get_data_dir("series")
+        self._lock = threading.Lock()
+        self._open = {}
+
+    def _metric_dir(self, metric):
+        if not metric or not metric.replace("_", "").isalnum():
+            raise KeyError(metric)
+        return os.path.join(self.root, metric)
+
+    def metrics(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, META_NAME))
+        )
+
+    def meta(self, metric):
+        path = os.path.join(self._metric_dir(metric), META_NAME)
+        if not os.path.exists(path):
+            return None
+        return read_json(path)
+
+    def _arrays(self, metric):
+        meta = self.meta(metric)
+        if meta is None:
+            return None, None
+        generation = meta["generation"]
+        with self._lock:
+            cached = self._open.get(metric)
+            if cached and cached[0] == generation:
+                return meta, cached[1]
+            gen_dir = os.path.join(self._metric_dir(metric), generation)
+            codes = np.load(os.path.join(gen_dir, "codes.npy"))
+            arrays = {
+                "codes": codes,
+                "code_index": {str(code): row for row, code in enumerate(codes)},
+                "periods": np.load(os.path.join(gen_dir, "periods.npy")),
+                "values": np.load(os.path.join(gen_dir, "values.npy"), mmap_mode="r"),
+            }
+            self._open[metric] = (generation, arrays)
+            return meta, arrays
+
+    def write(self, metric, codes, periods, values, freq, unit=None, source=None):
+        """Upsert long-format observations (parallel code/period/value arrays).
+
+        Crawls run in parallel threads and processes, so the read-merge-swap
+        of one metric holds a file lock.
+        """
+        metric_dir = self._metric_dir(metric)
+        with FileLock(os.path.join(metric_dir, META_NAME + ".lock")):
+            return self._write(metric, codes, periods, values, freq, unit, source)
+
+    def _write(self, metric, codes, periods, values, freq, unit, source):
+        codes = np.asarray(codes).astype(str)
+        periods = np.asarray(periods, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        keep = ~np.isnan(values)
+        codes, periods, values = codes[keep], periods[keep], values[keep]
+
+        meta, arrays = self._arrays(metric)
+        if meta is not None and meta.get("freq") != freq:
+            raise ValueError(f"{metric} is stored with freq {meta.get('freq')}, not {freq}")
+
+        old_codes = arrays["codes"].astype(str) if arrays else np.array([], dtype=str)
+        old_periods = arrays["periods"] if arrays else np.array([], dtype=np.int64)
+        all_codes = np.union1d(old_codes, codes)
+        all_periods = np.union1d(old_periods, periods).astype(np.int64)
+
+        matrix = np.full((len(all_codes), len(all_periods)), np.nan)
+        if arrays and len(old_codes) and len(old_periods):
+            rows = np.searchsorted(all_codes, old_codes)
+            cols = np.searchsorted(all_periods, old_periods)
+            matrix[np.ix_(rows, cols)] = np.asarray(arrays["values"])
+        matrix[np.searchsorted(all_codes, codes), np.searchsorted(all_periods, periods)] = values
+
+        metric_dir = self._metric_dir(metric)
+        generation = f"g{(meta['seq'] + 1) if meta else 1:06d}"
+        gen_dir = os.path.join(metric_dir, generation)
+        ensure_dir(gen_dir)
+        np.save(os.path.join(gen_dir, "codes.npy"), all_codes)
+        np.save(os.path.join(gen_dir, "periods.npy"), all_periods)
+        np.save(os.path.join(gen_dir, "values.npy"), matrix)
+
+        new_meta = {
+            "metric": metric,
+            "freq": freq,
+            "unit": unit if unit is not None else (meta or {}).get("unit"),
+            "source": source if source is not None else (meta or {}).get("source"),
+            "seq": (meta["seq"] + 1) if meta else 1,
+            "generation": generation,
+            "countries": int(len(all_codes)),
+            "periods": int(len(all_periods)),
+            "first_period": format_period(all_periods[0], freq) if len(all_periods) else None,
+            "last_period": format_period(all_periods[-1], freq) if len(all_periods) else None,
+        }
+        tmp_path = os.path.join(metric_dir, META_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(new_meta, handle, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(metric_dir, META_NAME))
+
+        # Keep the previous generation for readers that still have it mapped.
+        for name in os.listdir(metric_dir):
+            if name.startswith("g") and name not in (generation, (meta or {}).get("generation")):
+                shutil.rmtree(os.path.join(metric_dir, name), ignore_errors=True)
+        return new_meta
+
+    def read(self, metric, codes=None, start=None, end=None):
+        """Slice a metric by ISO codes and an inclusive period range.
+
+        `start`/`end` are strings such as "2000" or "2020-05". Returns None if
+        the metric is unknown, otherwise the period labels and one list of
+        values (None for gaps) per requested code present in the store.
+        """
+        meta, arrays = self._arrays(metric)
+        if meta is None:
+            return None
+        freq = meta["freq"]
+        periods = arrays["periods"]
+        lo = 0 if not start else int(np.searchsorted(periods, parse_period(start, freq), "left"))
+        hi = len(periods) if not end else int(
+            np.searchsorted(periods, parse_period(end, freq, end=True), "right")
+        )
+
+        if codes is None:
+            rows = list(enumerate(arrays["codes"].astype(str).tolist()))
+        else:
+            index = arrays["code_index"]
+            rows = [(index[code], code) for code in codes if code in index]
+
+        values = arrays["values"]
+        series = {}
+        for row, code in rows:
+            chunk = np.asarray(values[row, lo:hi])
+            series[code] = [None if np.isnan(value) else float(value) for value in chunk]
+
+        return {
+            "metric": metric,
+            "freq": freq,
+            "unit": meta.get("unit"),
+            "source": meta.get("source"),
+            "periods": [format_period(period, freq) for period in periods[lo:hi]],
+            "series": series,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_series_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SeriesStore()
+        return _store
+
+
+def write_series(metric, codes, periods, values, freq, unit=None, source=None):
+    with stage("write"):
+        return get_series_store().write(metric, codes, periods, values, freq, unit=unit, source=source)
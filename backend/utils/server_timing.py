@@ -0,0 +1,54 @@
+import time
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+from .profiling import request_timer, start_request_timer, stop_request_timer, timed
+
+# Phases reported for every /api/* response, in header order.
+TIMING_PHASES = ("load", "lookup", "serialize", "compress")
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with encoding counted as "serialize"."""
+
+    def dumps(self, obj, **kwargs):
+        with timed("serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+def _begin():
+    start_request_timer()
+
+
+def _add_header(response):
+    timer = request_timer()
+    if timer is None or not request.path.startswith("/api/"):
+        return response
+    total = time.perf_counter() - timer.started
+    metrics = [
+        f"{name};dur={timer.stages[name]['seconds'] * 1000:.2f}"
+        for name in TIMING_PHASES
+        if name in timer.stages
+    ]
+    metrics.append(f"total;dur={total * 1000:.2f}")
+    response.headers["Server-Timing"] = ", ".join(metrics)
+    # Lets cross-origin pages read the timings through the Resource Timing API.
+    response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+
+def _end(_exc=None):
+    stop_request_timer()
+
+
+def init_server_timing(app):
+    """Emit Server-Timing (load, lookup, serialize, compress, total) on /api/*.
+
+    Register before init_compression: after_request hooks run in reverse
+    order, so this one runs last and includes the compression time.
+    """
+    app.json = TimedJSONProvider(app)
+    app.before_request(_begin)
+    app.after_request(_add_header)
+    app.teardown_request(_end)
@@ -0,0 +1,313 @@
+import math
+
+import numpy as np
+
+from .lru_cache import LRUCache
+
+# Simulated resource -> (merged metric, field); a by_category field is summed.
+RESOURCES = {
+    "oil": ("oil_production", "value"),
+    "grain": ("grain_production", "total"),
+    "metals": ("nonferrous_metals", "by_category"),
+    "gold": ("gold_production", "value"),
+}
+GROWTH_KEYS = tuple(RESOURCES) + ("gdp",)
+
+MAX_TICKS = 1000
+MAX_SCENARIOS = 256
+# Shocks and embargoes each take a (resource x country) array, so both are
+# capped per scenario and per request.
+MAX_EVENTS_PER_SCENARIO = 16
+MAX_EVENTS = 512
+# Per-tick growth rates lie in (-1, MAX_GROWTH_RATE] and shock factors in
+# [0, MAX_SHOCK_FACTOR]; production and GDP stop at MAX_GROWTH_MULTIPLE
+# times their baseline so long runs stay finite.
+MAX_GROWTH_RATE = 1.0
+MAX_SHOCK_FACTOR = 10.0
+MAX_GROWTH_MULTIPLE = 1e6
+
+# Price rules from game/dev_md/market_system.md, with prices relative to the
+# baseline (1.0): oversupply lowers the price, shortage raises it.
+PRICE_ELASTICITY = 0.25
+MAX_PRICE_STEP = 0.2
+PRICE_FLOOR = 0.1
+PRICE_CEILING = 10.0
+# How much output responds to the current price (output * price ** k).
+SUPPLY_ELASTICITY = 0.1
+DEFAULT_INTEGRATION = 0.5
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Baseline:
+    """Merged metrics as arrays: production (resources x countries) and GDP.
+
+    Countries are the last, contiguous axis in ISO order, so the per-tick
+    sums over countries read memory sequentially. There is no consumption data, so each
+    resource's world output is split by GDP share as the baseline demand;
+    the baseline market clears at price 1.
+    """
+
+    def __init__(self, countries):
+        self.codes = sorted(countries)
+        self.index = {iso: row for row, iso in enumerate(self.codes)}
+        self.production = np.zeros((len(RESOURCES), len(self.codes)))
+        self.gdp = np.zeros(len(self.codes))
+        for row, iso in enumerate(self.codes):
+            country = countries[iso]
+            for column, (metric, field) in enumerate(RESOURCES.values()):
+                entry = country.get(metric)
+                value = entry.get(field) if isinstance(entry, dict) else None
+                if isinstance(value, dict):
+                    value = sum(amount for amount in value.values() if _number(amount))
+                if _number(value):
+                    self.production[column, row] = value
+            entry = country.get("gdp")
+            value = entry.get("value") if isinstance(entry, dict) else None
+            if _number(value) and value > 0:
+                self.gdp[row] = value
+        gdp_share = self.gdp / self.gdp.sum() if self.gdp.sum() else self.gdp
+        self.demand = self.production.sum(axis=1)[:, None] * gdp_share[None, :]
+
+
+def _window(spec, ticks, label):
+    start = spec.get("start", 0)
+    end = spec.get("end", ticks)
+    if not (isinstance(start, int) and isinstance(end, int)) or not 0 <= start <= end:
+        raise ValueError(f"{label}: start and end must be integers with 0 <= start <= end")
+    return start, end
+
+
+class Scenarios:
+    """A batch of scenario specs compiled into arrays over (scenario, resource, country).
+
+    Each spec may set:
+      "growth":      {"gdp": 0.02, "oil": {"*": 0.01, "SAU": -0.05}, ...} per tick
+      "shocks":      [{"resource": "oil", "countries": [...], "factor": 0.5, "start": 0, "end": 5}]
+      "embargoes":   [{"resource": "grain", "exporters": [...], "importers": [...], "start": 0, "end": 5}]
+      "integration": 0..1, damps price moves (default 0.5)
+    Omitted country lists mean every country; omitted importers mean everyone
+    but the exporters. Bad specs raise ValueError.
+    """
+
+    def __init__(self, baseline, specs, ticks):
+        self.baseline = baseline
+        self.ticks = ticks
+        self.names = []
+        count, countries, resources = len(specs), len(baseline.codes), len(RESOURCES)
+        self.growth = np.zeros((count, len(GROWTH_KEYS), countries))
+        self.integration = np.full(count, DEFAULT_INTEGRATION)
+        shocks, embargoes = [], []
+        for position, spec in enumerate(specs):
+            if not isinstance(spec, dict):
+                raise ValueError(f"scenario {position}: must be an object")
+            label = spec.get("name") or f"scenario-{position}"
+            self.names.append(str(label))
+            self._growth(position, spec.get("growth") or {}, label)
+            integration = spec.get("integration", DEFAULT_INTEGRATION)
+            if not _number(integration) or not 0 <= integration <= 1:
+                raise ValueError(f"{label}: integration must be between 0 and 1")
+            self.integration[position] = integration
+            for key, target in (("shocks", shocks), ("embargoes", embargoes)):
+                entries = spec.get(key) or []
+                if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+                    raise ValueError(f"{label}: {key} must be a list of objects")
+                if len(entries) > MAX_EVENTS_PER_SCENARIO:
+                    raise ValueError(f"{label}: at most {MAX_EVENTS_PER_SCENARIO} {key} per scenario")
+                target.extend((position, entry, label) for entry in entries)
+                if len(target) > MAX_EVENTS:
+                    raise ValueError(f"at most {MAX_EVENTS} {key} per request")
+
+        # Shock k multiplies output by shock_factor[k] while start <= t < end.
+        self.shock_scenario = np.zeros(len(shocks), dtype=np.int64)
+        self.shock_window = np.zeros((len(shocks), 2), dtype=np.int64)
+        self.shock_factor = np.ones((len(shocks), resources, countries))
+        for k, (position, shock, label) in enumerate(shocks):
+            factor = shock.get("factor")
+            if not _number(factor) or not 0 <= factor <= MAX_SHOCK_FACTOR:
+                raise ValueError(f"{label}: shock factor must be a number in [0, {MAX_SHOCK_FACTOR:g}]")
+            rows = self.country_rows(shock.get("countries"), label)
+            self.shock_scenario[k] = position
+            self.shock_window[k] = _window(shock, ticks, label)
+            self.shock_factor[k][np.ix_(self._columns(shock.get("resource"), label), rows)] = factor
+
+        # Embargo k blocks exporters' surplus from reaching the importers.
+        self.embargo_scenario = np.zeros(len(embargoes), dtype=np.int64)
+        self.embargo_window = np.zeros((len(embargoes), 2), dtype=np.int64)
+        self.embargo_resources = np.zeros((len(embargoes), resources))
+        self.embargo_exporters = np.zeros((len(embargoes), countries))
+        self.embargo_importers = np.zeros((len(embargoes), countries))
+        for k, (position, embargo, label) in enumerate(embargoes):
+            if not embargo.get("exporters"):
+                raise ValueError(f"{label}: an embargo needs exporters")
+            exporters = self.country_rows(embargo["exporters"], label)
+            self.embargo_scenario[k] = position
+            self.embargo_window[k] = _window(embargo, ticks, label)
+            self.embargo_resources[k, self._columns(embargo.get("resource"), label)] = 1
+            self.embargo_exporters[k, exporters] = 1
+            if embargo.get("importers"):
+                self.embargo_importers[k, self.country_rows(embargo["importers"], label)] = 1
+            else:
+                self.embargo_importers[k] = 1
+            self.embargo_importers[k, exporters] = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def country_rows(self, codes, label):
+        if codes is None:
+            return np.arange(len(self.baseline.codes))
+        if isinstance(codes, str):
+            codes = [codes]
+        if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+            raise ValueError(f"{label}: countries must be an ISO code or a list of codes")
+        unknown = [code for code in codes if str(code).upper() not in self.baseline.index]
+        if unknown:
+            raise ValueError(f"{label}: unknown countries {', '.join(map(str, unknown))}")
+        return np.array([self.baseline.index[str(code).upper()] for code in codes], dtype=np.int64)
+
+    def _columns(self, resource, label):
+        names = list(RESOURCES)
+        if resource in (None, "all"):
+            return np.arange(len(names))
+        wanted = [resource] if isinstance(resource, str) else resource
+        if not isinstance(wanted, list) or not all(isinstance(name, str) for name in wanted):
+            raise ValueError(f"{label}: resource must be a name or a list of names")
+        unknown = [name for name in wanted if name not in RESOURCES]
+        if unknown:
+            raise ValueError(f"{label}: unknown resources {', '.join(map(str, unknown))}")
+        return np.array([names.index(name) for name in wanted], dtype=np.int64)
+
+    def _growth(self, position, growth, label):
+        if not isinstance(growth, dict):
+            raise ValueError(f"{label}: growth must be an object")
+        for key, rate in growth.items():
+            if key not in GROWTH_KEYS:
+                raise ValueError(f"{label}: unknown growth key {key}")
+            column = GROWTH_KEYS.index(key)
+            rates = rate if isinstance(rate, dict) else {"*": rate}
+            for code, value in rates.items():
+                if not _number(value) or not -1 < value <= MAX_GROWTH_RATE:
+                    raise ValueError(f"{label}: growth rates must be numbers in (-1, {MAX_GROWTH_RATE:g}]")
+                rows = slice(None) if code == "*" else self.country_rows([code], label)
+                self.growth[position, column, rows] = value
+
+
+def project(baseline, scenarios, ticks):
+    """Step every scenario forward `ticks` times at once.
+
+    Returns per-tick arrays (scenario x tick x resource) for prices, the
+    supply reaching the market and demand, plus the final production
+    (scenario x resource x country) and GDP (scenario x country).
+    """
+    count, resources = len(scenarios), len(RESOURCES)
+    production = np.repeat(baseline.production[None], count, axis=0)
+    gdp = np.repeat(baseline.gdp[None], count, axis=0)
+    # Demand follows each country's GDP: demand = gdp * demand_per_gdp.
+    demand_per_gdp = np.divide(
+        baseline.demand, baseline.gdp[None, :], out=np.zeros_like(baseline.demand), where=baseline.gdp[None, :] > 0
+    )
+    resource_growth = 1 + scenarios.growth[:, :resources]
+    gdp_growth = 1 + scenarios.growth[:, resources]
+    production_cap = baseline.production * MAX_GROWTH_MULTIPLE
+    gdp_cap = baseline.gdp * MAX_GROWTH_MULTIPLE
+    damping = (1 - scenarios.integration * 0.5)[:, None]
+    price = np.ones((count, resources))
+
+    prices = np.empty((count, ticks + 1, resources))
+    supplied = np.empty((count, ticks + 1, resources))
+    demanded = np.empty((count, ticks + 1, resources))
+    prices[:, 0] = price
+    supplied[:, 0] = baseline.production.sum(axis=1)
+    demanded[:, 0] = baseline.demand.sum(axis=1)
+
+    for tick in range(ticks):
+        production *= resource_growth
+        np.minimum(production, production_cap, out=production)
+        gdp *= gdp_growth
+        np.minimum(gdp, gdp_cap, out=gdp)
+        output = production * (price ** SUPPLY_ELASTICITY)[:, :, None]
+        active = (scenarios.shock_window[:, 0] <= tick) & (tick < scenarios.shock_window[:, 1])
+        if active.any():
+            which = scenarios.shock_scenario[active]
+            if len(np.unique(which)) == len(which):
+                output[which] *= scenarios.shock_factor[active]
+            else:
+                # Overlapping shocks in one scenario compound.
+                np.multiply.at(output, which, scenarios.shock_factor[active])
+        supply = output.sum(axis=2)
+        total_demand = gdp @ demand_per_gdp.T
+
+        active = (scenarios.embargo_window[:, 0] <= tick) & (tick < scenarios.embargo_window[:, 1])
+        if active.any():
+            which = scenarios.embargo_scenario[active]
+            demand = gdp[which][:, None, :] * demand_per_gdp[None]
+            surplus = np.maximum(output[which] - demand, 0)
+            blocked_exports = np.einsum("kc,krc->kr", scenarios.embargo_exporters[active], surplus)
+            importer_demand = np.einsum("kc,krc->kr", scenarios.embargo_importers[active], demand)
+            importer_share = np.divide(
+                importer_demand, total_demand[which], out=np.zeros_like(importer_demand), where=total_demand[which] > 0
+            )
+            blocked = np.zeros_like(supply)
+            np.add.at(blocked, which, blocked_exports * importer_share * scenarios.embargo_resources[active])
+            supply = np.maximum(supply - blocked, 0)
+
+        with np.errstate(divide="ignore"):
+            ratio = np.divide(supply, total_demand, out=np.ones_like(supply), where=total_demand > 0)
+            change = -PRICE_ELASTICITY * np.log(ratio) * damping
+        price = np.clip(price * (1 + np.clip(change, -MAX_PRICE_STEP, MAX_PRICE_STEP)), PRICE_FLOOR, PRICE_CEILING)
+
+        prices[:, tick + 1] = price
+        supplied[:, tick + 1] = supply
+        demanded[:, tick + 1] = total_demand
+
+    return {"prices": prices, "supply": supplied, "demand": demanded, "production": production, "gdp": gdp}
+
+
+def simulate(baseline, specs, ticks, countries=None):
+    """Run scenario specs and shape the result for JSON."""
+    if not _number(ticks) or not math.isfinite(ticks) or ticks != int(ticks) or not 0 < ticks <= MAX_TICKS:
+        raise ValueError(f"ticks must be an integer in (0, {MAX_TICKS}]")
+    if not isinstance(specs, list) or not 0 < len(specs) <= MAX_SCENARIOS:
+        raise ValueError(f"scenarios must be a list of 1 to {MAX_SCENARIOS} objects")
+    ticks = int(ticks)
+    scenarios = Scenarios(baseline, specs, ticks)
+    rows = scenarios.country_rows(countries, "countries") if countries else np.array([], dtype=np.int64)
+    result = project(baseline, scenarios, ticks)
+    if not all(np.isfinite(values).all() for values in result.values()):
+        # JSON has no Infinity/NaN; the bounds above should make this unreachable.
+        raise ValueError("projection did not stay finite; use smaller growth rates or fewer ticks")
+
+    output = []
+    for position, name in enumerate(scenarios.names):
+        entry = {"name": name, "prices": {}, "supply": {}, "demand": {}}
+        for column, resource in enumerate(RESOURCES):
+            entry["prices"][resource] = result["prices"][position, :, column].round(6).tolist()
+            entry["supply"][resource] = result["supply"][position, :, column].tolist()
+            entry["demand"][resource] = result["demand"][position, :, column].tolist()
+        entry["countries"] = {
+            baseline.codes[row]: {
+                "gdp": float(result["gdp"][position, row]),
+                **{
+                    resource: float(result["production"][position, column, row])
+                    for column, resource in enumerate(RESOURCES)
+                },
+            }
+            for row in rows
+        }
+        output.append(entry)
+    return {"ticks": ticks, "resources": list(RESOURCES), "scenarios": output}
+
+
+# Baselines per data version; building one walks every country.
+_baselines = LRUCache(4)
+
+
+def get_baseline(key, load_countries):
+    baseline = _baselines.get(key)
+    if baseline is None:
+        baseline = Baseline(load_countries())
+        _baselines.put(key, baseline)
+    return baseline
@@ -0,0 +1,275 @@
+import bisect
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+from dateutil import parser
+
+from .file_lock import FileLock
+from .profiling import stage
+from .storage import ensure_dir, get_data_dir, latest_json_file, read_json
+
+RAW_SOURCES = ("gdp", "oil", "agriculture", "minerals", "gold_reserves")
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _utc_stamp(value=None):
+    if value is None:
+        value = datetime.now(timezone.utc)
+    elif isinstance(value, str):
+        value = parser.parse(value.rstrip("Z"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SnapshotStore:
+    """Append-only, gzip-compressed crawl snapshots for one raw source.
+
+    Every crawl becomes an immutable record under `data/raw/<source>/snapshots`
+    and is listed in `manifest.json`. The manifest is cached in memory, so the
+    latest snapshot and lookups by id are dict hits, and "as of" lookups are a
+    bisect over creation times; the directory itself is never listed.
+
+    The CLI, the scheduler and API workers may append from separate
+    processes, so manifest updates also hold a file lock and start from the
+    manifest on disk.
+    """
+
+    def __init__(self, source, root=None):
+        self.source = source
+        self.root = root or get_data_dir("raw", source, "snapshots")
+        self.manifest_path = os.path.join(self.root, MANIFEST_NAME)
+        self.lock_path = self.manifest_path + ".lock"
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._manifest_mtime = None
+        self._by_id = {}
+        self._created = []
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"source": self.source, "latest": None, "entries": []}
+        return read_json(self.manifest_path)
+
+    def _manifest_state(self):
+        mtime = self._stat_manifest()
+        if self._manifest is None or mtime != self._manifest_mtime:
+            self._set_manifest(self._read_manifest(), mtime)
+        return self._manifest
+
+    def _stat_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        stat = os.stat(self.manifest_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _set_manifest(self, manifest, mtime):
+        self._manifest = manifest
+        self._manifest_mtime = mtime
+        self._by_id = {entry["id"]: entry for entry in manifest["entries"]}
+        self._created = [entry["created_at"] for entry in manifest["entries"]]
+
+    def _fresh_manifest(self):
+        # Under the file lock: another process may have written since the last stat.
+        self._set_manifest(self._read_manifest(), self._stat_manifest())
+        return self._manifest
+
+    def _write_manifest(self, manifest):
+        ensure_dir(self.root)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._set_manifest(manifest, self._stat_manifest())
+
+    def entries(self):
+        with self._lock:
+            return list(self._manifest_state()["entries"])
+
+    def append(self, payload, period=None, created_at=None):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock, FileLock(self.lock_path):
+            manifest = dict(self._fresh_manifest())
+            entries = list(manifest["entries"])
+            created = _utc_stamp(created_at)
+            if entries and created < entries[-1]["created_at"]:
+                # Keep creation times monotonic so as-of lookups can bisect.
+                created = entries[-1]["created_at"]
+            snapshot_id = entries[-1]["id"] + 1 if entries else 1
+            file_name = f"{snapshot_id:06d}-{created.replace(':', '').replace('-', '')}.json.gz"
+
+            ensure_dir(self.root)
+            record_path = os.path.join(self.root, file_name)
+            with open(record_path + ".tmp", "wb") as handle:
+                handle.write(gzip.compress(body, mtime=0))
+            os.replace(record_path + ".tmp", record_path)
+
+            entry = {
+                "id": snapshot_id,
+                "created_at": created,
+                "period": period,
+                "file": file_name,
+                "sha256": digest,
+                "size": len(body),
+            }
+            entries.append(entry)
+            manifest["entries"] = entries
+            manifest["latest"] = snapshot_id
+            self._write_manifest(manifest)
+            return entry
+
+    def _load_entry(self, entry):
+        with gzip.open(os.path.join(self.root, entry["file"]), "rb") as handle:
+            return json.loads(handle.read().decode("utf-8"))
+
+    def latest_entry(self):
+        with self._lock:
+            manifest = self._manifest_state()
+            return self._by_id.get(manifest.get("latest"))
+
+    def entry(self, snapshot_id):
+        with self._lock:
+            self._manifest_state()
+            return self._by_id.get(int(snapshot_id))
+
+    def entry_as_of(self, when):
+        stamp = _utc_stamp(when)
+        with self._lock:
+            manifest = self._manifest_state()
+            position = bisect.bisect_right(self._created, stamp)
+            if position == 0:
+                return None
+            return manifest["entries"][position - 1]
+
+    def latest(self):
+        entry = self.latest_entry()
+        return self._load_entry(entry) if entry else None
+
+    def get(self, snapshot_id):
+        entry = self.entry(snapshot_id)
+        return self._load_entry(entry) if entry else None
+
+    def as_of(self, when):
+        entry = self.entry_as_of(when)
+        return self._load_entry(entry) if entry else None
+
+    def compact(self, keep_recent=12):
+        """Drop superseded snapshots older than the `keep_recent` newest ones.
+
+        Older history keeps the last snapshot of each period, so monthly and
+        yearly releases stay readable while same-period re-crawls are pruned.
+        """
+        with self._lock, FileLock(self.lock_path):
+            manifest = dict(self._fresh_manifest())
+            entries = manifest["entries"]
+            if len(entries) <= keep_recent:
+                return []
+            old, recent = entries[: len(entries) - keep_recent], entries[len(entries) - keep_recent :]
+            last_by_period = {}
+            for entry in old:
+                last_by_period[entry.get("period") or entry["id"]] = entry["id"]
+            kept_ids = set(last_by_period.values())
+            removed = [entry for entry in old if entry["id"] not in kept_ids]
+            if not removed:
+                return []
+
+            manifest["entries"] = [entry for entry in old if entry["id"] in kept_ids] + recent
+            self._write_manifest(manifest)
+            for entry in removed:
+                path = os.path.join(self.root, entry["file"])
+                if os.path.exists(path):
+                    os.remove(path)
+            return removed
+
+    def import_legacy(self):
+        """Append legacy `data/raw/<source>/*.json` files not yet in the store."""
+        legacy_dir = os.path.dirname(self.root)
+        if not os.path.isdir(legacy_dir):
+            return []
+        known = {entry["sha256"] for entry in self.entries()}
+        names = [name for name in os.listdir(legacy_dir) if name.endswith(".json")]
+        names.sort(key=lambda name: os.path.getmtime(os.path.join(legacy_dir, name)))
+        imported = []
+        for name in names:
+            payload = read_json(os.path.join(legacy_dir, name))
+            body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            if hashlib.sha256(body).hexdigest() in known:
+                continue
+            created_at = payload.get("last_updated") or datetime.fromtimestamp(
+                os.path.getmtime(os.path.join(legacy_dir, name)), timezone.utc
+            )
+            imported.append(self.append(payload, period=name[: -len(".json")], created_at=created_at))
+        return imported
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(source):
+    if source not in RAW_SOURCES:
+        raise KeyError(source)
+    with _stores_lock:
+        store = _stores.get(source)
+        if store is None:
+            store = SnapshotStore(source)
+            _stores[source] = store
+        return store
+
+
+def save_raw_snapshot(source, file_name, payload):
+    period = file_name[: -len(".json")] if file_name.endswith(".json") else file_name
+    with stage("write"):
+        return get_snapshot_store(source).append(payload, period=period)
+
+
+def _legacy_as_of(source, as_of):
+    # Newest legacy file written by `as_of`, by mtime as for the latest read.
+    legacy_dir = get_data_dir("raw", source)
+    if not os.path.isdir(legacy_dir):
+        return None
+    stamp = _utc_stamp(as_of)
+    best = None
+    for name in os.listdir(legacy_dir):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(legacy_dir, name)
+        mtime = os.path.getmtime(path)
+        if _utc_stamp(datetime.fromtimestamp(mtime, timezone.utc)) <= stamp and (best is None or mtime > best[0]):
+            best = (mtime, path)
+    return best[1] if best else None
+
+
+def as_of_key(as_of):
+    """What load_raw(as_of=...) reads for every source; equal keys, equal inputs."""
+    key = []
+    for source in RAW_SOURCES:
+        entry = get_snapshot_store(source).entry_as_of(as_of)
+        if entry is not None:
+            key.append((source, entry["id"], entry["sha256"]))
+        else:
+            legacy_path = _legacy_as_of(source, as_of)
+            key.append((source, legacy_path, os.path.getmtime(legacy_path) if legacy_path else None))
+    return tuple(key)
+
+
+def load_raw(source, as_of=None, snapshot_id=None):
+    """Read a raw payload from the store, falling back to legacy JSON files."""
+    store = get_snapshot_store(source)
+    if snapshot_id is not None:
+        return store.get(snapshot_id)
+    if as_of is not None:
+        payload = store.as_of(as_of)
+        legacy_path = _legacy_as_of(source, as_of) if payload is None else None
+    else:
+        payload = store.latest()
+        legacy_path = latest_json_file(get_data_dir("raw", source)) if payload is None else None
+    if payload is not None:
+        return payload
+    return read_json(legacy_path) if legacy_path else None
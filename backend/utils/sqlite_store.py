@@ -0,0 +1,223 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .flatten import VALUE_FIELDS
+
+SCHEMA = """
+CREATE TABLE metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE countries (
+    iso TEXT PRIMARY KEY,
+    name TEXT,
+    name_zh TEXT,
+    capital TEXT
+);
+CREATE TABLE metrics (
+    iso TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    unit TEXT,
+    year INTEGER,
+    month INTEGER,
+    record TEXT NOT NULL,
+    PRIMARY KEY (iso, metric)
+);
+CREATE INDEX idx_metrics_metric_value ON metrics (metric, value);
+CREATE INDEX idx_metrics_metric_year ON metrics (metric, year);
+"""
+
+COUNTRY_FIELDS = ("name", "name_zh", "capital")
+
+# Statements are module constants so each pooled connection's statement cache
+# reuses the same prepared statement for every call.
+SQL_COUNTRY = "SELECT name, name_zh, capital FROM countries WHERE iso = ?"
+SQL_COUNTRY_METRICS = "SELECT metric, record FROM metrics WHERE iso = ?"
+SQL_METADATA = "SELECT key, value FROM metadata"
+SQL_ALL_COUNTRIES = "SELECT iso, name, name_zh, capital FROM countries"
+SQL_CODES = "SELECT iso FROM countries"
+SQL_ALL_METRICS = "SELECT iso, metric, record FROM metrics"
+SQL_METRIC_RECORDS = "SELECT iso, record FROM metrics WHERE metric = ?"
+# query_countries appends only the bounds it was given, so SQLite can range
+# scan the (metric, value) index instead of testing `? IS NULL` per row.
+SQL_FILTER = "SELECT iso, value, unit, year FROM metrics WHERE metric = ? AND value IS NOT NULL"
+SQL_FILTER_ORDER = " ORDER BY value DESC LIMIT ?"
+SQL_RANK_DESC = (
+    "SELECT iso, value, unit, year FROM metrics"
+    " WHERE metric = ? AND value IS NOT NULL ORDER BY value DESC LIMIT ?"
+)
+SQL_RANK_ASC = (
+    "SELECT iso, value, unit, year FROM metrics"
+    " WHERE metric = ? AND value IS NOT NULL ORDER BY value ASC LIMIT ?"
+)
+
+
+def sqlite_path_for(data_path):
+    root, _ = os.path.splitext(data_path)
+    return root + ".sqlite"
+
+
+def write_sqlite(merged_data, db_path):
+    """Write merged data to a fresh database and swap it in atomically."""
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            "INSERT INTO metadata (key, value) VALUES (?, ?)",
+            [
+                (key, json.dumps(value, ensure_ascii=False))
+                for key, value in merged_data.get("metadata", {}).items()
+            ],
+        )
+        country_rows = []
+        metric_rows = []
+        for iso, country in merged_data.get("countries", {}).items():
+            country_rows.append((iso, *(country.get(field) for field in COUNTRY_FIELDS)))
+            for metric, entry in country.items():
+                if not isinstance(entry, dict):
+                    continue
+                value = entry.get(VALUE_FIELDS.get(metric, "value"))
+                metric_rows.append(
+                    (
+                        iso,
+                        metric,
+                        value if isinstance(value, (int, float)) else None,
+                        entry.get("unit"),
+                        entry.get("year"),
+                        entry.get("month"),
+                        json.dumps(entry, ensure_ascii=False),
+                    )
+                )
+        connection.executemany("INSERT INTO countries VALUES (?, ?, ?, ?)", country_rows)
+        connection.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?)", metric_rows)
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, db_path)
+
+
+class ConnectionPool:
+    """Small pool of read-only connections, reopened when the file is swapped."""
+
+    def __init__(self, db_path, size=8):
+        self.db_path = db_path
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        self._identity = None
+
+    def _file_identity(self):
+        stat = os.stat(self.db_path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _open(self):
+        uri = "file:" + os.path.abspath(self.db_path) + "?mode=ro"
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=64)
+        return connection
+
+    def _drain(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    @contextmanager
+    def connection(self):
+        identity = self._file_identity()
+        with self._lock:
+            if identity != self._identity:
+                # write_sqlite replaced the file; old connections see the old inode.
+                self._drain()
+                self._identity = identity
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._open()
+        try:
+            yield connection
+        finally:
+            if self._identity == identity and self._idle.qsize() < self.size:
+                self._idle.put(connection)
+            else:
+                connection.close()
+
+
+class SqliteBackend:
+    def __init__(self, db_path, pool_size=8):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, size=pool_size)
+
+    def exists(self):
+        return os.path.exists(self.db_path)
+
+    def codes(self):
+        with self.pool.connection() as connection:
+            return [iso for (iso,) in connection.execute(SQL_CODES)]
+
+    def get_country(self, iso_code):
+        with self.pool.connection() as connection:
+            row = connection.execute(SQL_COUNTRY, (iso_code,)).fetchone()
+            if row is None:
+                return None
+            metrics = connection.execute(SQL_COUNTRY_METRICS, (iso_code,)).fetchall()
+        country = {field: value for field, value in zip(COUNTRY_FIELDS, row) if value is not None}
+        for metric, record in metrics:
+            country[metric] = json.loads(record)
+        return country
+
+    def get_metadata(self):
+        with self.pool.connection() as connection:
+            rows = connection.execute(SQL_METADATA).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def load(self):
+        with self.pool.connection() as connection:
+            country_rows = connection.execute(SQL_ALL_COUNTRIES).fetchall()
+            metric_rows = connection.execute(SQL_ALL_METRICS).fetchall()
+        countries = {}
+        for iso, *fields in country_rows:
+            countries[iso] = {
+                field: value for field, value in zip(COUNTRY_FIELDS, fields) if value is not None
+            }
+        for iso, metric, record in metric_rows:
+            countries.setdefault(iso, {})[metric] = json.loads(record)
+        return {"metadata": self.get_metadata(), "countries": countries}
+
+    def metric_records(self, metric):
+        with self.pool.connection() as connection:
+            rows = connection.execute(SQL_METRIC_RECORDS, (metric,)).fetchall()
+        return [(iso, json.loads(record)) for iso, record in rows]
+
+    def query_countries(self, metric, min_value=None, max_value=None, year=None, limit=250):
+        sql = SQL_FILTER
+        params = [metric]
+        for clause, value in ((" AND value >= ?", min_value), (" AND value <= ?", max_value), (" AND year = ?", year)):
+            if value is not None:
+                sql += clause
+                params.append(value)
+        params.append(limit)
+        with self.pool.connection() as connection:
+            rows = connection.execute(sql + SQL_FILTER_ORDER, params).fetchall()
+        return [
+            {"code": iso, "value": value, "unit": unit, "year": row_year}
+            for iso, value, unit, row_year in rows
+        ]
+
+    def rank(self, metric, limit=10, descending=True):
+        sql = SQL_RANK_DESC if descending else SQL_RANK_ASC
+        with self.pool.connection() as connection:
+            rows = connection.execute(sql, (metric, limit)).fetchall()
+        return [
+            {"rank": position, "code": iso, "value": value, "unit": unit, "year": year}
+            for position, (iso, value, unit, year) in enumerate(rows, 1)
+        ]
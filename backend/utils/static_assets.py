@@ -0,0 +1,40 @@
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+from .compression import has_precompressed_sibling, precompressed_sibling
+
+
+def send_asset(directory, filename):
+    # Werkzeug answers a multi-range request with 416; RFC 9110 lets a server
+    # ignore Range instead, so fall back to the full 200 body in that case.
+    header = request.environ.get("HTTP_RANGE")
+    if header and request.range is not None and len(request.range.ranges) > 1:
+        request.environ.pop("HTTP_RANGE")
+        header = None
+
+    path = safe_join(directory, filename)
+    negotiable = path is not None and has_precompressed_sibling(path)
+
+    # Byte ranges always refer to the identity representation.
+    if negotiable and not header:
+        encoding, sibling = precompressed_sibling(path)
+        if encoding:
+            response = send_from_directory(
+                directory,
+                os.path.relpath(sibling, directory),
+                mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                download_name=os.path.basename(filename),
+                conditional=True,
+            )
+            response.headers["Content-Encoding"] = encoding
+            response.vary.add("Accept-Encoding")
+            return response
+
+    # conditional=True answers single Range/If-Range requests with 206.
+    response = send_from_directory(directory, filename, conditional=True)
+    if negotiable:
+        response.vary.add("Accept-Encoding")
+    return response
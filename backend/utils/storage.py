@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 
@@ -10,6 +11,17 @@ def get_data_dir(*parts):
     return os.path.join(get_repo_root(), "data", *parts)
 
 
+def get_geojson_path():
+    return os.environ.get(
+        "WORLD_GAME_GEOJSON_PATH",
+        os.path.join(get_repo_root(), "static", "geojson", "world_50m_custom.geojson"),
+    )
+
+
+def get_tile_cache_dir():
+    return os.environ.get("WORLD_GAME_TILE_CACHE", get_data_dir("tiles"))
+
+
 def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
 
@@ -33,3 +45,11 @@ def latest_json_file(dir_path):
         return None
     files.sort(key=lambda name: os.path.getmtime(os.path.join(dir_path, name)), reverse=True)
     return os.path.join(dir_path, files[0])
+
+
+def file_stamp(path):
+    # Cheap change marker from size and mtime; avoids hashing large files.
+    if not path or not os.path.exists(path):
+        return "empty"
+    stat = os.stat(path)
+    return hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode("ascii")).hexdigest()[:12]
@@ -0,0 +1,262 @@
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .flatten import flatten_country
+from .geometry_index import get_geometry_index, polygonal
+from .mvt import DEFAULT_EXTENT, encode_layer, encode_polygon_commands
+from .storage import ensure_dir, file_stamp
+
+GEOMETRY_LAYER = "countries"
+ATTRIBUTE_LAYER = "metrics"
+
+MAX_TILE_ZOOM = 10
+# Extra tile units cut around each tile so polygon edges don't show seams.
+TILE_BUFFER = 64
+MAX_LATITUDE = 85.0511287798066
+# Attribute trees kept per boundary file: the newest merge plus the one
+# before it, for clients still reading the previous version.
+KEEP_ATTRIBUTE_STAMPS = 2
+
+
+def validate_tile(z, x, y):
+    if z < 0 or z > MAX_TILE_ZOOM:
+        raise ValueError(f"zoom must be between 0 and {MAX_TILE_ZOOM}")
+    limit = 2 ** z
+    if not (0 <= x < limit and 0 <= y < limit):
+        raise ValueError("tile coordinates out of range")
+
+
+def _tile_to_lon(x, z):
+    return x / (2 ** z) * 360.0 - 180.0
+
+
+def _tile_to_lat(y, z):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / (2 ** z)))))
+
+
+def tile_bounds(z, x, y, buffer=0.0):
+    """Lon/lat bounds of a tile, optionally grown by `buffer` tile widths."""
+    return (
+        max(-180.0, _tile_to_lon(x - buffer, z)),
+        max(-MAX_LATITUDE, _tile_to_lat(y + 1 + buffer, z)),
+        min(180.0, _tile_to_lon(x + 1 + buffer, z)),
+        min(MAX_LATITUDE, _tile_to_lat(y - buffer, z)),
+    )
+
+
+def _projector(z, x, y, extent):
+    import numpy as np
+
+    scale = 2 ** z
+
+    def project(coords):
+        lon = coords[:, 0]
+        lat = np.radians(np.clip(coords[:, 1], -MAX_LATITUDE, MAX_LATITUDE))
+        px = ((lon + 180.0) / 360.0 * scale - x) * extent
+        py = ((1.0 - np.arcsinh(np.tan(lat)) / math.pi) / 2.0 * scale - y) * extent
+        return np.column_stack((px, py))
+
+    return project
+
+
+def _polygon_rings(geom):
+    parts = geom.geoms if geom.geom_type == "MultiPolygon" else [geom]
+    return [
+        (list(part.exterior.coords), [list(ring.coords) for ring in part.interiors])
+        for part in parts
+        if not part.is_empty
+    ]
+
+
+def _resolve_iso(props):
+    return props.get("ADM0_A3") or props.get("ISO_A3")
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _atomic_write(path, payload):
+    ensure_dir(os.path.dirname(path))
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class TileCache:
+    """Lazily cut vector tiles, cached on disk as separate layers.
+
+    The geometry layer depends only on the boundary file and is stored under
+    `<cache>/<geometry stamp>/geometry`. The metrics layer is keyed by the
+    merged data file as well, so a new merge only invalidates attributes.
+    """
+
+    def __init__(self, cache_dir, geojson_path, extent=DEFAULT_EXTENT):
+        self.cache_dir = cache_dir
+        self.geojson_path = geojson_path
+        self.extent = extent
+
+    def _root(self):
+        return os.path.join(self.cache_dir, file_stamp(self.geojson_path))
+
+    def prune(self):
+        """Remove trees cut from older boundary files and older merges."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        root = self._root()
+        stale = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if os.path.join(self.cache_dir, name) != root
+        ]
+        attributes_dir = os.path.join(root, "attributes")
+        if os.path.isdir(attributes_dir):
+            stamps = sorted(
+                (os.path.join(attributes_dir, name) for name in os.listdir(attributes_dir)),
+                key=_mtime,
+                reverse=True,
+            )
+            stale.extend(stamps[KEEP_ATTRIBUTE_STAMPS:])
+        for path in stale:
+            # Another worker may be pruning the same tree.
+            shutil.rmtree(path, ignore_errors=True)
+        return stale
+
+    def _build_geometry(self, z, x, y):
+        import shapely
+
+        index = get_geometry_index(self.geojson_path)
+        bbox = tile_bounds(z, x, y, buffer=TILE_BUFFER / self.extent)
+        project = _projector(z, x, y, self.extent)
+        # Half a screen pixel on a 256px tile, in tile units.
+        tolerance = self.extent / 256 / 2
+
+        features = []
+        ids = []
+        for feature_id, geom, props in index.intersecting(bbox):
+            clipped = polygonal(shapely.clip_by_rect(geom, *bbox))
+            if clipped.is_empty:
+                continue
+            projected = shapely.transform(clipped, project)
+            simplified = polygonal(projected.simplify(tolerance, preserve_topology=True))
+            if simplified.is_empty:
+                continue
+            commands = encode_polygon_commands(_polygon_rings(simplified))
+            if not commands:
+                continue
+            iso = _resolve_iso(props)
+            features.append(
+                {
+                    "id": feature_id,
+                    "properties": {
+                        "iso_a3": iso,
+                        "name": props.get("NAME"),
+                        "name_zh": props.get("NAME_ZH"),
+                    },
+                    "geometry": commands,
+                }
+            )
+            ids.append([feature_id, iso])
+        return encode_layer(GEOMETRY_LAYER, features, self.extent), ids
+
+    def geometry_tile(self, z, x, y):
+        validate_tile(z, x, y)
+        base = os.path.join(self._root(), "geometry", str(z), str(x), str(y))
+        tile_path = base + ".pbf"
+        ids_path = base + ".ids.json"
+        if os.path.exists(tile_path) and os.path.exists(ids_path):
+            with open(tile_path, "rb") as handle:
+                tile = handle.read()
+            with open(ids_path, "r", encoding="utf-8") as handle:
+                ids = json.load(handle)
+            return tile, ids
+
+        tile, ids = self._build_geometry(z, x, y)
+        first = not os.path.isdir(self._root())
+        # ids first: a reader only trusts the tile once both files exist.
+        _atomic_write(ids_path, json.dumps(ids).encode("utf-8"))
+        _atomic_write(tile_path, tile)
+        if first:
+            # A new boundary file: the trees cut from the old one are dead.
+            self.prune()
+        return tile, ids
+
+    def attribute_tile(self, z, x, y, data_stamp, get_country):
+        validate_tile(z, x, y)
+        stamp_dir = os.path.join(self._root(), "attributes", data_stamp)
+        tile_path = os.path.join(stamp_dir, str(z), str(x), f"{y}.pbf")
+        if os.path.exists(tile_path):
+            with open(tile_path, "rb") as handle:
+                return handle.read()
+
+        _, ids = self.geometry_tile(z, x, y)
+        # Only the countries in this tile are read.
+        features = []
+        for feature_id, iso in ids:
+            country = get_country(iso) if iso else None
+            if not country:
+                continue
+            properties = {"iso_a3": iso}
+            properties.update(flatten_country(country))
+            features.append({"id": feature_id, "properties": properties})
+        tile = encode_layer(ATTRIBUTE_LAYER, features, self.extent)
+        first = not os.path.isdir(stamp_dir)
+        _atomic_write(tile_path, tile)
+        if first:
+            # First tile of a new merge; drop all but the newest trees.
+            self.prune()
+        return tile
+
+    def get_tile(self, z, x, y, data_stamp=None, get_country=None):
+        tile, _ = self.geometry_tile(z, x, y)
+        if get_country is None:
+            return tile
+        return tile + self.attribute_tile(z, x, y, data_stamp, get_country)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_tile_cache(cache_dir, geojson_path):
+    key = (cache_dir, geojson_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = TileCache(cache_dir, geojson_path)
+            _caches[key] = cache
+        return cache
+
+
+def _seed_column(job):
+    cache_dir, geojson_path, z, x = job
+    cache = get_tile_cache(cache_dir, geojson_path)
+    for y in range(2 ** z):
+        cache.geometry_tile(z, x, y)
+    return 2 ** z
+
+
+def seed_tiles(cache_dir, geojson_path, min_zoom, max_zoom, workers=None):
+    for zoom in (min_zoom, max_zoom):
+        validate_tile(zoom, 0, 0)
+    jobs = [
+        (cache_dir, geojson_path, z, x)
+        for z in range(min_zoom, max_zoom + 1)
+        for x in range(2 ** z)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(_seed_column, jobs))
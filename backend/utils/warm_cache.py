@@ -0,0 +1,65 @@
+import hashlib
+import os
+import pickle
+
+# Bump when the pickled layout changes so old sidecars are ignored.
+SIDECAR_FORMAT = 1
+
+
+def sidecar_path_for(data_path):
+    root, _ = os.path.splitext(data_path)
+    return root + ".pickle"
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_sidecar(data, data_path):
+    """Pickle `data` next to `data_path`, stamped with the JSON's hash and stat."""
+    stat = os.stat(data_path)
+    header = {
+        "format": SIDECAR_FORMAT,
+        "sha256": _sha256_file(data_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    sidecar_path = sidecar_path_for(data_path)
+    tmp_path = sidecar_path + ".tmp"
+    with open(tmp_path, "wb") as handle:
+        # Header and payload are separate pickles so a stale sidecar is
+        # rejected without unpickling the dataset.
+        pickle.dump(header, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(data, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, sidecar_path)
+    return sidecar_path
+
+
+def load_sidecar(data_path):
+    """Return the pickled dataset if it matches `data_path`, else None.
+
+    Size and mtime matching the stamp is taken as a match; otherwise the JSON
+    is hashed, so a touched but unchanged file still hits the sidecar. The
+    sidecar is only ever written by this process family, never downloaded.
+    """
+    sidecar_path = sidecar_path_for(data_path)
+    if not os.path.exists(sidecar_path) or not os.path.exists(data_path):
+        return None
+    stat = os.stat(data_path)
+    try:
+        with open(sidecar_path, "rb") as handle:
+            header = pickle.load(handle)
+            if not isinstance(header, dict) or header.get("format") != SIDECAR_FORMAT:
+                return None
+            fresh = header["size"] == stat.st_size and header["mtime_ns"] == stat.st_mtime_ns
+            if not fresh and (
+                header["size"] != stat.st_size or header["sha256"] != _sha256_file(data_path)
+            ):
+                return None
+            return pickle.load(handle)
+    except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+        return None
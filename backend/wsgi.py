@@ -0,0 +1,68 @@
+"""WSGI entry point and pre-forking launcher.
+
+`backend.wsgi:app` can be handed to any WSGI server. Workers default to the
+memory-mapped data backend, so every process reads the same compiled file
+instead of parsing its own copy of the merged JSON.
+"""
+
+import os
+import signal
+
+from .app import create_app
+from .utils.data_manager import get_data_manager
+from .utils.mapped_data import ensure_binary
+
+app = create_app(data_backend=os.environ.get("WORLD_GAME_DATA_BACKEND", "mmap"))
+
+
+def serve(host="0.0.0.0", port=5000, workers=None, events_port=None):
+    from werkzeug.serving import make_server
+
+    from .utils.event_server import start_event_server
+
+    workers = workers or os.cpu_count() or 1
+    # Live events always come from the fan-out, next to the app port by default.
+    events_port = events_port or port + 1
+    server = make_server(host, port, app, threaded=True)
+    if app.config["DATA_BACKEND"] == "mmap":
+        ensure_binary(app.config["DATA_PATH"])
+    # Map the data before forking so children start from the shared pages.
+    get_data_manager(app.config["DATA_PATH"], app.config["DATA_BACKEND"]).get_metadata()
+
+    # Workers redirect /api/events to the fan-out, which runs in this process.
+    app.config["EVENTS_PORT"] = events_port
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        start_event_server(host, events_port)
+        print(f"Serving on http://{host}:{port} (single process)")
+        server.serve_forever()
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os._exit(0)
+        children.append(pid)
+    print(f"Serving on http://{host}:{port} with {workers} workers")
+    # Started after forking so no worker inherits the event loop thread.
+    start_event_server(host, events_port)
+    print(f"Events on http://{host}:{events_port}/api/events")
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for pid in children:
+        os.waitpid(pid, 0)
+    server.server_close()
@@ -0,0 +1,117 @@
+"""Import-time benchmark for `create_app()` and the CLI.
+
+Runs each target in a fresh interpreter under `python -X importtime`, and
+reports the median wall time plus the slowest imports by cumulative time.
+`--save` writes the medians to a JSON file and `--baseline` compares against
+one, so cold-start regressions show up next to the module that caused them.
+Usage:
+
+    python benchmarks/bench_imports.py [--runs 5] [--top 15] [--save out.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+TARGETS = {
+    "create_app": "from backend.app import create_app; create_app()",
+    "cli": "import backend.cli",
+}
+
+# Packages the API and a plain CLI call should never import. Crawler modules
+# count too; the crawler registry itself is light and expected.
+HEAVY_PACKAGES = ("pandas", "requests", "bs4", "lxml")
+
+
+def is_heavy(name):
+    if name.startswith("backend.crawler."):
+        return name != "backend.crawler.registry"
+    return name in HEAVY_PACKAGES
+
+
+def parse_importtime(stderr):
+    """Return {module: cumulative microseconds} from `-X importtime` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def run_child(code):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT,
+        env=dict(os.environ, WORLD_GAME_DATA_BACKEND="json"),
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return time.perf_counter() - started, parse_importtime(completed.stderr)
+
+
+def measure(code, runs):
+    walls = []
+    modules = defaultdict(list)
+    for _ in range(runs):
+        wall, times = run_child(code)
+        walls.append(wall)
+        for name, cumulative in times.items():
+            modules[name].append(cumulative)
+    return {
+        "wall_ms": statistics.median(walls) * 1000,
+        "modules_ms": {name: statistics.median(values) / 1000 for name, values in modules.items()},
+    }
+
+
+def report(label, result, top, baseline=None):
+    wall = result["wall_ms"]
+    line = f"{label:<11} wall {wall:8.1f} ms"
+    if baseline:
+        line += f"   (baseline {baseline['wall_ms']:.1f} ms, {wall - baseline['wall_ms']:+.1f} ms)"
+    print(line)
+    heavy = sorted(name for name in result["modules_ms"] if is_heavy(name))
+    if heavy:
+        print(f"  heavy imports: {', '.join(heavy)}")
+    slowest = sorted(result["modules_ms"].items(), key=lambda item: item[1], reverse=True)[:top]
+    for name, ms in slowest:
+        print(f"  {ms:9.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target", choices=sorted(TARGETS), action="append", default=None)
+    parser.add_argument("--save", default=None, help="write medians to this JSON file")
+    parser.add_argument("--baseline", default=None, help="compare with a file written by --save")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+
+    print(f"{args.runs} runs each, median, python -X importtime")
+    results = {}
+    for label in args.target or list(TARGETS):
+        results[label] = measure(TARGETS[label], args.runs)
+        report(label, results[label], args.top, baseline.get(label))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
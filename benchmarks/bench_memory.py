@@ -0,0 +1,76 @@
+"""Memory footprint of merged data: parsed JSON dicts vs compact records.
+
+Measures the real merged file and a synthetic dataset built by cloning its
+countries under generated codes. Usage:
+
+    python benchmarks/bench_memory.py [--scale 50]
+"""
+
+import argparse
+import copy
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from backend.utils.compact_model import CompactDataset  # noqa: E402
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current
+
+
+def synthetic(data, scale):
+    rng = random.Random(42)
+    countries = {}
+    for copy_index in range(scale):
+        for iso, country in data["countries"].items():
+            clone = copy.deepcopy(country)
+            for entry in clone.values():
+                if isinstance(entry, dict):
+                    for key in ("value", "total", "previous"):
+                        if isinstance(entry.get(key), (int, float)):
+                            entry[key] *= rng.uniform(0.5, 1.5)
+            countries[f"{iso}{copy_index:04d}"] = clone
+    return {"metadata": data["metadata"], "countries": countries}
+
+
+def report(label, text):
+    # Parse inside each measurement so both sides start from the same JSON text.
+    data, dict_bytes = measure(lambda: json.loads(text))
+    compact, compact_bytes = measure(lambda: CompactDataset(json.loads(text)))
+    assert compact.to_dict() == data
+    count = len(data["countries"])
+    print(
+        f"{label:<22} {count:>7} countries   dicts {dict_bytes / 1024:9.1f} KiB"
+        f"   compact {compact_bytes / 1024:9.1f} KiB   ({compact_bytes / dict_bytes:5.1%})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument(
+        "--data", default=os.path.join(REPO_ROOT, "data", "merged", "countries_data.json")
+    )
+    args = parser.parse_args()
+
+    with open(args.data, "r", encoding="utf-8") as handle:
+        text = handle.read()
+    report("real", text)
+    report(f"synthetic x{args.scale}", json.dumps(synthetic(json.loads(text), args.scale)))
+
+
+if __name__ == "__main__":
+    main()
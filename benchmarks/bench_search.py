@@ -0,0 +1,58 @@
+"""Search index latency: build time and per-query time for type-ahead input.
+
+Replays every prefix of a few typical queries (as a user types them) against
+a fresh index, with the per-index result cache cleared before each query.
+Usage:
+
+    python benchmarks/bench_search.py [--runs 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from backend.utils.derived_metrics import default_geojson_path  # noqa: E402
+from backend.utils.search_index import SearchIndex, default_places_path, load_geo_entries  # noqa: E402
+from backend.utils.storage import read_json  # noqa: E402
+
+QUERIES = ["germany", "united states", "中华人民", "beijing", "brazl", "côte d'ivoire", "kor", "澳大利亚"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument(
+        "--data", default=os.path.join(REPO_ROOT, "data", "merged", "countries_data.json")
+    )
+    args = parser.parse_args()
+
+    countries = read_json(args.data)["countries"]
+    geo = load_geo_entries(default_geojson_path(), default_places_path())
+    started = time.perf_counter()
+    index = SearchIndex(countries, geo)
+    print(f"build: {len(index.entries)} entries in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    prefixes = [query[:length] for query in QUERIES for length in range(1, len(query) + 1)]
+    timings = []
+    for prefix in prefixes:
+        for _ in range(args.runs):
+            index._results.clear()
+            started = time.perf_counter()
+            index.search(prefix)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(
+        f"{len(prefixes)} prefixes x {args.runs} runs:"
+        f"  median {statistics.median(timings) * 1e6:.0f} us"
+        f"  p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} us"
+        f"  max {timings[-1] * 1e6:.0f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Projection engine throughput: ticks per second over the merged data.
+
+Builds a batch of random scenarios (growth rates, production shocks and
+embargoes) and times `project()` over all countries at once, for each batch
+size. Usage:
+
+    python benchmarks/bench_simulate.py [--ticks 200] [--scenarios 1 16 128] [--runs 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from backend.utils.simulation import RESOURCES, Baseline, Scenarios, project  # noqa: E402
+from backend.utils.storage import read_json  # noqa: E402
+
+
+def random_specs(codes, count, ticks, seed=42):
+    rng = random.Random(seed)
+    specs = []
+    for index in range(count):
+        resource = rng.choice(list(RESOURCES))
+        start = rng.randrange(ticks)
+        specs.append(
+            {
+                "name": f"bench-{index}",
+                "growth": {"gdp": rng.uniform(-0.01, 0.04), resource: rng.uniform(-0.02, 0.03)},
+                "shocks": [
+                    {
+                        "resource": resource,
+                        "countries": rng.sample(codes, 5),
+                        "factor": rng.uniform(0.2, 0.9),
+                        "start": start,
+                        "end": min(ticks, start + rng.randrange(1, 20)),
+                    }
+                ],
+                "embargoes": [{"resource": rng.choice(list(RESOURCES)), "exporters": rng.sample(codes, 3)}],
+                "integration": rng.random(),
+            }
+        )
+    return specs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--scenarios", type=int, nargs="+", default=[1, 16, 128])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--data", default=os.path.join(REPO_ROOT, "data", "merged", "countries_data.json")
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    baseline = Baseline(read_json(args.data)["countries"])
+    print(f"baseline: {len(baseline.codes)} countries in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    for count in args.scenarios:
+        scenarios = Scenarios(baseline, random_specs(baseline.codes, count, args.ticks), args.ticks)
+        best = None
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            project(baseline, scenarios, args.ticks)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        print(
+            f"{count:>5} scenarios x {args.ticks} ticks: {best * 1000:9.1f} ms"
+            f"   {args.ticks / best:10.0f} ticks/s   {count * args.ticks / best:12.0f} scenario-ticks/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Cold-start benchmark: time from process start to the first API response.
+
+Each run starts a fresh interpreter, builds the app and answers
+`/api/country/<iso>` through the test client, against a private copy of the
+merged data. Usage:
+
+    python benchmarks/bench_startup.py [--runs 5] [--iso USA]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from backend.utils.warm_cache import sidecar_path_for, write_sidecar  # noqa: E402
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from backend.app import create_app
+client = create_app().test_client()
+imported = time.perf_counter()
+response = client.get("/api/country/" + sys.argv[2])
+done = time.perf_counter()
+print(json.dumps({"status": response.status_code, "import": imported - start, "first": done - imported}))
+"""
+
+
+def run_child(data_path, iso):
+    env = dict(os.environ, WORLD_GAME_DATA_PATH=data_path, WORLD_GAME_DATA_BACKEND="json")
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, REPO_ROOT, iso],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    total = time.perf_counter() - started
+    result = json.loads(output.strip().splitlines()[-1])
+    if result["status"] != 200:
+        raise SystemExit(f"first request returned {result['status']}")
+    result["total"] = total
+    return result
+
+
+def summarize(label, results):
+    def ms(key):
+        return statistics.median(result[key] for result in results) * 1000
+
+    print(
+        f"{label:<10} total {ms('total'):8.1f} ms   app import {ms('import'):7.1f} ms"
+        f"   first response {ms('first'):7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--iso", default="USA")
+    parser.add_argument(
+        "--data", default=os.path.join(REPO_ROOT, "data", "merged", "countries_data.json")
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_path = os.path.join(work_dir, "countries_data.json")
+        shutil.copy(args.data, data_path)
+        sidecar = sidecar_path_for(data_path)
+
+        # Loading never writes the sidecar, so every cold run reads the JSON.
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+        cold = [run_child(data_path, args.iso) for _ in range(args.runs)]
+
+        with open(data_path, "r", encoding="utf-8") as handle:
+            write_sidecar(json.load(handle), data_path)
+        warm = [run_child(data_path, args.iso) for _ in range(args.runs)]
+
+    print(f"{args.runs} runs each, median, data={args.data}")
+    summarize("json", cold)
+    summarize("sidecar", warm)
+
+
+if __name__ == "__main__":
+    main()
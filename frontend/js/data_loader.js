@@ -27,3 +27,41 @@ export async function fetchCountryData(isoCode) {
 export function clearCountryCache() {
   cache.clear();
 }
+
+function isPlainObject(value) {
+  return value !== null && typeof value === "object" && !Array.isArray(value);
+}
+
+// Apply one patch from /api/changes: metric dicts are merged field by field,
+// everything else is replaced; "unset" entries are "metric" or "metric.field".
+export function applyCountryPatch(record, patch) {
+  for (const [key, value] of Object.entries(patch.set || {})) {
+    if (isPlainObject(record[key]) && isPlainObject(value)) {
+      Object.assign(record[key], value);
+    } else {
+      record[key] = value;
+    }
+  }
+  for (const path of patch.unset || []) {
+    const [key, field] = path.split(".");
+    if (field === undefined) {
+      delete record[key];
+    } else if (isPlainObject(record[key])) {
+      delete record[key][field];
+    }
+  }
+  return record;
+}
+
+// Patch cached countries in place; removed or uncached ones are dropped so
+// the next hover refetches them.
+export function applyCountryChanges(changes) {
+  for (const [code, patch] of Object.entries(changes || {})) {
+    const cached = cache.get(code);
+    if (!patch || !cached) {
+      cache.delete(code);
+      continue;
+    }
+    applyCountryPatch(cached, patch);
+  }
+}
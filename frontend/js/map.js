@@ -1,4 +1,9 @@
-import { clearCountryCache, fetchCountryData } from "./data_loader.js";
+import {
+  applyCountryChanges,
+  applyCountryPatch,
+  clearCountryCache,
+  fetchCountryData,
+} from "./data_loader.js";
 import { hideTooltip, initTooltip, moveTooltip, showTooltip } from "./tooltip.js";
 import { formatCompact, formatLocaleNumber } from "./formatters.js";
 import DataViz from "./data_viz.js";
@@ -92,6 +97,10 @@ let dataVizInstance = null;
 
 // Store all countries data for visualization
 const allCountriesData = {};
+// Published data version the client currently holds (null before versions exist)
+let dataVersion = null;
+// Whether /api/events is backed by the event fan-out.
+let liveEvents = false;
 
 function hashString(value) {
   if (!value) {
@@ -740,7 +749,7 @@ async function refreshAllData() {
       throw new Error("刷新失败");
     }
     const payload = await response.json();
-    clearCountryCache();
+    await applyDataChanges(payload?.version);
     const stamp = payload?.last_crawl || payload?.generated_at || "";
     setRefreshStatus(stamp ? `已更新: ${stamp}` : "已更新");
   } catch (error) {
@@ -750,6 +759,73 @@ async function refreshAllData() {
   }
 }
 
+// Patch cached data with what changed since our version; fall back to a
+// full cache reset when the server can't produce a delta.
+async function applyDataChanges(newVersion) {
+  if (!dataVersion || !newVersion) {
+    clearCountryCache();
+    dataVersion = newVersion || dataVersion;
+    return;
+  }
+  if (newVersion === dataVersion) {
+    return;
+  }
+  try {
+    const response = await fetch(`/api/changes?since=${encodeURIComponent(dataVersion)}`);
+    if (!response.ok) {
+      throw new Error(`changes request failed: ${response.status}`);
+    }
+    const payload = await response.json();
+    const changes = payload?.countries || {};
+    applyCountryChanges(changes);
+    for (const [code, patch] of Object.entries(changes)) {
+      if (!patch) {
+        delete allCountriesData[code];
+      } else {
+        allCountriesData[code] = applyCountryPatch(allCountriesData[code] || {}, patch);
+      }
+    }
+    dataVersion = payload?.version || newVersion;
+    if (dataVizInstance && Object.keys(changes).length > 0) {
+      dataVizInstance.updateCountriesData(allCountriesData);
+    }
+  } catch (error) {
+    console.warn("Falling back to full cache reset:", error);
+    clearCountryCache();
+    dataVersion = newVersion;
+  }
+}
+
+// Follow crawl progress and new data versions pushed over /api/events.
+// Only when the server runs the event fan-out (see /api/health).
+function subscribeDataEvents() {
+  if (!liveEvents || typeof EventSource === "undefined") {
+    return;
+  }
+  const source = new EventSource("/api/events");
+  source.addEventListener("error", () => {
+    if (source.readyState === EventSource.CLOSED) {
+      console.warn("Live data events unavailable");
+    }
+  });
+  source.addEventListener("crawl", (event) => {
+    const data = JSON.parse(event.data)?.data || {};
+    if (data.status === "started") {
+      setRefreshStatus(`正在抓取 ${data.source}...`);
+    } else if (data.status === "failed") {
+      setRefreshStatus(`${data.source} 抓取失败`);
+    }
+  });
+  source.addEventListener("version", async (event) => {
+    const data = JSON.parse(event.data)?.data || {};
+    if (!data.version || data.version === dataVersion) {
+      return;
+    }
+    await applyDataChanges(data.version);
+    setRefreshStatus(`已更新: ${data.version}`);
+  });
+}
+
 function resolveIso(props) {
   const iso = props?.ADM0_A3 || props?.ISO_A3 || props?.ISO_A3_EH || props?.ISO3;
   return iso;
@@ -1238,6 +1314,8 @@ async function initializeMap() {
     loadAllCountriesData().then(() => {
       // 5. 初始化数据可视化组件
       initDataViz();
+      // 6. 订阅服务器推送的数据更新
+      subscribeDataEvents();
     }).catch(err => {
       console.error("Failed to load viz data:", err);
     });
@@ -1255,7 +1333,12 @@ async function initializeMap() {
 async function loadAllCountriesData() {
   console.log("Loading countries data...");
   try {
-    const response = await fetch("/static/data/countries_data.json");
+    // Pin the file to the active version so later deltas apply cleanly.
+    const health = await fetch("/api/health").then((res) => (res.ok ? res.json() : null)).catch(() => null);
+    dataVersion = health?.active_version || null;
+    liveEvents = Boolean(health?.events);
+    const query = dataVersion ? `?version=${encodeURIComponent(dataVersion)}` : "";
+    const response = await fetch(`/static/data/countries_data.json${query}`);
     console.log("Fetch response status:", response.status);
     if (!response.ok) {
       console.error("Failed to load countries data, status:", response.status);
@@ -1,24 +1,75 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-合并中国官方边界数据到世界地图（增强版）
+合并中国官方边界数据到世界地图（增量构建版）
 处理步骤：
-1. 加载中国官方数据（中国_省.geojson）
-2. 使用 shapely 融合所有省界，消除内部省线
-3. 加载 world_50m.geojson
-4. 替换中国 (CHN) 的几何为融合后的官方数据
-5. 从印度 (IND) 裁剪掉与中国重叠的藏南区域
-6. 将 Somaliland (SOL) 合并到 Somalia (SOM)
-7. 删除 Taiwan (TWN)、Siachen Glacier (KAS) 等争议要素
-8. 保存新文件 world_50m_custom.geojson
+1. 对输入文件（中国_省.geojson、world_50m.geojson）计算内容哈希
+2. 使用 shapely 融合所有省界，消除内部省线（结果按中国文件哈希缓存）
+3. 为 world_50m.geojson 建立一次 ISO 索引
+4. 按 BOUNDARY_RULES 声明的规则执行替换、裁剪、合并与删除：
+   - 替换中国 (CHN) 的几何为融合后的官方数据
+   - 从印度 (IND) 裁剪掉与中国重叠的藏南区域
+   - 将 Somaliland (SOL)、Kosovo (KOS)、N. Cyprus (CYN) 并入所属国家
+   - 删除 Taiwan (TWN)、Siachen Glacier (KAS) 等争议要素
+5. 保存新文件 world_50m_custom.geojson
+6. 导出 FlatGeobuf 版本 world_50m_custom.fgb（带 packed Hilbert R-tree 空间索引，
+   客户端可通过 HTTP Range 请求按范围读取要素；需要 pyogrio）
+
+每个步骤以输入内容哈希作为缓存键，输入未变化的步骤直接跳过；
+运行结束时输出各步骤耗时。使用 --force 可忽略缓存全部重建。
 """
 
+import argparse
+import hashlib
 import json
+import os
+import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
-from shapely.geometry import shape, mapping, Polygon, MultiPolygon
+from typing import Any, Callable, Dict, List, Optional
+
+from shapely import wkb
+from shapely.geometry import shape, mapping
 from shapely.ops import unary_union
 
+CHINA_PATH = 'static/geojson/中国_省.geojson'
+WORLD_PATH = 'static/geojson/world_50m.geojson'
+OUTPUT_PATH = 'static/geojson/world_50m_custom.geojson'
+FGB_OUTPUT_PATH = 'static/geojson/world_50m_custom.fgb'
+CACHE_DIR = '.cache/boundary_build'
+
+# 修改步骤实现或输出格式时递增，使旧缓存失效
+PIPELINE_VERSION = 1
+
+# 查找要素时依次匹配的属性字段
+ISO_FIELDS = ('ADM0_A3', 'ISO_A3', 'SOV_A3')
+
+# 同一地区在不同数据版本中的代码别名
+ISO_ALIASES = {
+    'KOS': ('KOS', 'XKX'),
+}
+
+# FlatGeobuf 导出保留的属性字段（与前端解析 ISO/名称所需字段一致）
+FGB_STRING_FIELDS = ('ADM0_A3', 'ISO_A3', 'ISO_A2', 'ADMIN', 'NAME', 'NAME_LONG', 'NAME_ZH')
+FGB_INT_FIELDS = ('POP_EST',)
+
+# 边界处理规则，按顺序执行
+#   replace: 用融合后的中国官方几何替换 target
+#   cut:     从 target 中裁剪掉与 by 重叠的区域
+#   merge:   将 source 并入 target 并删除 source（target 缺失时直接删除 source）
+#   delete:  删除 target
+BOUNDARY_RULES = [
+    {'op': 'replace', 'target': 'CHN', 'label': '中国'},
+    {'op': 'cut', 'target': 'IND', 'by': 'CHN', 'label': '印度（裁剪藏南重叠区）'},
+    {'op': 'merge', 'target': 'SOM', 'source': 'SOL', 'label': 'Somaliland 并入 Somalia'},
+    {'op': 'merge', 'target': 'SRB', 'source': 'KOS', 'label': 'Kosovo 并入 Serbia'},
+    {'op': 'merge', 'target': 'CYP', 'source': 'CYN', 'label': 'N. Cyprus 并入 Cyprus'},
+    {'op': 'delete', 'target': 'TWN', 'label': 'Taiwan'},
+    {'op': 'delete', 'target': 'KAS', 'label': 'Siachen Glacier'},
+]
+
+
 def load_geojson(filepath: str) -> Dict:
     """加载 GeoJSON 文件"""
     with open(filepath, 'r', encoding='utf-8') as f:
@@ -29,13 +80,6 @@ def save_geojson(data: Dict, filepath: str):
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
 
-def find_feature_index(features: List[Dict], predicate) -> int:
-    """查找满足条件的 feature 索引"""
-    for i, feature in enumerate(features):
-        if predicate(feature):
-            return i
-    return -1
-
 def geojson_to_shapely(geometry: Dict) -> Any:
     """将 GeoJSON geometry 转为 shapely 对象"""
     if not geometry:
@@ -52,242 +96,322 @@ def shapely_to_geojson(geom: Any) -> Dict:
         return {'type': 'MultiPolygon', 'coordinates': []}
     return mapping(geom)
 
-def process_world_geojson():
-    """主处理函数"""
-    
-    # 路径
-    china_path = 'static/geojson/中国_省.geojson'
-    world_path = 'static/geojson/world_50m.geojson'
-    output_path = 'static/geojson/world_50m_custom.geojson'
-    
+def file_hash(filepath: str) -> str:
+    """计算文件内容的 sha256"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def combine_hash(*parts: Any) -> str:
+    """将多个输入（哈希、规则、版本号）组合为一个缓存键"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class IsoIndex:
+    """world_50m 要素的 ISO 代码索引，只构建一次"""
+
+    def __init__(self, features: List[Dict]):
+        self._by_field = {field: {} for field in ISO_FIELDS}
+        for i, feature in enumerate(features):
+            props = feature.get('properties', {}) or {}
+            for field in ISO_FIELDS:
+                value = props.get(field)
+                if value and value not in self._by_field[field]:
+                    self._by_field[field][value] = i
+
+    def find(self, code: str) -> int:
+        for alias in ISO_ALIASES.get(code, (code,)):
+            for field in ISO_FIELDS:
+                idx = self._by_field[field].get(alias)
+                if idx is not None:
+                    return idx
+        return -1
+
+
+class BuildPipeline:
+    """按内容哈希缓存的构建步骤，记录每步耗时"""
+
+    def __init__(self, cache_dir: str, force: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.cache_dir / 'manifest.json'
+        self.force = force
+        self.timings = []
+        self.manifest = {}
+        if self.manifest_path.exists() and not force:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+    @contextmanager
+    def timed(self, name: str, status: str = '执行'):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((name, status, time.perf_counter() - start))
+
+    def run(self, name: str, key: str, outputs: List[str], build: Callable[[], bool]) -> bool:
+        """输入键与输出文件均未变化时跳过，否则执行 build 并记录"""
+        record = self.manifest.get(name, {})
+        up_to_date = (
+            record.get('key') == key
+            and all(Path(p).exists() for p in outputs)
+            and record.get('outputs') == {p: file_hash(p) for p in outputs}
+        )
+        if up_to_date:
+            print(f"\n[跳过] {name}: 输入未变化")
+            self.timings.append((name, '跳过', 0.0))
+            return True
+
+        print(f"\n[执行] {name}")
+        with self.timed(name):
+            ok = build()
+        if ok:
+            self.manifest[name] = {
+                'key': key,
+                'outputs': {p: file_hash(p) for p in outputs},
+            }
+            self.save()
+        return ok
+
+    def save(self):
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def report(self):
+        print("\n步骤耗时：")
+        for name, status, seconds in self.timings:
+            print(f"   {name:<24} {status:<4} {seconds:8.3f} s")
+
+
+def dissolve_china(china_path: str, output_path: str) -> bool:
+    """融合中国省界，结果以 WKB 写入缓存"""
     print(f"加载中国官方数据: {china_path}")
     china_data = load_geojson(china_path)
-    
+
     # 只保留 MultiPolygon 类型的要素（过滤掉 MultiLineString）
     china_features = [
         f for f in china_data.get('features', [])
         if f.get('geometry', {}).get('type') == 'MultiPolygon'
     ]
     print(f"找到 {len(china_features)} 个有效省界要素")
-    
-    # 将省界转为 shapely 对象并融合
-    print("融合省界，消除内部边界...")
+
     china_geoms = []
     for f in china_features:
         g = geojson_to_shapely(f.get('geometry'))
         if g and not g.is_empty:
             china_geoms.append(g)
-    
+
     if not china_geoms:
         print("错误: 没有有效的中国省界几何")
         return False
-    
+
     # 使用 unary_union 融合所有多边形，消除内部边界
     china_merged = unary_union(china_geoms)
     print(f"融合后几何类型: {china_merged.geom_type}")
-    print(f"融合完成，消除了内部省界")
-    
-    # 转回 GeoJSON
-    china_geometry = shapely_to_geojson(china_merged)
-    
-    print(f"\n加载世界地图: {world_path}")
+
+    with open(output_path, 'wb') as f:
+        f.write(wkb.dumps(china_merged))
+    return True
+
+
+def _apply_rule(rule: Dict, features: List[Dict], index: IsoIndex,
+                china_merged: Any, deleted: set) -> bool:
+    op = rule['op']
+    target_idx = index.find(rule['target'])
+    if target_idx in deleted:
+        target_idx = -1
+
+    if op == 'replace':
+        if target_idx == -1:
+            print(f"   错误: 未找到 {rule['target']} 要素")
+            return False
+        features[target_idx]['geometry'] = shapely_to_geojson(china_merged)
+        print(f"   [OK] 已替换 {rule['target']} 几何为融合后的官方数据（无省界）")
+        return True
+
+    if op == 'cut':
+        if target_idx == -1:
+            print(f"   未找到 {rule['target']} 要素")
+            return True
+        target_geom = geojson_to_shapely(features[target_idx].get('geometry'))
+        by_idx = index.find(rule['by'])
+        by_geom = china_merged if rule['by'] == 'CHN' else geojson_to_shapely(
+            features[by_idx].get('geometry') if by_idx != -1 else None
+        )
+        if not target_geom or target_geom.is_empty or by_geom is None:
+            return True
+        overlap = target_geom.intersection(by_geom)
+        if overlap.is_empty:
+            print(f"   未检测到与 {rule['by']} 边界的重叠")
+            return True
+        print(f"   检测到重叠区域: {overlap.geom_type}, 面积: {overlap.area:.6f}")
+        cut_geom = target_geom.difference(by_geom)
+        if cut_geom.is_empty:
+            print(f"   警告: 裁剪后 {rule['target']} 几何为空，保留原几何")
+            return True
+        features[target_idx]['geometry'] = shapely_to_geojson(cut_geom)
+        print(f"   [OK] 已裁剪重叠区，新几何类型: {cut_geom.geom_type}")
+        return True
+
+    if op == 'merge':
+        source_idx = index.find(rule['source'])
+        if source_idx == -1 or source_idx in deleted:
+            print(f"   未找到 {rule['source']} 要素")
+            return True
+        if target_idx == -1:
+            print(f"   未找到 {rule['target']}，直接删除 {rule['source']}")
+            deleted.add(source_idx)
+            return True
+        target_geom = geojson_to_shapely(features[target_idx].get('geometry'))
+        source_geom = geojson_to_shapely(features[source_idx].get('geometry'))
+        if not (target_geom and source_geom):
+            print("   错误: 几何转换失败，跳过合并")
+            return True
+        merged = unary_union([target_geom, source_geom])
+        features[target_idx]['geometry'] = shapely_to_geojson(merged)
+        deleted.add(source_idx)
+        print(f"   [OK] 已合并 {rule['source']} 到 {rule['target']} 并删除独立要素")
+        return True
+
+    if op == 'delete':
+        if target_idx == -1:
+            print(f"   未找到 {rule['target']} 要素")
+            return True
+        deleted.add(target_idx)
+        print(f"   [OK] 已删除 {rule['target']} 要素")
+        return True
+
+    raise ValueError(f"未知规则: {op}")
+
+
+def apply_rules(world_path: str, china_wkb_path: str, output_path: str) -> bool:
+    """加载世界地图，建立 ISO 索引并按规则处理"""
+    with open(china_wkb_path, 'rb') as f:
+        china_merged = wkb.loads(f.read())
+
+    print(f"加载世界地图: {world_path}")
     world_data = load_geojson(world_path)
     features = world_data.get('features', [])
     print(f"原世界地图要素数: {len(features)}")
-    
-    # ========== 1. 处理中国 ==========
-    china_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'CHN' or 
-        f.get('properties', {}).get('ISO_A3') == 'CHN'
-    )
-    
-    if china_idx == -1:
-        print("错误: 未找到中国 (CHN) 要素")
-        return False
-    
-    print(f"\n1. 处理中国 (索引 {china_idx})")
-    china_feature = features[china_idx]
-    print(f"   原中国几何类型: {china_feature.get('geometry', {}).get('type')}")
-    
-    # 替换中国的几何
-    features[china_idx]['geometry'] = china_geometry
-    print("   [OK] 已替换中国几何为融合后的官方数据（无省界）")
-    
-    # ========== 2. 处理印度（裁剪藏南重叠区） ==========
-    india_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'IND' or 
-        f.get('properties', {}).get('ISO_A3') == 'IND'
-    )
-    
-    if india_idx != -1:
-        print(f"\n2. 处理印度 (索引 {india_idx}) - 裁剪藏南重叠区")
-        india_feature = features[india_idx]
-        india_geom = geojson_to_shapely(india_feature.get('geometry'))
-        
-        if india_geom and not india_geom.is_empty:
-            # 计算印度与中国新边界的重叠区
-            overlap = india_geom.intersection(china_merged)
-            if not overlap.is_empty:
-                print(f"   检测到重叠区域: {overlap.geom_type}, 面积: {overlap.area:.6f}")
-                # 从印度中减去重叠区
-                india_new = india_geom.difference(china_merged)
-                if not india_new.is_empty:
-                    features[india_idx]['geometry'] = shapely_to_geojson(india_new)
-                    print(f"   [OK] 已从印度裁剪重叠区，新几何类型: {india_new.geom_type}")
-                else:
-                    print("   警告: 裁剪后印度几何为空，保留原几何")
-            else:
-                print("   未检测到与中国边界的重叠")
-    else:
-        print("\n2. 未找到印度 (IND) 要素")
-    
-    # ========== 3. 处理索马里兰（合并到索马里） ==========
-    print(f"\n3. 处理 Somaliland - 合并到 Somalia")
-    
-    somalia_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'SOM' or 
-        f.get('properties', {}).get('ISO_A3') == 'SOM'
-    )
-    
-    somaliland_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'SOL' or 
-        f.get('properties', {}).get('SOV_A3') == 'SOL'
-    )
-    
-    if somalia_idx != -1 and somaliland_idx != -1:
-        print(f"   找到 Somalia (索引 {somalia_idx}) 和 Somaliland (索引 {somaliland_idx})")
-        
-        # 获取两个几何
-        somalia_geom = geojson_to_shapely(features[somalia_idx].get('geometry'))
-        somaliland_geom = geojson_to_shapely(features[somaliland_idx].get('geometry'))
-        
-        if somalia_geom and somaliland_geom:
-            # 合并几何
-            merged_somalia = unary_union([somalia_geom, somaliland_geom])
-            features[somalia_idx]['geometry'] = shapely_to_geojson(merged_somalia)
-            print(f"   [OK] 已合并 Somaliland 到 Somalia")
-            
-            # 删除 Somaliland 要素（注意：如果 somaliland_idx > somalia_idx，删除后索引不变）
-            del features[somaliland_idx]
-            print(f"   [OK] 已删除 Somaliland 独立要素")
-        else:
-            print("   错误: 几何转换失败，跳过合并")
-    elif somaliland_idx != -1:
-        # 只有 Somaliland 没有 Somalia，直接删除
-        print(f"   未找到 Somalia，直接删除 Somaliland (索引 {somaliland_idx})")
-        del features[somaliland_idx]
-        print(f"   [OK] 已删除 Somaliland 要素")
-    else:
-        print("   未找到 Somaliland 要素")
-    
-    # ========== 4. 处理科索沃（并入塞尔维亚） ==========
-    print(f"\n4. 处理 Kosovo - 并入 Serbia")
-    
-    serbia_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'SRB' or 
-        f.get('properties', {}).get('ISO_A3') == 'SRB'
-    )
-    
-    kosovo_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'KOS' or 
-        f.get('properties', {}).get('ADM0_A3') == 'XKX'
-    )
-    
-    if serbia_idx != -1 and kosovo_idx != -1:
-        print(f"   找到 Serbia (索引 {serbia_idx}) 和 Kosovo (索引 {kosovo_idx})")
-        
-        serbia_geom = geojson_to_shapely(features[serbia_idx].get('geometry'))
-        kosovo_geom = geojson_to_shapely(features[kosovo_idx].get('geometry'))
-        
-        if serbia_geom and kosovo_geom:
-            merged_serbia = unary_union([serbia_geom, kosovo_geom])
-            features[serbia_idx]['geometry'] = shapely_to_geojson(merged_serbia)
-            print(f"   [OK] 已合并 Kosovo 到 Serbia")
-            
-            del features[kosovo_idx]
-            print(f"   [OK] 已删除 Kosovo 独立要素")
-        else:
-            print("   错误: 几何转换失败，跳过合并")
-    elif kosovo_idx != -1:
-        print(f"   未找到 Serbia，直接删除 Kosovo (索引 {kosovo_idx})")
-        del features[kosovo_idx]
-        print(f"   [OK] 已删除 Kosovo 要素")
-    else:
-        print("   未找到 Kosovo 要素")
-    
-    # ========== 5. 处理北塞浦路斯（并入塞浦路斯） ==========
-    print(f"\n5. 处理 N. Cyprus - 并入 Cyprus")
-    
-    cyprus_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'CYP' or 
-        f.get('properties', {}).get('ISO_A3') == 'CYP'
-    )
-    
-    ncyprus_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'CYN' or 
-        f.get('properties', {}).get('SOV_A3') == 'CYN'
-    )
-    
-    if cyprus_idx != -1 and ncyprus_idx != -1:
-        print(f"   找到 Cyprus (索引 {cyprus_idx}) 和 N. Cyprus (索引 {ncyprus_idx})")
-        
-        cyprus_geom = geojson_to_shapely(features[cyprus_idx].get('geometry'))
-        ncyprus_geom = geojson_to_shapely(features[ncyprus_idx].get('geometry'))
-        
-        if cyprus_geom and ncyprus_geom:
-            merged_cyprus = unary_union([cyprus_geom, ncyprus_geom])
-            features[cyprus_idx]['geometry'] = shapely_to_geojson(merged_cyprus)
-            print(f"   [OK] 已合并 N. Cyprus 到 Cyprus")
-            
-            del features[ncyprus_idx]
-            print(f"   [OK] 已删除 N. Cyprus 独立要素")
-        else:
-            print("   错误: 几何转换失败，跳过合并")
-    elif ncyprus_idx != -1:
-        print(f"   未找到 Cyprus，直接删除 N. Cyprus (索引 {ncyprus_idx})")
-        del features[ncyprus_idx]
-        print(f"   [OK] 已删除 N. Cyprus 要素")
-    else:
-        print("   未找到 N. Cyprus 要素")
-    
-    # ========== 6. 删除其他争议要素 ==========
-    print(f"\n6. 删除其他争议要素")
-    
-    # 删除 Taiwan (TWN)
-    taiwan_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'TWN' or 
-        f.get('properties', {}).get('ISO_A3') == 'TWN'
-    )
-    if taiwan_idx != -1:
-        del features[taiwan_idx]
-        print(f"   [OK] 已删除 Taiwan 要素")
-    else:
-        print("   未找到 Taiwan 要素")
-    
-    # 删除 Siachen Glacier (KAS)
-    kas_idx = find_feature_index(features, lambda f: 
-        f.get('properties', {}).get('ADM0_A3') == 'KAS'
-    )
-    if kas_idx != -1:
-        del features[kas_idx]
-        print(f"   [OK] 已删除 Siachen Glacier (KAS) 要素")
-    else:
-        print("   未找到 Siachen Glacier (KAS) 要素")
-    
-    print(f"\n处理后世界地图要素数: {len(features)}")
-    
-    # 保存新文件
+
+    index = IsoIndex(features)
+    deleted = set()
+    for i, rule in enumerate(BOUNDARY_RULES, 1):
+        print(f"\n{i}. {rule['op']} {rule['target']} - {rule['label']}")
+        if not _apply_rule(rule, features, index, china_merged, deleted):
+            return False
+
+    # 统一删除，避免删除过程中索引位移
+    world_data['features'] = [f for i, f in enumerate(features) if i not in deleted]
+    print(f"\n处理后世界地图要素数: {len(world_data['features'])}")
+
     save_geojson(world_data, output_path)
-    print(f"\n保存到: {output_path}")
-    
-    # 统计文件大小
+    print(f"保存到: {output_path}")
+
     original_size = Path(world_path).stat().st_size
     new_size = Path(output_path).stat().st_size
     print(f"原文件大小: {original_size / 1024 / 1024:.2f} MB")
     print(f"新文件大小: {new_size / 1024 / 1024:.2f} MB")
-    
     return True
 
+
+def export_flatgeobuf(geojson_path: str, output_path: str) -> bool:
+    """将处理后的世界边界导出为带空间索引的 FlatGeobuf"""
+    import numpy as np
+    from pyogrio.raw import write
+    from shapely import to_wkb
+    from shapely.geometry import MultiPolygon
+
+    data = load_geojson(geojson_path)
+    geometries = []
+    rows = []
+    for f in data.get('features', []):
+        g = geojson_to_shapely(f.get('geometry'))
+        if g is None or g.is_empty:
+            continue
+        # FlatGeobuf 要求单一几何类型，Polygon 统一提升为 MultiPolygon
+        if g.geom_type == 'Polygon':
+            g = MultiPolygon([g])
+        geometries.append(g)
+        rows.append(f.get('properties', {}) or {})
+
+    field_data = [
+        np.array([str(p.get(name) or '') for p in rows], dtype=object)
+        for name in FGB_STRING_FIELDS
+    ] + [
+        np.array([int(p.get(name) or 0) for p in rows], dtype=np.int64)
+        for name in FGB_INT_FIELDS
+    ]
+
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    write(
+        output_path,
+        np.array(to_wkb(geometries), dtype=object),
+        field_data,
+        list(FGB_STRING_FIELDS + FGB_INT_FIELDS),
+        driver='FlatGeobuf',
+        geometry_type='MultiPolygon',
+        crs='EPSG:4326',
+        layer_options={'SPATIAL_INDEX': 'YES'},
+    )
+    print(f"导出 {len(geometries)} 个要素到: {output_path}")
+    print(f"FlatGeobuf 文件大小: {Path(output_path).stat().st_size / 1024 / 1024:.2f} MB")
+    return True
+
+
+def process_world_geojson(force: bool = False, cache_dir: Optional[str] = None) -> bool:
+    """主处理函数"""
+    pipeline = BuildPipeline(cache_dir or CACHE_DIR, force=force)
+
+    with pipeline.timed('hash_inputs'):
+        china_hash = file_hash(CHINA_PATH)
+        world_hash = file_hash(WORLD_PATH)
+
+    # 融合结果按中国文件哈希存放，同一输入只融合一次
+    dissolve_key = combine_hash('dissolve_china', china_hash, PIPELINE_VERSION)
+    china_wkb_path = str(pipeline.cache_dir / f'china_dissolved-{dissolve_key[:16]}.wkb')
+    if not pipeline.run(
+        'dissolve_china', dissolve_key, [china_wkb_path],
+        lambda: dissolve_china(CHINA_PATH, china_wkb_path),
+    ):
+        pipeline.report()
+        return False
+
+    rules_key = combine_hash('apply_rules', world_hash, dissolve_key, BOUNDARY_RULES, PIPELINE_VERSION)
+    ok = pipeline.run(
+        'apply_rules', rules_key, [OUTPUT_PATH],
+        lambda: apply_rules(WORLD_PATH, china_wkb_path, OUTPUT_PATH),
+    )
+
+    if ok:
+        try:
+            import pyogrio  # noqa: F401
+        except ImportError:
+            print("\n[跳过] export_flatgeobuf: 未安装 pyogrio（pip install pyogrio）")
+        else:
+            fgb_key = combine_hash(
+                'export_flatgeobuf', file_hash(OUTPUT_PATH),
+                FGB_STRING_FIELDS, FGB_INT_FIELDS, PIPELINE_VERSION,
+            )
+            ok = pipeline.run(
+                'export_flatgeobuf', fgb_key, [FGB_OUTPUT_PATH],
+                lambda: export_flatgeobuf(OUTPUT_PATH, FGB_OUTPUT_PATH),
+            )
+
+    pipeline.report()
+    return ok
+
+
 if __name__ == '__main__':
-    success = process_world_geojson()
-    exit(0 if success else 1)
+    parser = argparse.ArgumentParser(description='构建 world_50m_custom.geojson')
+    parser.add_argument('--force', action='store_true', help='忽略缓存，重新执行所有步骤')
+    args = parser.parse_args()
+    success = process_world_geojson(force=args.force)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,37 @@
+import pytest
+
+from backend.app import create_app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"ticks": 5, "scenarios": [{"shocks": [{"factor": 0.5, "countries": 5}]}]},
+        {"ticks": 5, "scenarios": [{"shocks": [{"factor": 0.5, "resource": 3}]}]},
+        {"ticks": 5, "scenarios": [{"embargoes": [{"exporters": 5}]}]},
+        {"ticks": 5, "scenarios": [{"embargoes": [{"exporters": ["SAU"], "resource": {"oil": 1}}]}]},
+        {"ticks": 5, "scenarios": [{}], "countries": 7},
+        {"ticks": 5, "scenarios": [{}], "countries": [7]},
+        {"ticks": 5, "scenarios": [{}], "version": 5},
+        {"ticks": float("inf"), "scenarios": [{}]},
+        {"ticks": 1000, "scenarios": [{"growth": {"gdp": 5, "oil": 5}}]},
+    ],
+)
+def test_malformed_scenarios_are_rejected(client, body):
+    response = client.post("/api/simulate", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_valid_scenario_runs(client):
+    response = client.post(
+        "/api/simulate",
+        json={"ticks": 3, "scenarios": [{"shocks": [{"factor": 0.5, "resource": "oil", "countries": "SAU"}]}]},
+    )
+    assert response.status_code == 200
+    assert len(response.get_json()["scenarios"][0]["prices"]["oil"]) == 4